@@ -0,0 +1,47 @@
+"""Compare the memory held by list and columnar statement lines
+
+$ python benchmarks/bench_columns.py --rows 200000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from ofxstatement_schwab_json.parser import SchwabJsonParser
+from ofxstatement_schwab_json.synthetic import ExportGenerator
+
+
+def measure(filename: str, columnar: bool) -> tuple:
+    tracemalloc.start()
+    start = time.perf_counter()
+    statement = SchwabJsonParser(filename, streaming=True, columnar=columnar).parse()
+    seconds = time.perf_counter() - start
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    rows = len(statement.lines) + len(statement.invest_lines)
+    return rows, retained, seconds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, "Bench_XXX000_Transactions_20260101-000000.json")
+        ExportGenerator(args.rows, posted_rows=args.rows // 10).write(filename)
+        # Fill the money and date caches, so both runs start from the same state
+        measure(filename, False)
+        for columnar in (False, True):
+            rows, retained, seconds = measure(filename, columnar)
+            label = "columnar" if columnar else "lists"
+            print(
+                f"{label:<10} {retained / rows * 1e6 / 2**20:8,.0f} MB per million rows"
+                f" {seconds:8.2f}s"
+            )
+
+
+if __name__ == "__main__":
+    main()
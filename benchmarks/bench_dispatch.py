@@ -0,0 +1,31 @@
+"""Measure per-row action dispatch cost
+
+Resolves every action in BROKERAGE_ACTIONS many times. The time per row
+should be flat whether an action sits at the start or the end of the table.
+
+    $ python benchmarks/bench_dispatch.py
+"""
+
+import timeit
+
+from ofxstatement_schwab_json.parser import BROKERAGE_ACTIONS, SchwabJsonParser
+
+ROUNDS = 200_000
+
+
+def main() -> None:
+    parser = SchwabJsonParser("bench.json")
+    rows = [
+        (action, bool(has_symbol), bool(negative))
+        for action, has_symbol, negative in BROKERAGE_ACTIONS
+    ]
+    for action, has_symbol, negative in (rows[0], rows[len(rows) // 2], rows[-1]):
+        seconds = timeit.timeit(
+            lambda: parser.resolve_action(action, has_symbol, negative),
+            number=ROUNDS,
+        )
+        print(f"{action:<30} {seconds / ROUNDS * 1e9:8.1f} ns/row")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""Compare money parsing against the previous regex-based conversion
+
+$ python benchmarks/bench_money.py
+"""
+
+from decimal import Decimal
+import random
+import re
+import timeit
+
+from ofxstatement_schwab_json.money import parse_money
+
+ROWS = 100_000
+
+
+def regex_parse(value: str) -> Decimal:
+    return Decimal(re.sub("[$,]", "", value))
+
+
+def main() -> None:
+    rng = random.Random(0)
+    # Mostly repeated values, like fees and money market prices, plus a tail
+    # of distinct amounts
+    common = ["$0.00", "$1.00", "-$100.00", "$25.81", "1,000"]
+    values = [
+        rng.choice(common) if rng.random() < 0.8 else f"${rng.random() * 1e4:,.2f}"
+        for _ in range(ROWS)
+    ]
+
+    baseline = timeit.timeit(lambda: [regex_parse(v) for v in values], number=1)
+    parse_money.cache_clear()
+    cached = timeit.timeit(lambda: [parse_money(v) for v in values], number=1)
+    print(f"re.sub + Decimal  {baseline / ROWS * 1e9:8.1f} ns/value")
+    print(f"parse_money       {cached / ROWS * 1e9:8.1f} ns/value")
+    print(f"speedup           {baseline / cached:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
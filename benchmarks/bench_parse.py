@@ -0,0 +1,152 @@
+"""Parser benchmark suite
+
+Writes a synthetic export and measures SchwabJsonParser on it: rows per
+second, peak RSS and the time spent in each phase, for the regular and the
+streaming parse. Every run happens in a fresh process, so the peak RSS is
+that run's own.
+
+    $ python benchmarks/bench_parse.py --rows 200000
+    $ python benchmarks/bench_parse.py --rows 200000 --save-baseline base.json
+    $ python benchmarks/bench_parse.py --rows 200000 --baseline base.json
+
+With --baseline, exits with status 1 when a case is more than --tolerance
+slower in rows per second, or peaks that much higher in memory, than the
+stored baseline. Baselines are machine specific, so record them on the
+machine that checks them. Peak RSS is measured with the resource module, so
+this runs on Unix only.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from ofxstatement_schwab_json.parser import SchwabJsonParser
+from ofxstatement_schwab_json.stream import ExportReader
+from ofxstatement_schwab_json.synthetic import ExportGenerator
+
+CASES = ["full", "streaming"]
+
+
+def run_case(case: str, filename: str) -> dict:
+    parser = SchwabJsonParser(filename)
+    phases: Dict[str, float] = {}
+    start = time.perf_counter()
+    if case == "full":
+        with open(filename, "r") as f:
+            loaded = json.load(f)
+        phases["decode"] = time.perf_counter() - start
+        parser.import_lines(
+            reversed(loaded.get("PostedTransactions", [])),
+            reversed(loaded.get("BrokerageTransactions", [])),
+        )
+    else:
+        with ExportReader(filename) as reader:
+            phases["scan"] = time.perf_counter() - start
+            parser.import_lines(
+                reader.chronological("PostedTransactions"),
+                reader.chronological("BrokerageTransactions"),
+            )
+    seconds = time.perf_counter() - start
+    phases["import"] = seconds - sum(phases.values())
+
+    rows = len(parser.statement.lines) + len(parser.statement.invest_lines)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak_mb = peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    return {
+        "rows": rows,
+        "seconds": seconds,
+        "rows_per_second": rows / seconds,
+        "peak_rss_mb": peak_mb,
+        "phases": phases,
+    }
+
+
+def measure(case: str, filename: str, repeat: int) -> dict:
+    """Best of several runs, each in a new process"""
+    context = multiprocessing.get_context("spawn")
+    runs = []
+    for _ in range(repeat):
+        with context.Pool(1) as pool:
+            runs.append(pool.apply(run_case, (case, filename)))
+    best = max(runs, key=lambda r: r["rows_per_second"])
+    best["peak_rss_mb"] = min(r["peak_rss_mb"] for r in runs)
+    return best
+
+
+def regressions(results: dict, baseline: dict, tolerance: float) -> List[str]:
+    found = []
+    for case, result in results["cases"].items():
+        base = baseline["cases"].get(case)
+        if base is None:
+            continue
+        if result["rows_per_second"] < base["rows_per_second"] * (1 - tolerance):
+            found.append(
+                f"{case}: {result['rows_per_second']:,.0f} rows/s, "
+                f"baseline {base['rows_per_second']:,.0f}"
+            )
+        if result["peak_rss_mb"] > base["peak_rss_mb"] * (1 + tolerance):
+            found.append(
+                f"{case}: {result['peak_rss_mb']:,.1f} MB peak RSS, "
+                f"baseline {base['peak_rss_mb']:,.1f}"
+            )
+    return found
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000, help="brokerage rows")
+    parser.add_argument("--posted-rows", type=int, default=10000, help="banking rows")
+    parser.add_argument("--symbols", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--case", choices=CASES, action="append")
+    parser.add_argument("--baseline", help="fail on regressions against this file")
+    parser.add_argument("--save-baseline", help="write the results to this file")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    results: dict = {
+        "rows": args.rows,
+        "posted_rows": args.posted_rows,
+        "symbols": args.symbols,
+        "cases": {},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, "Bench_XXX000_Transactions_20260101-000000.json")
+        ExportGenerator(
+            args.rows, posted_rows=args.posted_rows, symbols=args.symbols
+        ).write(filename)
+        for case in args.case or CASES:
+            result = measure(case, filename, args.repeat)
+            results["cases"][case] = result
+            phases = ", ".join(f"{k} {v:.2f}s" for k, v in result["phases"].items())
+            print(
+                f"{case:<10} {result['rows_per_second']:>10,.0f} rows/s "
+                f"{result['peak_rss_mb']:>8,.1f} MB peak  ({phases})"
+            )
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        if baseline["rows"] != args.rows:
+            print(f"Warning: baseline was recorded with {baseline['rows']} rows")
+        found = regressions(results, baseline, args.tolerance)
+        for regression in found:
+            print(f"REGRESSION {regression}")
+        if found:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
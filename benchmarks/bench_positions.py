@@ -0,0 +1,55 @@
+"""Compare Positions with replaying every line in Python
+
+$ python benchmarks/bench_positions.py --rows 500000
+"""
+
+import argparse
+from collections import defaultdict
+from decimal import Decimal
+import os
+import tempfile
+import time
+
+from ofxstatement_schwab_json.parser import SchwabJsonParser
+from ofxstatement_schwab_json.positions import SHARE_TYPES, Positions, numpy
+from ofxstatement_schwab_json.synthetic import ExportGenerator
+
+
+def replay(lines) -> dict:
+    holdings: dict = defaultdict(Decimal)
+    for line in lines:
+        if line.trntype in SHARE_TYPES and line.security_id:
+            holdings[line.security_id] += line.units
+    return holdings
+
+
+def timed(label: str, func) -> None:
+    start = time.perf_counter()
+    func()
+    print(f"{label:<20} {time.perf_counter() - start:8.3f}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--symbols", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, "Bench_XXX000_Transactions_20260101-000000.json")
+        ExportGenerator(args.rows, symbols=args.symbols).write(filename)
+        lines = SchwabJsonParser(filename, streaming=True).parse().invest_lines
+
+    timed("replay", lambda: replay(lines))
+    timed("Positions (python)", lambda: Positions(lines, use_numpy=False))
+    if numpy is not None:
+        positions = Positions(lines, use_numpy=True)
+        timed("Positions (numpy)", lambda: Positions(lines, use_numpy=True))
+        day = lines[len(lines) // 2].date
+        timed(
+            "1000 as-of lookups", lambda: [positions.holdings(day) for _ in range(1000)]
+        )
+
+
+if __name__ == "__main__":
+    main()
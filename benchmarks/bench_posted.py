@@ -0,0 +1,45 @@
+"""Compare the PostedTransactions fast path with add_statement_line
+
+Converts the same synthetic rows, already numbered, both ways:
+
+    $ python benchmarks/bench_posted.py --rows 200000
+"""
+
+import argparse
+import timeit
+from typing import List, Optional
+
+from ofxstatement_schwab_json.parser import POSTED_TRANSACTION_TYPES, SchwabJsonParser
+from ofxstatement_schwab_json.posted import posted_lines
+from ofxstatement_schwab_json.synthetic import ExportGenerator
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    args.add_argument("--rows", type=int, default=200_000)
+    args.add_argument("--repeat", type=int, default=3)
+    options = args.parse_args(argv)
+
+    export = ExportGenerator(0, posted_rows=options.rows).generate()
+    parser = SchwabJsonParser("bench.json")
+    rows = list(parser.number_rows(reversed(export["PostedTransactions"])))
+
+    def per_row() -> list:
+        add_statement_line = parser.add_statement_line
+        return [add_statement_line(id, date, tran) for id, date, tran in rows]
+
+    def batched() -> list:
+        return list(
+            posted_lines(rows, POSTED_TRANSACTION_TYPES, parser.add_statement_line)
+        )
+
+    assert [vars(x) for x in per_row()] == [vars(x) for x in batched()]
+    baseline = min(timeit.repeat(per_row, number=1, repeat=options.repeat))
+    fast = min(timeit.repeat(batched, number=1, repeat=options.repeat))
+    print(f"add_statement_line  {baseline / options.rows * 1e9:8.1f} ns/row")
+    print(f"posted_lines        {fast / options.rows * 1e9:8.1f} ns/row")
+    print(f"speedup             {baseline / fast:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
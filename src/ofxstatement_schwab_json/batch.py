@@ -0,0 +1,235 @@
+"""Convert many Schwab JSON exports in one run
+
+Starting `ofxstatement convert` once per file spends most of its time on
+interpreter startup, and only uses one core. This converts a whole directory
+(or a manifest listing one file per line) across a process pool, writing one
+OFX file per input:
+
+    $ ofxstatement-schwab-json-batch -t schwab -o ofx/ exports/
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import glob
+import logging
+import os
+import time
+from typing import Iterable, List, MutableMapping, NamedTuple, Optional, Sequence
+
+from ofxstatement import configuration, ui
+
+from ofxstatement_schwab_json.merge import group_by_account
+from ofxstatement_schwab_json.parser import account_id_from_filename
+from ofxstatement_schwab_json.plugin import SchwabJsonPlugin
+from ofxstatement_schwab_json.writer import SchwabOfxWriter
+
+LOGGER = logging.getLogger(__name__)
+
+EXPORT_PATTERN = "*_Transactions_*.json"
+
+
+class FileResult(NamedTuple):
+    filename: str
+    output: str
+    lines: int
+    seconds: float
+    error: Optional[str] = None
+
+
+class BatchSummary(NamedTuple):
+    results: List[FileResult]
+    wall_seconds: float
+
+    @property
+    def failed(self) -> List[FileResult]:
+        return [r for r in self.results if r.error is not None]
+
+    @property
+    def lines(self) -> int:
+        return sum(r.lines for r in self.results)
+
+
+def find_inputs(source: str) -> List[str]:
+    """List the exports in a directory, or read them from a manifest file
+
+    Manifest paths are relative to the manifest. Blank lines and lines
+    starting with # are ignored.
+    """
+    if os.path.isdir(source):
+        return sorted(glob.glob(os.path.join(source, EXPORT_PATTERN)))
+
+    base = os.path.dirname(source)
+    with open(source, "r") as f:
+        entries = [line.strip() for line in f]
+    return [
+        os.path.join(base, entry)
+        for entry in entries
+        if entry and not entry.startswith("#")
+    ]
+
+
+def output_path(filename: str, output_dir: Optional[str], merge: bool = False) -> str:
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    if merge:
+        stem = account_id_from_filename(filename) or stem
+    return os.path.join(output_dir or os.path.dirname(filename), stem + ".ofx")
+
+
+def convert_file(
+    filename: str,
+    output: str,
+    settings: MutableMapping,
+    pretty: bool = False,
+    merge_with: Sequence[str] = (),
+) -> FileResult:
+    """Convert one export, reporting failures instead of raising them
+
+    Exports of the same account listed in merge_with are merged into the
+    same OFX file.
+    """
+    start = time.perf_counter()
+    try:
+        plugin = SchwabJsonPlugin(ui.UI(), settings)
+        if merge_with:
+            parser = plugin.get_merge_parser([filename, *merge_with])
+        else:
+            parser = plugin.get_parser(filename)
+        statement = parser.parse()
+        statement.assert_valid()
+        encoding = settings.get("encoding", "utf-8")
+        with open(output, "w", encoding=encoding) as out:
+            writer = SchwabOfxWriter(statement)
+            out.write(writer.toxml(pretty=pretty, encoding=encoding))
+    except Exception as e:
+        return FileResult(
+            filename, output, 0, time.perf_counter() - start, f"{type(e).__name__}: {e}"
+        )
+    lines = len(statement.lines) + len(statement.invest_lines)
+    return FileResult(filename, output, lines, time.perf_counter() - start)
+
+
+def convert_all(
+    filenames: Iterable[str],
+    settings: MutableMapping,
+    output_dir: Optional[str] = None,
+    jobs: Optional[int] = None,
+    pretty: bool = False,
+    merge: bool = False,
+) -> BatchSummary:
+    """Convert the files across a process pool, one OFX file per input
+
+    With merge, the exports of each account are merged into one OFX file per
+    account instead. jobs defaults to the number of CPUs. With jobs=1 the
+    files are converted in this process, which is easier to debug.
+    """
+    start = time.perf_counter()
+    if merge:
+        groups = group_by_account(filenames)
+    else:
+        groups = [[filename] for filename in filenames]
+    tasks = [(g[0], output_path(g[0], output_dir, merge), g[1:]) for g in groups]
+    results: List[FileResult] = []
+    if jobs == 1:
+        for filename, output, rest in tasks:
+            result = convert_file(filename, output, settings, pretty, rest)
+            results.append(report(result))
+    else:
+        with ProcessPoolExecutor(max_workers=jobs or os.cpu_count()) as executor:
+            futures = [
+                executor.submit(
+                    convert_file, filename, output, dict(settings), pretty, rest
+                )
+                for filename, output, rest in tasks
+            ]
+            for future in as_completed(futures):
+                results.append(report(future.result()))
+    return BatchSummary(results, time.perf_counter() - start)
+
+
+def report(result: FileResult) -> FileResult:
+    if result.error is None:
+        LOGGER.info(
+            "Converted %s -> %s (%d lines, %.2fs)",
+            result.filename,
+            result.output,
+            result.lines,
+            result.seconds,
+        )
+    else:
+        LOGGER.error("Failed %s: %s", result.filename, result.error)
+    return result
+
+
+def make_args_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Convert a batch of Schwab JSON exports to OFX files"
+    )
+    parser.add_argument("input", help="directory of exports, or a manifest file")
+    parser.add_argument(
+        "-o", "--output-dir", help="where to write OFX files (default: next to input)"
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, help="worker processes (default: CPU count)"
+    )
+    parser.add_argument("-c", "--config", help="ofxstatement config file")
+    parser.add_argument(
+        "-t", "--type", help="config section with the plugin settings to use"
+    )
+    parser.add_argument(
+        "--merge",
+        action="store_true",
+        help="merge overlapping exports into one OFX file per account",
+    )
+    parser.add_argument(
+        "--start", help="only transactions from this YYYY-MM-DD, YYYY-MM or YYYY"
+    )
+    parser.add_argument(
+        "--end", help="only transactions up to this YYYY-MM-DD, YYYY-MM or YYYY"
+    )
+    parser.add_argument("--pretty", action="store_true", help="pretty print OFX")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = make_args_parser().parse_args(argv)
+    logging.basicConfig(format="%(levelname)s: %(message)s", level=logging.INFO)
+
+    settings: MutableMapping = {}
+    if args.type:
+        config = configuration.read(args.config)
+        if config is None or args.type not in config:
+            LOGGER.error("No section '%s' in config file.", args.type)
+            return 1
+        settings = dict(config[args.type])
+    if args.start:
+        settings["start"] = args.start
+    if args.end:
+        settings["end"] = args.end
+
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    summary = convert_all(
+        find_inputs(args.input),
+        settings,
+        output_dir=args.output_dir,
+        jobs=args.jobs,
+        pretty=args.pretty,
+        merge=args.merge,
+    )
+    files = len(summary.results)
+    wall = summary.wall_seconds
+    LOGGER.info(
+        "%d files (%d failed), %d lines in %.2fs: %.1f files/s, %.0f lines/s",
+        files,
+        len(summary.failed),
+        summary.lines,
+        wall,
+        files / wall if wall else 0,
+        summary.lines / wall if wall else 0,
+    )
+    return 2 if summary.failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
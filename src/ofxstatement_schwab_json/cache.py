@@ -0,0 +1,154 @@
+"""On-disk cache of parsed statements
+
+Converting the same unchanged export again gives the same statement, so
+ParseCache keeps parsed statements in a directory, keyed by a hash of the
+export's content together with the versions of this plugin and ofxstatement
+and the settings that change the result. A changed file, upgrade or setting
+makes a new key, so stale entries are never read; they just age out.
+
+Statements are stored with their lines in LineColumns, pickled and
+compressed. The directory is bounded in size: entries are touched when read,
+and the least recently used ones are removed once the total goes over the
+limit. Entries are written to a temporary file and renamed into place, so
+concurrent conversions never see a partial entry, and an entry that can't be
+read is treated as missing.
+
+Bump CACHE_FORMAT whenever a change to the parser changes its output.
+"""
+
+from hashlib import blake2b
+from importlib import metadata
+import logging
+import os
+import pickle
+import tempfile
+from typing import Iterable, List, Optional
+import zlib
+
+from ofxstatement.statement import Statement
+
+from ofxstatement_schwab_json.columns import (
+    InvestLineColumns,
+    LineColumns,
+    StatementLineColumns,
+    StringTable,
+)
+
+LOGGER = logging.getLogger(__name__)
+
+CACHE_FORMAT = 1
+DEFAULT_SIZE_MB = 256
+SUFFIX = ".statement"
+CHUNK_SIZE = 1 << 20
+
+
+def _version(package: str) -> str:
+    try:
+        return metadata.version(package)
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+class ParseCache:
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_SIZE_MB << 20) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(filenames: Iterable[str], *settings) -> str:
+        """Hash of the files' content, the versions and the settings"""
+        digest = blake2b(digest_size=20)
+        versions = (
+            CACHE_FORMAT,
+            _version("ofxstatement-schwab-json"),
+            _version("ofxstatement"),
+        )
+        digest.update(repr((versions, settings)).encode())
+        for filename in filenames:
+            with open(filename, "rb") as f:
+                while chunk := f.read(CHUNK_SIZE):
+                    digest.update(chunk)
+            # Keep the boundaries between files
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + SUFFIX)
+
+    def get(self, key: str) -> Optional[Statement]:
+        path = self.path(key)
+        try:
+            with open(path, "rb") as f:
+                statement = pickle.loads(zlib.decompress(f.read()))
+            # Mark as recently used
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            LOGGER.warning(f"Ignoring unreadable cache entry {path}: {e}")
+            self._remove(path)
+            return None
+        return statement
+
+    def put(self, key: str, statement: Statement) -> None:
+        data = zlib.compress(pickle.dumps(compact(statement), pickle.HIGHEST_PROTOCOL))
+        fd, temp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp, self.path(key))
+        except BaseException:
+            self._remove(temp)
+            raise
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove the least recently used entries while over the size limit"""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(SUFFIX):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def compact(statement: Statement) -> Statement:
+    """A shallow copy of statement, with its lines in LineColumns"""
+    copy = Statement.__new__(Statement)
+    copy.__dict__.update(statement.__dict__)
+    strings = StringTable()
+    for name, columns_type in (
+        ("lines", StatementLineColumns),
+        ("invest_lines", InvestLineColumns),
+    ):
+        lines = getattr(statement, name)
+        if not isinstance(lines, LineColumns):
+            columns = columns_type(strings)
+            columns.extend(lines)
+            lines = columns
+        setattr(copy, name, lines)
+    return copy
+
+
+def expand(statement: Statement) -> None:
+    """Turn LineColumns in statement back into lists"""
+    lines: List = list(statement.lines)
+    invest_lines: List = list(statement.invest_lines)
+    statement.lines = lines
+    statement.invest_lines = invest_lines
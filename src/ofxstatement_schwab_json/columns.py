@@ -0,0 +1,238 @@
+"""Compact columnar storage of statement lines
+
+A StatementLine or InvestStatementLine object, with its Decimal and datetime
+fields, takes several hundred bytes. A large export produces millions of
+them, and most of their content repeats: the same handful of transaction
+types, the same symbols and the same memos.
+
+LineColumns packs the fields of each line into arrays instead. Strings are
+interned into a table shared by the columns of a statement, dates are kept
+as ordinals and amounts as integer coefficients with a decimal exponent, so
+they come back exactly as they went in. IDs of the usual YYYYMMDD-n form are
+kept as just n. Lines are created again only when they're read, so a
+statement whose lines are LineColumns can still be passed to OfxWriter.
+
+Only the fields SchwabJsonParser sets are stored. Dates are whole days, as
+parse_date produces them.
+"""
+
+from array import array
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union, overload
+
+from ofxstatement.statement import InvestStatementLine, StatementLine
+
+Line = Union[StatementLine, InvestStatementLine]
+
+# Exponent marking a missing Decimal
+NO_DECIMAL = 127
+
+
+class StringTable:
+    """Interned strings, referred to by index. Index 0 is None."""
+
+    def __init__(self) -> None:
+        self.strings: List[Optional[str]] = [None]
+        self.indexes: Dict[Optional[str], int] = {None: 0}
+
+    def index(self, value: Optional[str]) -> int:
+        index = self.indexes.get(value)
+        if index is None:
+            index = self.indexes[value] = len(self.strings)
+            self.strings.append(value)
+        return index
+
+    def __getitem__(self, index: int) -> Optional[str]:
+        return self.strings[index]
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+    def __getstate__(self) -> List[Optional[str]]:
+        # The indexes follow from the strings
+        return self.strings
+
+    def __setstate__(self, strings: List[Optional[str]]) -> None:
+        self.strings = strings
+        self.indexes = {value: index for index, value in enumerate(strings)}
+
+
+class LineColumns(Sequence):
+    """A list-like sequence of lines, stored column by column"""
+
+    line_type: type
+    string_fields: Tuple[str, ...]
+    decimal_fields: Tuple[str, ...]
+
+    def __init__(self, strings: Optional[StringTable] = None) -> None:
+        self.strings = strings or StringTable()
+        # Day ordinals, 0 if there's no date
+        self.dates = array("i")
+        # n for IDs of the form YYYYMMDD-n, otherwise minus the index of the
+        # ID in the string table
+        self.ids = array("q")
+        self.string_columns = {name: array("i") for name in self.string_fields}
+        self.coefficients = {name: array("q") for name in self.decimal_fields}
+        self.exponents = {name: array("b") for name in self.decimal_fields}
+
+    def append(self, line: Line) -> None:
+        date = line.date
+        self.dates.append(0 if date is None else date.toordinal())
+        self.ids.append(self._pack_id(line.id, date))
+        for name, column in self.string_columns.items():
+            column.append(self.strings.index(getattr(line, name)))
+        for name in self.decimal_fields:
+            coefficient, exponent = _pack_decimal(getattr(line, name))
+            self.coefficients[name].append(coefficient)
+            self.exponents[name].append(exponent)
+
+    def extend(self, lines) -> None:
+        for line in lines:
+            self.append(line)
+
+    def extend_columns(
+        self, other: "LineColumns", id_offsets: Optional[Dict[int, int]] = None
+    ) -> None:
+        """Append the lines of other, which can have its own string table
+
+        id_offsets, by day ordinal, is added to the n of YYYYMMDD-n IDs.
+        """
+        strings = [self.strings.index(value) for value in other.strings.strings]
+        offsets = id_offsets or {}
+        self.dates.extend(other.dates)
+        self.ids.extend(
+            packed + offsets.get(day, 0) if packed > 0 else -strings[-packed]
+            for day, packed in zip(other.dates, other.ids)
+        )
+        for name, column in self.string_columns.items():
+            column.extend([strings[index] for index in other.string_columns[name]])
+        for name in self.decimal_fields:
+            self.coefficients[name].extend(other.coefficients[name])
+            self.exponents[name].extend(other.exponents[name])
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    @overload
+    def __getitem__(self, index: int) -> Line: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[Line]: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.line(n) for n in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("line index out of range")
+        return self.line(index)
+
+    def __iter__(self) -> Iterator[Line]:
+        # Column by column rather than line(n) for each n, which is several
+        # times faster. Missing values are left at the line's defaults.
+        names = ("date", "id") + self.string_fields + self.decimal_fields
+        strings = self.strings.strings
+        columns = [
+            self._dates(),
+            self._ids(),
+            *(map(strings.__getitem__, c) for c in self.string_columns.values()),
+            *(self._decimals(name) for name in self.decimal_fields),
+        ]
+        line_type = self.line_type
+        for values in zip(*columns):
+            line = line_type()
+            line.__dict__.update(
+                [
+                    (name, value)
+                    for name, value in zip(names, values)
+                    if value is not None
+                ]
+            )
+            yield line
+
+    def _dates(self) -> Iterator[Optional[datetime]]:
+        days: Dict[int, Optional[datetime]] = {0: None}
+        for ordinal in self.dates:
+            date = days.get(ordinal)
+            if date is None and ordinal:
+                date = days[ordinal] = datetime.fromordinal(ordinal)
+            yield date
+
+    def _ids(self) -> Iterator[Optional[str]]:
+        prefixes: Dict[int, str] = {}
+        strings = self.strings.strings
+        for ordinal, packed in zip(self.dates, self.ids):
+            if packed > 0 and ordinal:
+                prefix = prefixes.get(ordinal)
+                if prefix is None:
+                    prefix = prefixes[ordinal] = datetime.fromordinal(ordinal).strftime(
+                        "%Y%m%d-"
+                    )
+                yield prefix + str(packed)
+            else:
+                yield strings[-packed]
+
+    def _decimals(self, name: str) -> Iterator[Optional[Decimal]]:
+        for coefficient, exponent in zip(self.coefficients[name], self.exponents[name]):
+            if exponent == NO_DECIMAL:
+                yield None
+            else:
+                yield Decimal(coefficient).scaleb(exponent)
+
+    def line(self, n: int) -> Line:
+        """Create the nth line"""
+        line = self.line_type()
+        ordinal = self.dates[n]
+        line.date = datetime.fromordinal(ordinal) if ordinal else None
+        line.id = self._unpack_id(self.ids[n], line.date)
+        strings = self.strings.strings
+        for name, column in self.string_columns.items():
+            setattr(line, name, strings[column[n]])
+        for name in self.decimal_fields:
+            exponent = self.exponents[name][n]
+            if exponent != NO_DECIMAL:
+                setattr(
+                    line,
+                    name,
+                    Decimal(self.coefficients[name][n]).scaleb(exponent),
+                )
+        return line
+
+    def _pack_id(self, id: Optional[str], date: Optional[datetime]) -> int:
+        if id is not None and date is not None:
+            prefix, _, count = id.partition("-")
+            if (
+                count.isdigit()
+                and count[0] != "0"
+                and prefix == f"{date.year:04}{date.month:02}{date.day:02}"
+            ):
+                return int(count)
+        return -self.strings.index(id)
+
+    def _unpack_id(self, packed: int, date: Optional[datetime]) -> Optional[str]:
+        if packed > 0 and date is not None:
+            return f"{date.year:04}{date.month:02}{date.day:02}-{packed}"
+        return self.strings[-packed]
+
+
+class StatementLineColumns(LineColumns):
+    line_type = StatementLine
+    string_fields = ("memo", "trntype", "check_no")
+    decimal_fields = ("amount",)
+
+
+class InvestLineColumns(LineColumns):
+    line_type = InvestStatementLine
+    string_fields = ("memo", "trntype", "trntype_detailed", "security_id")
+    decimal_fields = ("amount", "fees", "unit_price", "units")
+
+
+def _pack_decimal(value: Optional[Decimal]) -> Tuple[int, int]:
+    if value is None:
+        return 0, NO_DECIMAL
+    exponent = value.as_tuple().exponent
+    if not isinstance(exponent, int):
+        raise ValueError(f"Can't store {value}")
+    return int(value.scaleb(-exponent)), exponent
@@ -0,0 +1,53 @@
+"""Conversion of Schwab transaction dates
+
+Schwab dates are fixed width MM/DD/YYYY, sometimes followed by an "as of"
+date for backdated entries, e.g. "03/15/2024 as of 03/14/2024". The posting
+date at the start is the one used for the transaction.
+
+A busy account has many rows per day, so each distinct date is only parsed
+once, together with the YYYYMMDD prefix that IdGenerator puts in front of
+the transaction IDs.
+"""
+
+from datetime import datetime
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+CACHE_SIZE = 8192
+
+
+class ParsedDate(NamedTuple):
+    date: datetime
+    # The date formatted as %Y%m%d
+    id_prefix: str
+
+
+def parse_date(value: str) -> ParsedDate:
+    """Parse the posting date at the start of a Schwab date field"""
+    return _parse_day(value[0:10])
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _parse_day(value: str) -> ParsedDate:
+    if len(value) != 10 or value[2] != "/" or value[5] != "/":
+        raise ValueError(f'Date "{value}" does not match format MM/DD/YYYY')
+    year, month, day = value[6:10], value[0:2], value[3:5]
+    return ParsedDate(datetime(int(year), int(month), int(day)), year + month + day)
+
+
+def range_key(value: Optional[str], pad: str) -> Optional[str]:
+    """Turn a YYYY-MM-DD, YYYY-MM or YYYY date into a YYYYMMDD prefix key
+
+    The missing digits are filled with pad, so "2024" is "20240000" as a
+    start and "20249999" as an end, and the keys compare with id_prefix as
+    strings.
+    """
+    if not value:
+        return None
+    for fmt in ("%Y-%m-%d", "%Y-%m", "%Y"):
+        try:
+            datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        return (value.replace("-", "") + pad * 4)[:8]
+    raise ValueError(f'Date "{value}" does not match YYYY-MM-DD, YYYY-MM or YYYY')
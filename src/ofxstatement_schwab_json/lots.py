@@ -0,0 +1,338 @@
+"""Tax lots and realized gains
+
+A LotTracker follows the lines of a statement in date order and keeps the
+open lots of each security: buys (including reinvested dividends) and
+shares transferred in open lots, sells close them first in, first out, and
+shares transferred out are removed the same way without a gain. Each sell
+records a Disposal per lot it closes, with the lot's share of the proceeds
+and cost basis.
+
+Schwab exports don't say how stock splits and spin-offs affect cost basis,
+so those come from a LotConfig file:
+
+    # A 4-for-1 split, on the date of the "Stock Split" row
+    [split AAPL 2020-08-31]
+    ratio = 4:1
+
+    # 7.57% of MMM's cost basis moves to the SOLV shares of the spin-off
+    [spinoff SOLV 2024-04-01]
+    parent = MMM
+    cost = 0.0757
+
+    # Sell these lots, by the ID of the line that opened them, before any
+    # others
+    [sell 20240315-2]
+    lots = 20230103-1 20230601-2
+
+Splits without an entry are applied with the ratio implied by the new
+shares and the shares held. Spin-offs without an entry open a lot with no
+cost basis, with a warning.
+
+Lots are kept in a deque per security, so FIFO sells only touch the lots
+they close, with a dict from lot ID to lot for specific-lot sells. Lots
+closed out of order are emptied in place and dropped when they reach the
+front of the queue.
+"""
+
+from collections import deque
+import configparser
+from datetime import datetime
+from decimal import Decimal
+import logging
+from typing import Deque, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from ofxstatement.statement import InvestStatementLine
+
+LOGGER = logging.getLogger(__name__)
+
+BUY_TYPES = {"BUYDEBT", "BUYMF", "BUYOPT", "BUYOTHER", "BUYSTOCK"}
+SELL_TYPES = {"SELLDEBT", "SELLMF", "SELLOPT", "SELLOTHER", "SELLSTOCK"}
+
+CENT = Decimal("0.01")
+
+
+class Lot:
+    def __init__(
+        self,
+        id: str,
+        security_id: str,
+        acquired: datetime,
+        units: Decimal,
+        cost: Decimal,
+    ) -> None:
+        # ID of the line that opened the lot
+        self.id = id
+        self.security_id = security_id
+        self.acquired = acquired
+        self.units = units
+        # Cost basis of the remaining units
+        self.cost = cost
+
+    def __repr__(self) -> str:
+        return (
+            f"Lot({self.id!r}, {self.security_id!r}, {self.acquired:%Y-%m-%d}, "
+            f"units={self.units}, cost={self.cost})"
+        )
+
+
+class Disposal(NamedTuple):
+    """The part of a sell that closed one lot"""
+
+    sell_id: str
+    date: datetime
+    security_id: str
+    # None for shares sold beyond those held
+    lot_id: Optional[str]
+    acquired: Optional[datetime]
+    units: Decimal
+    proceeds: Decimal
+    cost: Decimal
+
+    @property
+    def gain(self) -> Decimal:
+        return self.proceeds - self.cost
+
+    @property
+    def long_term(self) -> bool:
+        """Held for more than a year"""
+        if self.acquired is None:
+            return False
+        try:
+            anniversary = self.acquired.replace(year=self.acquired.year + 1)
+        except ValueError:
+            # Bought on February 29
+            anniversary = self.acquired.replace(
+                year=self.acquired.year + 1, month=3, day=1
+            )
+        return self.date > anniversary
+
+
+class LotQueue:
+    """The open lots of one security, oldest first"""
+
+    def __init__(self) -> None:
+        self.lots: Deque[Lot] = deque()
+        self.by_id: Dict[str, Lot] = {}
+        self.units = Decimal(0)
+
+    def add(self, lot: Lot) -> None:
+        self.lots.append(lot)
+        self.by_id[lot.id] = lot
+        self.units += lot.units
+
+    def take(
+        self, units: Decimal, lot_ids: Iterable[str] = ()
+    ) -> Iterator[Tuple[Lot, Decimal, Decimal]]:
+        """Remove units from the named lots, then the oldest ones
+
+        Yields each lot touched, with the units and cost taken from it.
+        """
+        for lot_id in lot_ids:
+            lot = self.by_id.get(lot_id)
+            if lot is None:
+                LOGGER.warning(f"Lot {lot_id} is not open.")
+                continue
+            if units > 0:
+                taken = self._take_from(lot, units)
+                units -= taken[0]
+                yield (lot, *taken)
+
+        lots = self.lots
+        while units > 0 and lots:
+            lot = lots[0]
+            if lot.units:
+                taken = self._take_from(lot, units)
+                units -= taken[0]
+                yield (lot, *taken)
+            if not lot.units:
+                lots.popleft()
+
+    def _take_from(self, lot: Lot, units: Decimal) -> Tuple[Decimal, Decimal]:
+        if units >= lot.units:
+            taken, cost = lot.units, lot.cost
+            del self.by_id[lot.id]
+        else:
+            taken = units
+            cost = (lot.cost * units / lot.units).quantize(CENT)
+        lot.units -= taken
+        lot.cost -= cost
+        self.units -= taken
+        return taken, cost
+
+    def __iter__(self) -> Iterator[Lot]:
+        return (lot for lot in self.lots if lot.units)
+
+
+class LotConfig:
+    def __init__(self) -> None:
+        # (symbol, %Y-%m-%d date) to (new shares, old shares)
+        self.splits: Dict[Tuple[str, str], Tuple[Decimal, Decimal]] = {}
+        # (symbol, %Y-%m-%d date) to (parent symbol, fraction of its cost)
+        self.spinoffs: Dict[Tuple[str, str], Tuple[str, Decimal]] = {}
+        # Sell line ID to the IDs of the lots it sells first
+        self.sells: Dict[str, List[str]] = {}
+
+    @classmethod
+    def read(cls, filename: str) -> "LotConfig":
+        parser = configparser.ConfigParser()
+        with open(filename) as f:
+            parser.read_file(f)
+        config = cls()
+        for section in parser.sections():
+            kind, *args = section.split()
+            values = parser[section]
+            try:
+                if kind == "split" and len(args) == 2:
+                    new, old = values["ratio"].split(":")
+                    config.splits[args[0], args[1]] = (Decimal(new), Decimal(old))
+                elif kind == "spinoff" and len(args) == 2:
+                    config.spinoffs[args[0], args[1]] = (
+                        values["parent"],
+                        Decimal(values["cost"]),
+                    )
+                elif kind == "sell" and len(args) == 1:
+                    config.sells[args[0]] = values["lots"].split()
+                else:
+                    raise ValueError("unknown section")
+            except (ArithmeticError, KeyError, ValueError) as e:
+                raise ValueError(f"{filename}: invalid section [{section}]: {e}")
+        return config
+
+
+class LotTracker:
+    def __init__(self, config: Optional[LotConfig] = None) -> None:
+        self.config = config or LotConfig()
+        self.queues: Dict[str, LotQueue] = {}
+        self.disposals: List[Disposal] = []
+
+    def queue(self, security_id: str) -> LotQueue:
+        queue = self.queues.get(security_id)
+        if queue is None:
+            queue = self.queues[security_id] = LotQueue()
+        return queue
+
+    def add(self, line: InvestStatementLine, action: str) -> None:
+        """Apply a line, in date order"""
+        id, date, symbol, units = line.id, line.date, line.security_id, line.units
+        if not (id and date and symbol) or units is None:
+            return
+        amount = line.amount or Decimal(0)
+        if line.trntype in BUY_TYPES:
+            # Amounts of buys are negative, and include fees
+            self.buy(id, date, symbol, units, -amount)
+        elif line.trntype in SELL_TYPES:
+            self.sell(id, date, symbol, -units, amount)
+        elif line.trntype != "TRANSFER":
+            return
+        elif action == "Stock Split":
+            self.split(id, date, symbol, units)
+        elif action == "Spin-off":
+            self.spin_off(id, date, symbol, units)
+        elif units > 0:
+            self.buy(id, date, symbol, units, units * (line.unit_price or 0))
+        else:
+            self.transfer_out(symbol, -units)
+
+    def buy(
+        self, id: str, date: datetime, symbol: str, units: Decimal, cost: Decimal
+    ) -> None:
+        self.queue(symbol).add(Lot(id, symbol, date, units, cost))
+
+    def sell(
+        self, id: str, date: datetime, symbol: str, units: Decimal, proceeds: Decimal
+    ) -> None:
+        remaining_units, remaining_proceeds = units, proceeds
+        lot_ids = self.config.sells.get(id, ())
+        for lot, taken, cost in self.queue(symbol).take(units, lot_ids):
+            # Proceeds in proportion to units, with any rounding left to
+            # the last lot
+            remaining_units -= taken
+            if remaining_units:
+                share = (proceeds * taken / units).quantize(CENT)
+            else:
+                share = remaining_proceeds
+            remaining_proceeds -= share
+            self.disposals.append(
+                Disposal(id, date, symbol, lot.id, lot.acquired, taken, share, cost)
+            )
+        if remaining_units > 0:
+            LOGGER.warning(
+                f"Sell {id} of {units} {symbol} is {remaining_units} shares more "
+                "than the open lots hold."
+            )
+            self.disposals.append(
+                Disposal(
+                    id,
+                    date,
+                    symbol,
+                    None,
+                    None,
+                    remaining_units,
+                    remaining_proceeds,
+                    Decimal(0),
+                )
+            )
+
+    def transfer_out(self, symbol: str, units: Decimal) -> None:
+        """Remove shares moved to another account, without a gain"""
+        for _ in self.queue(symbol).take(units):
+            pass
+
+    def split(self, id: str, date: datetime, symbol: str, units: Decimal) -> None:
+        """Scale the open lots for a split that added units shares"""
+        queue = self.queue(symbol)
+        ratio = self.config.splits.get((symbol, f"{date:%Y-%m-%d}"))
+        if ratio is not None:
+            new, old = ratio
+        elif queue.units:
+            new, old = queue.units + units, queue.units
+        else:
+            LOGGER.warning(
+                f"Ignoring the {symbol} stock split of {id}, because no shares "
+                "were held."
+            )
+            return
+        queue.units = Decimal(0)
+        for lot in queue:
+            lot.units = lot.units * new / old
+            queue.units += lot.units
+
+    def spin_off(self, id: str, date: datetime, symbol: str, units: Decimal) -> None:
+        """Open lots of the new security, taking cost basis from the parent"""
+        entry = self.config.spinoffs.get((symbol, f"{date:%Y-%m-%d}"))
+        parent = self.queues.get(entry[0]) if entry is not None else None
+        if entry is None or parent is None or not parent.units:
+            LOGGER.warning(
+                f"You will probably want to allocate some cost basis for the "
+                f"{symbol} spin-off."
+            )
+            self.buy(id, date, symbol, units, Decimal(0))
+            return
+
+        # Each parent lot keeps its date, and gives part of its cost to new
+        # shares in proportion to its units
+        fraction = entry[1]
+        queue = self.queue(symbol)
+        for lot in list(parent):
+            cost = (lot.cost * fraction).quantize(CENT)
+            lot.cost -= cost
+            queue.add(
+                Lot(
+                    f"{lot.id}/{id}",
+                    symbol,
+                    lot.acquired,
+                    units * lot.units / parent.units,
+                    cost,
+                )
+            )
+
+    def open_lots(self, security_id: str) -> List[Lot]:
+        queue = self.queues.get(security_id)
+        return list(queue) if queue is not None else []
+
+    def realized_gains(self) -> Dict[str, Decimal]:
+        """Gain of each sell, by the ID of its line"""
+        gains: Dict[str, Decimal] = {}
+        for disposal in self.disposals:
+            gains[disposal.sell_id] = gains.get(disposal.sell_id, 0) + disposal.gain
+        return gains
@@ -0,0 +1,114 @@
+"""Merging overlapping exports of one account
+
+Consecutive Schwab exports of an account usually overlap, so converting each
+of them separately produces the same transactions more than once. Merging
+reads all exports in step, in date order, and drops the copies.
+
+A transaction is a copy when another export already supplied the same row on
+the same date. Rows that legitimately repeat within one export (two identical
+interest credits, say) are kept as many times as the export with the most of
+them has. Only the rows of the current date are held, so memory stays
+bounded by one day of transactions.
+"""
+
+from collections import Counter
+from contextlib import ExitStack
+import heapq
+import itertools
+from os import path
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from ofxstatement_schwab_json.dates import parse_date
+from ofxstatement_schwab_json.parser import (
+    Line,
+    SchwabJsonParser,
+    account_id_from_filename,
+)
+from ofxstatement_schwab_json.stable_ids import content_key
+from ofxstatement_schwab_json.stream import ExportReader
+
+
+def merge_rows(sources: Iterable[Iterator[dict]]) -> Iterator[dict]:
+    """Merge chronological row streams, dropping rows repeated across them"""
+    tagged = [_tag(n, source) for n, source in enumerate(sources)]
+    merged = heapq.merge(*tagged, key=_merge_key)
+    for _, day in itertools.groupby(merged, key=_merge_key):
+        yield from _merge_day(day)
+
+
+def _merge_day(day: Iterable[Tuple[str, int, dict]]) -> Iterator[dict]:
+    per_source: Dict[int, List[dict]] = {}
+    for _, n, tran in day:
+        per_source.setdefault(n, []).append(tran)
+
+    # The export with the most rows on this date most likely has all of them,
+    # in their original order, so it sets the order. Rows only found in other
+    # exports follow. sorted() is stable, so ties go to the earlier export.
+    emitted: Counter = Counter()
+    for rows in sorted(per_source.values(), key=len, reverse=True):
+        seen: Counter = Counter()
+        for tran in rows:
+            key = content_key(tran)
+            seen[key] += 1
+            if seen[key] > emitted[key]:
+                emitted[key] += 1
+                yield tran
+
+
+def _tag(n: int, source: Iterator[dict]) -> Iterator[Tuple[str, int, dict]]:
+    for tran in source:
+        yield parse_date(tran["Date"]).id_prefix, n, tran
+
+
+def _merge_key(item: Tuple[str, int, dict]) -> str:
+    return item[0]
+
+
+class SchwabJsonMergeParser(SchwabJsonParser):
+    """Parses several overlapping exports of one account into one statement"""
+
+    def __init__(self, filenames: List[str], **kwargs) -> None:
+        if not filenames:
+            raise ValueError("No exports to merge")
+        accounts = {account_id_from_filename(f) for f in filenames}
+        if len(accounts) > 1:
+            raise ValueError(
+                "Exports of different accounts can't be merged: "
+                + ", ".join(sorted(str(a) for a in accounts))
+            )
+        super().__init__(filenames[0], **kwargs)
+        self.filenames = filenames
+
+    def cache_inputs(self) -> List[str]:
+        return self.filenames
+
+    def can_parse_parallel(self) -> bool:
+        # Rows can only be merged across files in one pass
+        return False
+
+    def iter_lines(self) -> Iterator[Line]:
+        with ExitStack() as stack:
+            with self.timer("load"):
+                readers = [
+                    stack.enter_context(ExportReader(f, index=self.index))
+                    for f in self.filenames
+                ]
+            yield from self.generate_lines(
+                posted_transactions=merge_rows(
+                    r.chronological("PostedTransactions", *self.date_range)
+                    for r in readers
+                ),
+                brokerage_transactions=merge_rows(
+                    r.chronological("BrokerageTransactions", *self.date_range)
+                    for r in readers
+                ),
+            )
+
+
+def group_by_account(filenames: Iterable[str]) -> List[List[str]]:
+    """Group export file names by the account in their names"""
+    groups: dict = {}
+    for filename in filenames:
+        account = account_id_from_filename(filename) or path.basename(filename)
+        groups.setdefault(account, []).append(filename)
+    return [groups[account] for account in sorted(groups)]
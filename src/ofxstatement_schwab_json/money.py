@@ -0,0 +1,28 @@
+"""Conversion of Schwab money and quantity strings to Decimal
+
+Schwab formats amounts as "$1,234.56" or "-$0.29". Exports repeat the same
+handful of values (fees of "$0.00", money market prices of "$1.00", ...)
+thousands of times, so conversions are kept in a bounded cache. Decimal is
+immutable, so sharing the cached values between lines is safe.
+"""
+
+from decimal import Decimal
+from functools import lru_cache
+
+CACHE_SIZE = 8192
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_money(value: str) -> Decimal:
+    """Convert an amount, price or quantity, keeping its sign"""
+    return Decimal(value.replace("$", "").replace(",", ""))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_negative(value: str) -> Decimal:
+    """Convert an amount or quantity that must be negative
+
+    Schwab is inconsistent about signing sell quantities and withdrawals,
+    so any sign in the input is dropped and a negative one applied.
+    """
+    return Decimal("-" + value.replace("$", "").replace(",", "").replace("-", ""))
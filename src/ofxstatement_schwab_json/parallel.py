@@ -0,0 +1,212 @@
+"""Parsing one export across several processes
+
+The rows of each transaction array are split into chunks that start on a
+new date, and the chunks are parsed in a process pool. Each worker reads
+and decodes only its own rows from the export, so all that is sent to it is
+the byte offsets of those rows, and all that comes back is its lines in
+LineColumns.
+
+Workers number the IDs of each date from 1, as if their chunk were the whole
+export. Chunks are merged back in chronological order, and the IDs of a date
+that earlier chunks already had rows for are moved up by the number of those
+rows, so the IDs are the ones a serial parse gives. Since chunks start on a
+new date, that only happens for dates with both posted and brokerage rows.
+
+Splitting the rows needs a scan of the whole file in this process (unless
+the index setting has kept one from an earlier run), and unless columnar is
+set the merged lines are turned back into objects here too, so those parts
+don't get faster with more processes.
+"""
+
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import json
+import logging
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple, Type
+
+from ofxstatement_schwab_json.columns import (
+    InvestLineColumns,
+    LineColumns,
+    StatementLineColumns,
+)
+from ofxstatement_schwab_json.parser import SchwabJsonParser
+from ofxstatement_schwab_json.securities import SecurityIndex
+from ofxstatement_schwab_json.stream import ExportReader
+from ofxstatement_schwab_json.validation import LineError, LinesValidationError
+
+LOGGER = logging.getLogger(__name__)
+
+# Smaller chunks cost more to start and merge than they save
+MIN_CHUNK_ROWS = 20000
+# More chunks than processes evens out chunks that take longer
+CHUNKS_PER_JOB = 2
+
+
+class Chunk(NamedTuple):
+    parser_type: Type[SchwabJsonParser]
+    filename: str
+    key: str
+    # Byte offsets of the chunk's rows, as in ExportReader.spans
+    spans: "array[int]"
+    ids: str
+    validation: str
+    date_range: Tuple[Optional[str], Optional[str]]
+
+
+class ChunkResult(NamedTuple):
+    lines: StatementLineColumns
+    invest_lines: InvestLineColumns
+    # IDs issued per %Y%m%d date
+    date_count: Dict[str, int]
+    securities: SecurityIndex
+    # With deferred validation, the invalid lines of the chunk
+    errors: List[LineError]
+
+
+def split_rows(
+    reader: ExportReader, key: str, chunks: int
+) -> Iterator[Tuple[int, int]]:
+    """Split an array into up to chunks ranges of rows, in chronological order
+
+    Each range, in file order, starts on a different date than the row
+    before it.
+    """
+    count = reader.count(key)
+    # Schwab lists rows newest first, so ranges are made from the end of the
+    # array, and a chunk's first row is at its end
+    end = count
+    for n in range(chunks - 1, 0, -1):
+        start = max(count * n // chunks, 1)
+        # Move back until the date changes
+        day = reader.day(key, start - 1)
+        while start > 0 and (not day or reader.day(key, start) == day):
+            start -= 1
+            day = reader.day(key, start - 1) if start else 0
+        if 0 < start < end:
+            yield start, end
+            end = start
+    if end > 0:
+        yield 0, end
+
+
+def plan(parser: SchwabJsonParser, jobs: int) -> List[Chunk]:
+    with parser.timer("load"):
+        reader = ExportReader(parser.filename, index=parser.index)
+    chunks = []
+    with reader:
+        for key in ("PostedTransactions", "BrokerageTransactions"):
+            count = reader.count(key)
+            wanted = max(1, min(jobs * CHUNKS_PER_JOB, count // MIN_CHUNK_ROWS))
+            spans = reader.spans.get(key, array("q"))
+            # The spans may be a view of the index file, and those can't be
+            # sent to other processes
+            for start, end in split_rows(reader, key, wanted):
+                chunks.append(
+                    Chunk(
+                        type(parser),
+                        parser.filename,
+                        key,
+                        array("q", spans[2 * start : 2 * end]),
+                        parser.ids,
+                        parser.validation,
+                        parser.date_range,
+                    )
+                )
+    return chunks
+
+
+def read_rows(filename: str, spans: "array[int]") -> List[dict]:
+    """Decode consecutive rows of an array, in file order
+
+    The bytes from the first row to the last are the rows with the commas
+    between them, so they're decoded in one go as a JSON array.
+    """
+    with open(filename, "rb") as f:
+        f.seek(spans[0])
+        data = f.read(spans[-1] - spans[0])
+    return json.loads(b"[" + data + b"]")
+
+
+def parse_chunk(chunk: Chunk) -> ChunkResult:
+    """Parse the rows of one chunk, in a worker process"""
+    parser = chunk.parser_type(
+        chunk.filename, ids=chunk.ids, validation=chunk.validation, columnar=True
+    )
+    parser.date_range = chunk.date_range
+    errors: List[LineError] = []
+    rows = reversed(read_rows(chunk.filename, chunk.spans))
+    if chunk.key == "PostedTransactions":
+        lines = parser.generate_lines(rows, [])
+    else:
+        lines = parser.generate_lines([], rows)
+    try:
+        parser.collect(lines)
+    except LinesValidationError as e:
+        errors = e.errors
+    statement = parser.statement
+    return ChunkResult(
+        statement.lines,  # type: ignore[arg-type]
+        statement.invest_lines,  # type: ignore[arg-type]
+        parser.id_generator.date_count,
+        parser.securities,
+        errors,
+    )
+
+
+def parse_parallel(parser: SchwabJsonParser, jobs: int) -> None:
+    """Parse parser's export into parser.statement, across jobs processes"""
+    chunks = plan(parser, jobs)
+    if sum(len(chunk.spans) // 2 for chunk in chunks) < 2 * MIN_CHUNK_ROWS:
+        parser.collect(parser.iter_lines())
+        return
+    LOGGER.debug(f"Parsing {parser.filename} in {len(chunks)} chunks")
+
+    statement = parser.statement
+    bank_lines: LineColumns
+    invest_lines: LineColumns
+    if parser.columnar:
+        bank_lines = statement.lines  # type: ignore[assignment]
+        invest_lines = statement.invest_lines  # type: ignore[assignment]
+    else:
+        bank_lines = StatementLineColumns()
+        invest_lines = InvestLineColumns(bank_lines.strings)
+    date_count = parser.id_generator.date_count
+    # IDs issued so far per date, by day ordinal. Content IDs don't depend
+    # on the rows before them, so they're left as they are.
+    issued: Dict[int, int] = {}
+    shift = parser.ids == "position"
+    errors: List[LineError] = []
+    rows = 0
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        # In chunk order, so the first error raised is the serial one
+        for result in executor.map(parse_chunk, chunks):
+            bank_lines.extend_columns(result.lines, issued if shift else None)
+            invest_lines.extend_columns(result.invest_lines, issued if shift else None)
+            errors += [
+                e._replace(
+                    row=e.row + rows, id=_shift_id(e.id, issued) if shift else e.id
+                )
+                for e in result.errors
+            ]
+            rows += len(result.lines) + len(result.invest_lines)
+            parser.securities.update(result.securities)
+            for id_prefix, count in result.date_count.items():
+                day = datetime.strptime(id_prefix, "%Y%m%d").toordinal()
+                issued[day] = issued.get(day, 0) + count
+                date_count[id_prefix] = date_count.get(id_prefix, 0) + count
+
+    if not parser.columnar:
+        statement.lines = list(bank_lines)  # type: ignore[arg-type]
+        statement.invest_lines = list(invest_lines)  # type: ignore[arg-type]
+    if errors:
+        raise LinesValidationError(errors)
+
+
+def _shift_id(id: Optional[str], issued: Dict[int, int]) -> Optional[str]:
+    """Move a YYYYMMDD-n ID up by the IDs issued for its date"""
+    if id is None:
+        return None
+    id_prefix, _, count = id.partition("-")
+    day = datetime.strptime(id_prefix, "%Y%m%d").toordinal()
+    return f"{id_prefix}-{int(count) + issued.get(day, 0)}"
@@ -0,0 +1,724 @@
+"""Parser for Schwab JSON exports
+
+Kept apart from the plugin module, which ofxstatement imports on every run,
+even just to list plugins. This module and everything it needs are only
+imported once a parser is requested.
+"""
+
+from contextlib import nullcontext
+from datetime import datetime
+from decimal import Decimal
+import json
+import logging
+import re
+from os import path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    TextIO,
+    Tuple,
+)
+
+from ofxstatement.parser import AbstractStatementParser
+from ofxstatement.statement import Statement, InvestStatementLine, StatementLine
+
+from ofxstatement_schwab_json.columns import (
+    InvestLineColumns,
+    Line,
+    StatementLineColumns,
+    StringTable,
+)
+from ofxstatement_schwab_json.dates import parse_date, range_key
+from ofxstatement_schwab_json.money import parse_money, parse_negative
+from ofxstatement_schwab_json.posted import posted_lines
+from ofxstatement_schwab_json.securities import SecurityIndex
+
+# The modules behind optional features are imported when they're used
+if TYPE_CHECKING:
+    from ofxstatement_schwab_json.cache import ParseCache
+    from ofxstatement_schwab_json.lots import LotTracker
+    from ofxstatement_schwab_json.stable_ids import ContentIdGenerator
+    from ofxstatement_schwab_json.stats import ParseStats
+    from ofxstatement_schwab_json.validation import DeferredValidator
+    from ofxstatement_schwab_json.watermark import Watermark
+
+LOGGER = logging.getLogger(__name__)
+
+POSTED_TRANSACTION_TYPES = {
+    # Map Schwab PostedTransactions types to ofxstatement TRANSACTION_TYPES
+    "ATM": "ATM",
+    "ATMREBATE": "CREDIT",
+    "CHECK": "CHECK",
+    "DEBIT": "DEBIT",
+    "DEPOSIT": "DEP",
+    "INTADJUST": "INT",
+    "TRANSFER": "XFER",
+    "VISA": "POS",
+}
+
+# (action, has symbol, negative amount); None matches either value
+ActionKey = Tuple[str, Optional[bool], Optional[bool]]
+# (name of the add_*_line method, OFX type passed to it if it takes one)
+ActionHandler = Tuple[str, Optional[str]]
+
+BROKERAGE_ACTIONS: Dict[ActionKey, ActionHandler] = {
+    # Map Schwab BrokerageTransactions actions to the add_*_line handler
+    # that imports them. Lookups try (action, has_symbol, negative), then
+    # (action, has_symbol, None), then (action, None, None).
+    ("Sell", None, None): ("add_sell_line", None),
+    ("Cash Dividend", None, None): ("add_income_line", "DIV"),
+    ("Div Adjustment", None, None): ("add_income_line", "DIV"),
+    ("Non-Qualified Div", None, None): ("add_income_line", "DIV"),
+    ("Pr Yr Cash Div", None, None): ("add_income_line", "DIV"),
+    ("Pr Yr Div Reinvest", None, None): ("add_income_line", "DIV"),
+    ("Pr Yr Non Qual Div", None, None): ("add_income_line", "DIV"),
+    ("Pr Yr Non-Qual Div", None, None): ("add_income_line", "DIV"),
+    ("Pr Yr Special Div", None, None): ("add_income_line", "DIV"),
+    ("Qual Div Reinvest", None, None): ("add_income_line", "DIV"),
+    ("Qualified Dividend", None, None): ("add_income_line", "DIV"),
+    ("Reinvest Dividend", None, None): ("add_income_line", "DIV"),
+    ("Special Dividend", None, None): ("add_income_line", "DIV"),
+    ("Special Qual Div", None, None): ("add_income_line", "DIV"),
+    ("Long Term Cap Gain", None, None): ("add_income_line", "CGLONG"),
+    # This usually comes paired with a separate "Reinvest Shares" action
+    ("Long Term Cap Gain Reinvest", None, None): ("add_income_line", "CGLONG"),
+    ("Short Term Cap Gain", None, None): ("add_income_line", "CGSHORT"),
+    # This usually comes paired with a separate "Reinvest Shares" action
+    ("Short Term Cap Gain Reinvest", None, None): ("add_income_line", "CGSHORT"),
+    ("Buy", None, None): ("add_buy_line", None),
+    ("Reinvest Shares", None, None): ("add_buy_line", None),
+    # Security rows
+    ("Bank Interest", True, None): ("add_income_line", "INTEREST"),
+    ("NRA Tax Adj", True, None): ("add_invexpense_line", None),
+    ("Journal", True, None): ("add_transfer_line", None),
+    ("Journaled Shares", True, None): ("add_transfer_line", None),
+    ("Spin-off", True, None): ("add_transfer_line", None),
+    ("Stock Split", True, None): ("add_transfer_line", None),
+    ("Security Transfer", True, None): ("add_transfer_line", None),
+    ("ADR Mgmt Fee", True, None): ("add_bank_line", "SRVCHG"),
+    ("Cash In Lieu", True, None): ("add_bank_line", "CREDIT"),
+    # Cash rows
+    ("Wire Sent", False, None): ("add_bank_line", "DEBIT"),
+    ("Auto S1 Debit", False, None): ("add_bank_line", "DEBIT"),
+    ("Funds Paid", False, None): ("add_bank_line", "DEBIT"),
+    ("Returned Check", False, True): ("add_bank_line", "DEBIT"),
+    ("Auto S1 Credit", False, None): ("add_bank_line", "CREDIT"),
+    ("Funds Received", False, None): ("add_bank_line", "DEP"),
+    ("MoneyLink Deposit", False, None): ("add_bank_line", "DEP"),
+    ("Bank Interest", False, None): ("add_bank_line", "INT"),
+    ("Bond Interest", False, None): ("add_bank_line", "INT"),
+    ("Credit Interest", False, None): ("add_bank_line", "INT"),
+    ("Interest Adj", False, None): ("add_bank_line", "OTHER"),
+    ("Misc Cash Entry", False, None): ("add_bank_line", "OTHER"),
+    ("Service Fee", False, None): ("add_bank_line", "SRVCHG"),
+    ("Advisor Fee", False, None): ("add_bank_line", "SRVCHG"),
+    ("MoneyLink Transfer", False, None): ("add_bank_line", "XFER"),
+    ("Bank Transfer", False, None): ("add_bank_line", "XFER"),
+    ("Internal Transfer", False, None): ("add_bank_line", "XFER"),
+    ("Journal", False, None): ("add_bank_line", "XFER"),
+    ("Journaled Shares", False, None): ("add_bank_line", "XFER"),
+    ("Security Transfer", False, None): ("add_bank_line", "XFER"),
+}
+
+
+ACCOUNT_FILENAME = re.compile(r"(.*)_Transactions_.*\.json")
+
+
+def account_id_from_filename(filename: str) -> Optional[str]:
+    """Account name from an <account>_Transactions_<timestamp>.json file name"""
+    match = ACCOUNT_FILENAME.search(path.basename(filename))
+    return match[1] if match else None
+
+
+class SchwabJsonParser(AbstractStatementParser):
+    statement: Statement
+    # Subclasses can point this at an extended copy of BROKERAGE_ACTIONS
+    actions: Dict[ActionKey, ActionHandler] = BROKERAGE_ACTIONS
+
+    def __init__(
+        self,
+        filename: str,
+        streaming: bool = False,
+        watermarks: Optional[str] = None,
+        ids: str = "position",
+        id_index: Optional[str] = None,
+        instrument: bool = False,
+        stats_file: Optional[str] = None,
+        columnar: bool = False,
+        validation: str = "immediate",
+        cache: Optional[str] = None,
+        cache_size: Optional[int] = None,
+        lots: Optional[str] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        jobs: int = 1,
+        index: bool = False,
+    ) -> None:
+        super().__init__()
+        self.filename = filename
+        self.streaming = streaming
+        # Keep the row offsets of the export in a file next to it, so later
+        # runs read only the rows they need
+        self.index = index
+        # SQLite file recording what earlier runs imported, for incremental
+        # imports
+        self.watermarks = watermarks
+        self.watermark: Optional["Watermark"] = None
+        # "position" numbers rows within each date, "content" hashes them
+        if ids not in ("position", "content"):
+            raise ValueError(f'Unknown ids setting: "{ids}"')
+        self.ids = ids
+        # SQLite file of content IDs issued by earlier runs
+        self.id_index = id_index
+        self.content_ids: Optional["ContentIdGenerator"] = None
+        self.columnar = columnar
+        # Only rows dated from start to end, as YYYYMMDD keys. Whole days
+        # are kept or dropped, so IDs are the same as without them.
+        self.date_range = (range_key(start, "0"), range_key(end, "9"))
+        # Directory of previously parsed statements. The result of
+        # incremental imports and of content IDs with an index depends on
+        # more than the export, so those are never cached.
+        self.cache: Optional["ParseCache"] = None
+        if cache and (watermarks or id_index):
+            LOGGER.warning("Not caching, because watermarks or id_index are set.")
+        elif cache:
+            from ofxstatement_schwab_json.cache import DEFAULT_SIZE_MB, ParseCache
+
+            self.cache = ParseCache(cache, (cache_size or DEFAULT_SIZE_MB) << 20)
+        self.statement = Statement()
+        self.statement.broker_id = "Schwab"
+        self.statement.account_id = account_id_from_filename(filename)
+        # Symbols seen so far, for per-security queries and the SECLIST
+        self.securities = SecurityIndex()
+        self.statement.securities = self.securities  # type: ignore[attr-defined]
+        if columnar:
+            # Store the lines packed into arrays, for large exports
+            strings = StringTable()
+            self.statement.lines = StatementLineColumns(strings)  # type: ignore
+            self.statement.invest_lines = InvestLineColumns(strings)  # type: ignore
+        # Tax lots of the securities, with splits, spin-offs and specific
+        # lots from the lots config file
+        self.lots_file = lots
+        self.lots: Optional["LotTracker"] = None
+        if lots:
+            from ofxstatement_schwab_json.lots import LotConfig, LotTracker
+
+            if watermarks or start:
+                LOGGER.warning(
+                    "Lots only include the transactions being imported, "
+                    "because watermarks or start are set."
+                )
+            self.lots = LotTracker(LotConfig.read(lots))
+            self.statement.lots = self.lots  # type: ignore[attr-defined]
+        self.id_generator = IdGenerator()
+        # Processes to parse with, if the export is large enough
+        self.jobs = jobs
+        self._resolved_actions: Dict[
+            Tuple[str, bool, bool], Tuple[Callable, Optional[str]]
+        ] = {}
+        # "immediate" validates each line as it's made, "deferred" in batches
+        # with a report of all invalid lines, "trusted" not at all
+        if validation not in ("immediate", "deferred", "trusted"):
+            raise ValueError(f'Unknown validation setting: "{validation}"')
+        self.validation = validation
+        self.validator: Optional["DeferredValidator"] = None
+        if validation != "immediate":
+            self.validate = self.skip_validation  # type: ignore[method-assign]
+        # Timings and per-action counters, if instrumented. stats_file
+        # receives a JSON dump of them at the end of the parse.
+        self.stats_file = stats_file
+        self.stats: Optional["ParseStats"] = None
+        if instrument or stats_file:
+            from ofxstatement_schwab_json.stats import ParseStats
+
+            self.stats = ParseStats()
+            # Shadow the methods with timed versions, so that uninstrumented
+            # parses don't pay for any of this
+            self.resolve_action = self.stats.timed_call(  # type: ignore[method-assign]
+                self.resolve_action, "dispatch"
+            )
+            self.validate = self.stats.timed_call(  # type: ignore[method-assign]
+                self.validate, "validate"
+            )
+
+    def parse(self) -> Statement:
+        """Main entry point for parsers"""
+        if self.cache is not None:
+            return self.parse_cached(self.cache)
+        self.parse_lines()
+        return self.statement
+
+    def parse_cached(self, cache: "ParseCache") -> Statement:
+        from ofxstatement_schwab_json.cache import expand
+
+        inputs = self.cache_inputs()
+        if self.lots_file:
+            inputs = [*inputs, self.lots_file]
+        key = cache.key(
+            inputs,
+            type(self).__qualname__,
+            self.statement.account_id,
+            self.ids,
+            self.validation,
+            self.lots is not None,
+            self.date_range,
+        )
+        statement = cache.get(key)
+        if statement is None:
+            self.parse_lines()
+            cache.put(key, self.statement)
+            return self.statement
+
+        LOGGER.debug(f"Using cached statement for {self.filename}")
+        if not self.columnar:
+            expand(statement)
+        self.statement = statement
+        self.securities = statement.securities  # type: ignore[attr-defined]
+        self.lots = getattr(statement, "lots", None)
+        return statement
+
+    def parse_lines(self) -> None:
+        """Parse the export into self.statement"""
+        if self.jobs > 1 and self.can_parse_parallel():
+            from ofxstatement_schwab_json.parallel import parse_parallel
+
+            parse_parallel(self, self.jobs)
+        else:
+            self.collect(self.iter_lines())
+
+    def can_parse_parallel(self) -> bool:
+        """Whether the export can be split between processes
+
+        Watermarks, ID indexes and lots carry state from one row to the
+        next, and stats are per process.
+        """
+        return not (self.watermarks or self.id_index or self.lots or self.stats)
+
+    def cache_inputs(self) -> List[str]:
+        """The files the statement is parsed from"""
+        return [self.filename]
+
+    def iter_lines(self) -> Iterator[Line]:
+        """Yield the statement's lines as they are parsed
+
+        Unlike parse(), the lines aren't added to self.statement, so a
+        consumer that filters, aggregates or writes them out as it goes
+        doesn't hold all of them at once. With streaming, neither are the
+        rows of the export.
+        """
+        if self.streaming or self.index:
+            from ofxstatement_schwab_json.stream import ExportReader
+
+            with self.timer("load"):
+                reader = ExportReader(self.filename, index=self.index)
+            with reader:
+                yield from self.generate_lines(
+                    posted_transactions=reader.chronological(
+                        "PostedTransactions", *self.date_range
+                    ),
+                    brokerage_transactions=reader.chronological(
+                        "BrokerageTransactions", *self.date_range
+                    ),
+                )
+            return
+
+        with open(self.filename, "r") as f:
+            with self.timer("load"):
+                loaded = json.load(f)
+        # Reverse the lines so that they are in chronological order
+        posted_transactions = reversed(
+            # Banking / Checking accounts
+            loaded.get("PostedTransactions", [])
+        )
+        brokerage_transactions = reversed(
+            # Brokerage accounts
+            loaded.get("BrokerageTransactions", [])
+        )
+        yield from self.generate_lines(
+            posted_transactions=posted_transactions,
+            brokerage_transactions=brokerage_transactions,
+        )
+
+    def parse_streaming(self) -> Statement:
+        """Parse without decoding the whole document at once
+
+        The rows are decoded one at a time, already in chronological order,
+        from a memory-mapped view of the file.
+        """
+        self.streaming = True
+        return self.parse()
+
+    def write_ofx(
+        self,
+        out: TextIO,
+        pretty: bool = False,
+        encoding: str = "utf-8",
+        gen_time: Optional[datetime] = None,
+    ) -> int:
+        """Parse the export straight to OFX, returning the number of lines
+
+        The output is the same as SchwabOfxWriter gives for the statement
+        parse() returns, but each line is written out as soon as it's made,
+        so the lines are never all held at once. Together with streaming,
+        memory use doesn't grow with the size of the export. The cache and
+        jobs aren't used. gen_time is the time the OFX file says it was
+        made, the current time by default.
+        """
+        from ofxstatement_schwab_json.writer import StreamingOfxWriter
+
+        writer = StreamingOfxWriter(self.statement, out, pretty, encoding)
+        if gen_time is not None:
+            writer.genTime = gen_time
+        count = 0
+        try:
+            for line in self.iter_lines():
+                writer.add(line)
+                count += 1
+            writer.finish()
+        finally:
+            writer.close()
+        return count
+
+    def import_lines(self, posted_transactions, brokerage_transactions):
+        self.collect(self.generate_lines(posted_transactions, brokerage_transactions))
+
+    def collect(self, lines: Iterable[Line]) -> None:
+        """Add lines to the statement"""
+        bank_lines = self.statement.lines
+        invest_lines = self.statement.invest_lines
+        for line in lines:
+            if isinstance(line, InvestStatementLine):
+                invest_lines.append(line)
+            else:
+                bank_lines.append(line)
+
+    def generate_lines(
+        self, posted_transactions, brokerage_transactions
+    ) -> Iterator[Line]:
+        """Yield a line for each transaction row, in chronological order
+
+        Watermarks and content IDs are only saved once the last line has
+        been consumed. With deferred validation, that is also when invalid
+        lines are reported.
+        """
+        self.watermark = self.load_watermark()
+        if self.ids == "content":
+            from ofxstatement_schwab_json.stable_ids import ContentIdGenerator
+
+            self.content_ids = ContentIdGenerator(
+                self.statement.account_id or "", self.id_index
+            )
+
+        if self.date_range != (None, None):
+            posted_transactions = self.in_date_range(posted_transactions)
+            brokerage_transactions = self.in_date_range(brokerage_transactions)
+        add_statement_line = self.add_statement_line
+        posted_rows = self.number_rows(posted_transactions)
+        brokerage_rows = self.number_rows(brokerage_transactions)
+        if self.stats is not None:
+            add_statement_line = self.stats.timed_handler(
+                "PostedTransactions", add_statement_line
+            )
+            posted_rows = self.stats.timed_rows(posted_rows)
+            brokerage_rows = self.stats.timed_rows(brokerage_rows)
+        securities = self.securities
+        lots = self.lots
+        validator = None
+        if self.validation == "deferred":
+            from ofxstatement_schwab_json.validation import DeferredValidator
+
+            validator = self.validator = DeferredValidator()
+            if self.stats is not None:
+                validator.flush = self.stats.timed_call(  # type: ignore[method-assign]
+                    validator.flush, "validate"
+                )
+
+        with self.content_ids or nullcontext():
+            if self.stats is None and (
+                type(self).add_statement_line is SchwabJsonParser.add_statement_line
+            ):
+                # Same lines, made in one loop. See posted.py.
+                yield from posted_lines(
+                    posted_rows, POSTED_TRANSACTION_TYPES, add_statement_line, validator
+                )
+            else:
+                for id, date, tran in posted_rows:
+                    line = add_statement_line(id, date, tran)
+                    if validator is not None:
+                        validator.add(line, tran["Type"])
+                    yield line
+
+            for id, date, tran in brokerage_rows:
+                handler, action_type = self.resolve_action(
+                    tran["Action"],
+                    len(tran["Symbol"]) > 0,
+                    tran["Amount"].startswith("-"),
+                )
+                if action_type is None:
+                    line = handler(id, date, tran)
+                else:
+                    line = handler(id, date, action_type, tran)
+                if line.security_id is not None:
+                    securities.add(line.security_id, date, tran["Description"])
+                    if lots is not None:
+                        lots.add(line, tran["Action"])
+                if validator is not None:
+                    validator.add(line, tran["Action"])
+                yield line
+
+            if validator is not None:
+                # Before the watermark and content IDs are saved
+                validator.finish()
+
+        self.save_watermark()
+        if self.stats is not None and self.stats_file:
+            self.stats.dump(self.stats_file)
+
+    def timer(self, stage: str) -> ContextManager:
+        return nullcontext() if self.stats is None else self.stats.timer(stage)
+
+    def in_date_range(self, transactions: Iterable[dict]) -> Iterator[dict]:
+        """Drop rows outside the date range, by their raw Date strings"""
+        start, end = self.date_range
+        first, last = start or "", end or "99999999"
+        for tran in transactions:
+            date = tran["Date"]
+            # MM/DD/YYYY to YYYYMMDD, without parsing it
+            day = date[6:10] + date[0:2] + date[3:5]
+            if first <= day <= last:
+                yield tran
+
+    def number_rows(self, transactions) -> Iterator[Tuple[str, datetime, dict]]:
+        """Assign IDs to rows, dropping those a previous run already imported"""
+        watermark = self.watermark
+        for tran in transactions:
+            date, id_prefix = parse_date(tran["Date"])
+            if watermark is not None and id_prefix < watermark.date:
+                continue
+            id = self.id_generator.create_id(date, id_prefix)
+            if self.content_ids is not None:
+                id = self.content_ids.create_id(id_prefix, tran)
+            if watermark is not None and watermark.covers(
+                id_prefix, self.id_generator.date_count[id_prefix]
+            ):
+                continue
+            yield id, date, tran
+
+    def load_watermark(self) -> Optional["Watermark"]:
+        if self.watermarks is None:
+            return None
+        if not self.statement.account_id:
+            LOGGER.warning(
+                f"Importing all of {self.filename}, because incremental imports "
+                "need the account name from a *_Transactions_*.json file name."
+            )
+            return None
+        from ofxstatement_schwab_json.watermark import WatermarkStore
+
+        with WatermarkStore(self.watermarks) as store:
+            return store.get(self.statement.account_id)
+
+    def save_watermark(self) -> None:
+        date_count = self.id_generator.date_count
+        if self.watermarks is None or not self.statement.account_id or not date_count:
+            return
+        from ofxstatement_schwab_json.watermark import Watermark, WatermarkStore
+
+        latest = max(date_count)
+        with WatermarkStore(self.watermarks) as store:
+            store.advance(
+                self.statement.account_id, Watermark(latest, date_count[latest])
+            )
+
+    def resolve_action(
+        self, action: str, has_symbol: bool, negative: bool
+    ) -> Tuple[Callable, Optional[str]]:
+        """Find the handler for a brokerage row
+
+        Lookups go through a per-parser cache, so each distinct combination
+        of action, symbol presence and amount sign only searches
+        BROKERAGE_ACTIONS once.
+        """
+        key = (action, has_symbol, negative)
+        resolved = self._resolved_actions.get(key)
+        if resolved is None:
+            entry = (
+                self.actions.get(key)
+                or self.actions.get((action, has_symbol, None))
+                or self.actions.get((action, None, None))
+            )
+            if entry is None:
+                if has_symbol:
+                    raise Exception(f'Unrecognized action: "{action}"')
+                raise Exception(f'Unrecognized bank action: "{action}"')
+            handler_name, action_type = entry
+            handler = getattr(self, handler_name)
+            if self.stats is not None:
+                handler = self.stats.timed_handler(action, handler)
+            resolved = (handler, action_type)
+            self._resolved_actions[key] = resolved
+        return resolved
+
+    def validate(self, line: Line) -> None:
+        line.assert_valid()
+
+    def skip_validation(self, line: Line) -> None:
+        pass
+
+    def add_buy_line(self, id, date, details):
+        line = InvestStatementLine(
+            id=id,
+            date=date,
+            memo=f'{details["Action"]} {details["Description"]}',
+        )
+        line.trntype = "BUYSTOCK"
+        line.trntype_detailed = "BUY"
+        line.security_id = details["Symbol"]
+        line.units = parse_money(details["Quantity"])
+        line.unit_price = parse_money(details["Price"])
+        line.amount = parse_money(details["Amount"])
+        if len(details["Fees & Comm"]) > 0:
+            line.fees = parse_money(details["Fees & Comm"])
+        self.validate(line)
+        return line
+
+    def add_sell_line(self, id, date, details):
+        line = InvestStatementLine(
+            id=id,
+            date=date,
+            memo=f'{details["Action"]} {details["Description"]}',
+        )
+        line.trntype = "SELLSTOCK"
+        line.trntype_detailed = "SELL"
+        line.security_id = details["Symbol"]
+        line.units = parse_negative(details["Quantity"])
+        line.unit_price = parse_money(details["Price"])
+        line.amount = parse_money(details["Amount"])
+        if len(details["Fees & Comm"]) > 0:
+            line.fees = parse_money(details["Fees & Comm"])
+        self.validate(line)
+        return line
+
+    def add_transfer_line(self, id, date, details):
+        line = InvestStatementLine(
+            id=id,
+            date=date,
+            memo=f'{details["Action"]} {details["Description"]}',
+        )
+        line.trntype = "TRANSFER"
+        line.security_id = details["Symbol"]
+        line.units = parse_money(details["Quantity"])
+        if len(details["Price"]) > 0:
+            line.unit_price = parse_money(details["Price"])
+        else:
+            line.unit_price = Decimal(0)
+        if len(details["Amount"]) > 0:
+            line.amount = parse_money(details["Amount"])
+        else:
+            line.amount = Decimal(0)
+        # With lots, the lot tracker allocates the cost basis
+        if details["Action"] == "Spin-off" and self.lots is None:
+            LOGGER.warning(
+                f"You will probably want to allocate some cost basis for the {line.security_id} spin-off."
+            )
+        if details["Action"] == "Stock Split" and self.lots is None:
+            LOGGER.warning(
+                f"You will probably want to allocate some cost basis for the {line.units} additional shares of {line.security_id} due to the stock split."
+            )
+        self.validate(line)
+        return line
+
+    def add_income_line(self, id, date, income_type, details):
+        line = InvestStatementLine(
+            id=id,
+            date=date,
+            memo=f'{details["Action"]} {details["Description"]}',
+        )
+        line.trntype = "INCOME"
+        line.trntype_detailed = income_type
+        line.security_id = details["Symbol"]
+        line.amount = parse_money(details["Amount"])
+        self.validate(line)
+        return line
+
+    def add_invexpense_line(self, id, date, details):
+        line = InvestStatementLine(
+            id=id,
+            date=date,
+            memo=f'{details["Action"]} {details["Description"]}',
+        )
+        line.trntype = "INVEXPENSE"
+        line.security_id = details["Symbol"]
+        line.amount = parse_money(details["Amount"])
+        self.validate(line)
+        return line
+
+    # action_type is defined in section 11.4.4.3
+    def add_bank_line(self, id, date, action_type, details):
+        line = InvestStatementLine(
+            id=id,
+            date=date,
+            memo=f'{details["Action"]} {details["Description"]}',
+        )
+        line.trntype = "INVBANKTRAN"
+        line.amount = parse_money(details["Amount"])
+        line.trntype_detailed = action_type
+        self.validate(line)
+        return line
+
+    def add_statement_line(self, id, date, details):
+        withdrawal = (
+            parse_negative(details["Withdrawal"]) if details.get("Withdrawal") else None
+        )
+
+        deposit = parse_money(details["Deposit"]) if details.get("Deposit") else None
+
+        line = StatementLine(
+            id=id,
+            date=date,
+            memo=details.get("Description"),
+            amount=withdrawal or deposit,
+        )
+        line.check_no = details.get("CheckNumber")
+        if details["Type"] in ("ACH", "WIRE"):
+            if withdrawal:
+                line.trntype = "DEBIT"
+            else:
+                line.trntype = "CREDIT"
+        else:
+            line.trntype = POSTED_TRANSACTION_TYPES[details["Type"]]
+
+        self.validate(line)
+        return line
+
+
+class IdGenerator:
+    """Generates a unique ID based on the date
+
+    Hopefully any JSON file that we get will have all the transactions for a
+    given date, and hopefully in the same order each time so that these IDs
+    will match up across exports.
+    """
+
+    def __init__(self) -> None:
+        # Number of IDs issued so far, keyed by %Y%m%d date
+        self.date_count: Dict[str, int] = {}
+
+    def create_id(self, date: datetime, id_prefix: Optional[str] = None) -> str:
+        """Issue the next ID for a date
+
+        Callers that already have the %Y%m%d form of the date can pass it as
+        id_prefix to skip formatting it again.
+        """
+        if id_prefix is None:
+            id_prefix = datetime.strftime(date, "%Y%m%d")
+        count = self.date_count.get(id_prefix, 0) + 1
+        self.date_count[id_prefix] = count
+        return f"{id_prefix}-{count}"
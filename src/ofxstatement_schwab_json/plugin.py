@@ -1,311 +1,86 @@
-from datetime import datetime
-from decimal import Decimal
-import re
+"""The ofxstatement plugin
+
+ofxstatement imports this module for every command, including ones that
+never parse anything, so it only imports what the plugin class itself needs.
+The parser lives in ofxstatement_schwab_json.parser and is imported when
+first used. Its public names can still be imported from here.
+"""
+
 from os import path
-from typing import Dict
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
 from ofxstatement.plugin import Plugin
-from ofxstatement.parser import AbstractStatementParser
-from ofxstatement.statement import Statement, InvestStatementLine, StatementLine
 
-import logging
+if TYPE_CHECKING:
+    from ofxstatement_schwab_json.parser import (
+        BROKERAGE_ACTIONS,
+        POSTED_TRANSACTION_TYPES,
+        ActionHandler,
+        ActionKey,
+        IdGenerator,
+        SchwabJsonParser,
+        account_id_from_filename,
+    )
+
+# Names that used to be defined here, for existing imports
+PARSER_NAMES = {
+    "BROKERAGE_ACTIONS",
+    "POSTED_TRANSACTION_TYPES",
+    "ActionHandler",
+    "ActionKey",
+    "IdGenerator",
+    "SchwabJsonParser",
+    "account_id_from_filename",
+}
 
-LOGGER = logging.getLogger(__name__)
 
-import json
+def __getattr__(name: str) -> Any:
+    if name in PARSER_NAMES:
+        from ofxstatement_schwab_json import parser
 
-POSTED_TRANSACTION_TYPES = {
-    # Map Schwab PostedTransactions types to ofxstatement TRANSACTION_TYPES
-    "ATM": "ATM",
-    "ATMREBATE": "CREDIT",
-    "CHECK": "CHECK",
-    "DEBIT": "DEBIT",
-    "DEPOSIT": "DEP",
-    "INTADJUST": "INT",
-    "TRANSFER": "XFER",
-    "VISA": "POS",
-}
+        return getattr(parser, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class SchwabJsonPlugin(Plugin):
     """Parses Schwab JSON export of investment transactions"""
 
     def get_parser(self, filename: str) -> "SchwabJsonParser":
-        return SchwabJsonParser(filename)
-
-
-class SchwabJsonParser(AbstractStatementParser):
-    statement: Statement
-
-    def __init__(self, filename: str) -> None:
-        super().__init__()
-        self.filename = filename
-        self.statement = Statement()
-        self.statement.broker_id = "Schwab"
-        match = re.search(r"(.*)_Transactions_.*\.json", path.basename(filename))
-        if match:
-            self.statement.account_id = match[1]
-        self.id_generator = IdGenerator()
-
-    def parse(self) -> Statement:
-        """Main entry point for parsers"""
-        with open(self.filename, "r") as f:
-            # Reverse the lines so that they are in chronological order
-            loaded = json.load(f)
-            posted_transactions = reversed(
-                # Banking / Checking accounts
-                loaded.get("PostedTransactions", [])
-            )
-            brokerage_transactions = reversed(
-                # Brokerage accounts
-                loaded.get("BrokerageTransactions", [])
-            )
-            self.import_lines(
-                posted_transactions=posted_transactions,
-                brokerage_transactions=brokerage_transactions,
-            )
-            return self.statement
-
-    def import_lines(self, posted_transactions, brokerage_transactions):
-        for tran in posted_transactions:
-            date = datetime.strptime(tran["Date"][0:10], "%m/%d/%Y")
-            id = self.id_generator.create_id(date)
-            self.add_statement_line(id, date, tran)
-
-        for tran in brokerage_transactions:
-            date = datetime.strptime(tran["Date"][0:10], "%m/%d/%Y")
-            id = self.id_generator.create_id(date)
-
-            action = tran["Action"]
-            if action == "Sell":
-                self.add_sell_line(id, date, tran)
-            elif (
-                action == "Cash Dividend"
-                or action == "Div Adjustment"
-                or action == "Non-Qualified Div"
-                or action == "Pr Yr Cash Div"
-                or action == "Pr Yr Div Reinvest"
-                or action == "Pr Yr Non Qual Div"
-                or action == "Pr Yr Non-Qual Div"
-                or action == "Pr Yr Special Div"
-                or action == "Qual Div Reinvest"
-                or action == "Qualified Dividend"
-                or action == "Reinvest Dividend"
-                or action == "Special Dividend"
-                or action == "Special Qual Div"
-            ):
-                self.add_income_line(id, date, "DIV", tran)
-            elif (
-                action == "Long Term Cap Gain"
-                or action
-                == "Long Term Cap Gain Reinvest"  # This usually comes paired with a separate "Reinvest Shares" action
-            ):
-                self.add_income_line(id, date, "CGLONG", tran)
-            elif (
-                action == "Short Term Cap Gain"
-                or action
-                == "Short Term Cap Gain Reinvest"  # This usually comes paired with a separate "Reinvest Shares" action
-            ):
-                self.add_income_line(id, date, "CGSHORT", tran)
-            elif action == "Bank Interest" and len(tran["Symbol"]) > 0:
-                self.add_income_line(id, date, "INTEREST", tran)
-            elif action == "NRA Tax Adj" and len(tran["Symbol"]) > 0:
-                self.add_invexpense_line(id, date, tran)
-            elif action == "Buy" or action == "Reinvest Shares":
-                self.add_buy_line(id, date, tran)
-            elif len(tran["Symbol"]) > 0 and (
-                action == "Journal"
-                or action == "Journaled Shares"
-                or action == "Spin-off"
-                or action == "Stock Split"
-                or action == "Security Transfer"
-            ):
-                self.add_transfer_line(id, date, tran)
-            elif len(tran["Symbol"]) == 0:
-                if (
-                    action == "Wire Sent"
-                    or action == "Auto S1 Debit"
-                    or action == "Funds Paid"
-                    or (action == "Returned Check" and tran["Amount"].startswith("-"))
-                ):
-                    self.add_bank_line(id, date, "DEBIT", tran)
-                elif action == "Auto S1 Credit":
-                    self.add_bank_line(id, date, "CREDIT", tran)
-                elif action == "Funds Received" or action == "MoneyLink Deposit":
-                    self.add_bank_line(id, date, "DEP", tran)
-                elif (
-                    action == "Bank Interest"
-                    or action == "Bond Interest"
-                    or action == "Credit Interest"
-                ):
-                    self.add_bank_line(id, date, "INT", tran)
-                elif action == "Interest Adj" or action == "Misc Cash Entry":
-                    self.add_bank_line(id, date, "OTHER", tran)
-                elif action == "Service Fee" or action == "Advisor Fee":
-                    self.add_bank_line(id, date, "SRVCHG", tran)
-                elif (
-                    action == "MoneyLink Transfer"
-                    or action == "Bank Transfer"
-                    or action == "Internal Transfer"
-                    or action == "Journal"
-                    or action == "Journaled Shares"
-                    or action == "Security Transfer"
-                ):
-                    self.add_bank_line(id, date, "XFER", tran)
-                else:
-                    raise Exception(f'Unrecognized bank action: "{action}"')
-            elif action == "ADR Mgmt Fee":
-                self.add_bank_line(id, date, "SRVCHG", tran)
-            elif action == "Cash In Lieu":
-                self.add_bank_line(id, date, "CREDIT", tran)
-            else:
-                raise Exception(f'Unrecognized action: "{action}"')
-
-    def add_buy_line(self, id, date, details):
-        line = InvestStatementLine(
-            id=id,
-            date=date,
-            memo=f'{details["Action"]} {details["Description"]}',
-        )
-        line.trntype = "BUYSTOCK"
-        line.trntype_detailed = "BUY"
-        line.security_id = details["Symbol"]
-        line.units = Decimal(re.sub("[,]", "", details["Quantity"]))
-        line.unit_price = Decimal(re.sub("[$,]", "", details["Price"]))
-        line.amount = Decimal(re.sub("[$,]", "", details["Amount"]))
-        if len(details["Fees & Comm"]) > 0:
-            line.fees = Decimal(re.sub("[$,]", "", details["Fees & Comm"]))
-        line.assert_valid()
-        self.statement.invest_lines.append(line)
-
-    def add_sell_line(self, id, date, details):
-        line = InvestStatementLine(
-            id=id,
-            date=date,
-            memo=f'{details["Action"]} {details["Description"]}',
-        )
-        line.trntype = "SELLSTOCK"
-        line.trntype_detailed = "SELL"
-        line.security_id = details["Symbol"]
-        line.units = Decimal(
-            "-" + re.sub("[,-]", "", details["Quantity"])
-        )  # Ensure a negative number
-        line.unit_price = Decimal(re.sub("[$,]", "", details["Price"]))
-        line.amount = Decimal(re.sub("[$,]", "", details["Amount"]))
-        if len(details["Fees & Comm"]) > 0:
-            line.fees = Decimal(re.sub("[$,]", "", details["Fees & Comm"]))
-        line.assert_valid()
-        self.statement.invest_lines.append(line)
-
-    def add_transfer_line(self, id, date, details):
-        line = InvestStatementLine(
-            id=id,
-            date=date,
-            memo=f'{details["Action"]} {details["Description"]}',
-        )
-        line.trntype = "TRANSFER"
-        line.security_id = details["Symbol"]
-        line.units = Decimal(re.sub("[,]", "", details["Quantity"]))
-        if len(details["Price"]) > 0:
-            line.unit_price = Decimal(re.sub("[$,]", "", details["Price"]))
-        else:
-            line.unit_price = Decimal(0)
-        if len(details["Amount"]) > 0:
-            line.amount = Decimal(re.sub("[$,]", "", details["Amount"]))
-        else:
-            line.amount = Decimal(0)
-        if details["Action"] == "Spin-off":
-            LOGGER.warning(
-                f"You will probably want to allocate some cost basis for the {line.security_id} spin-off."
-            )
-        if details["Action"] == "Stock Split":
-            LOGGER.warning(
-                f"You will probably want to allocate some cost basis for the {line.units} additional shares of {line.security_id} due to the stock split."
-            )
-        line.assert_valid()
-        self.statement.invest_lines.append(line)
-
-    def add_income_line(self, id, date, income_type, details):
-        line = InvestStatementLine(
-            id=id,
-            date=date,
-            memo=f'{details["Action"]} {details["Description"]}',
-        )
-        line.trntype = "INCOME"
-        line.trntype_detailed = income_type
-        line.security_id = details["Symbol"]
-        line.amount = Decimal(re.sub("[$,]", "", details["Amount"]))
-        line.assert_valid()
-        self.statement.invest_lines.append(line)
-
-    def add_invexpense_line(self, id, date, details):
-        line = InvestStatementLine(
-            id=id,
-            date=date,
-            memo=f'{details["Action"]} {details["Description"]}',
-        )
-        line.trntype = "INVEXPENSE"
-        line.security_id = details["Symbol"]
-        line.amount = Decimal(re.sub("[$,]", "", details["Amount"]))
-        line.assert_valid()
-        self.statement.invest_lines.append(line)
-
-    # action_type is defined in section 11.4.4.3
-    def add_bank_line(self, id, date, action_type, details):
-        line = InvestStatementLine(
-            id=id,
-            date=date,
-            memo=f'{details["Action"]} {details["Description"]}',
-        )
-        line.trntype = "INVBANKTRAN"
-        line.amount = Decimal(re.sub("[$,]", "", details["Amount"]))
-        line.trntype_detailed = action_type
-        line.assert_valid()
-        self.statement.invest_lines.append(line)
-
-    def add_statement_line(self, id, date, details):
-        withdrawal = (
-            Decimal(f'-{re.sub("[$,]", "", details["Withdrawal"])}')
-            if details.get("Withdrawal")
-            else None
-        )
-
-        deposit = (
-            Decimal(f'{re.sub("[$,]", "", details["Deposit"])}')
-            if details.get("Deposit")
-            else None
+        from ofxstatement_schwab_json.parser import SchwabJsonParser
+
+        return SchwabJsonParser(filename, **self.parser_options())
+
+    def get_merge_parser(self, filenames: List[str]) -> "SchwabJsonParser":
+        """Parser for several overlapping exports of the same account"""
+        from ofxstatement_schwab_json.merge import SchwabJsonMergeParser
+
+        return SchwabJsonMergeParser(filenames, **self.parser_options())
+
+    def parser_options(self) -> Dict[str, Any]:
+        options: Dict[str, Any] = dict(
+            streaming=self.get_flag("streaming"),
+            index=self.get_flag("index"),
+            watermarks=self.get_path("watermarks"),
+            ids=self.settings.get("ids", "position"),
+            id_index=self.get_path("id_index"),
+            stats_file=self.get_path("stats"),
+            columnar=self.get_flag("columnar"),
+            validation=self.settings.get("validation", "immediate"),
+            cache=self.get_path("cache"),
+            lots=self.get_path("lots"),
+            start=self.settings.get("start"),
+            end=self.settings.get("end"),
         )
-
-        line = StatementLine(
-            id=id,
-            date=date,
-            memo=details.get("Description"),
-            amount=withdrawal or deposit,
-        )
-        line.check_no = details.get("CheckNumber")
-        if details["Type"] in ("ACH", "WIRE"):
-            if withdrawal:
-                line.trntype = "DEBIT"
-            else:
-                line.trntype = "CREDIT"
-        else:
-            line.trntype = POSTED_TRANSACTION_TYPES[details["Type"]]
-
-        line.assert_valid()
-        self.statement.lines.append(line)
-
-
-class IdGenerator:
-    """Generates a unique ID based on the date
-
-    Hopefully any JSON file that we get will have all the transactions for a
-    given date, and hopefully in the same order each time so that these IDs
-    will match up across exports.
-    """
-
-    def __init__(self) -> None:
-        self.date_count: Dict[datetime, int] = {}
-
-    def create_id(self, date) -> str:
-        self.date_count[date] = self.date_count.get(date, 0) + 1
-        return f'{datetime.strftime(date, "%Y%m%d")}-{self.date_count[date]}'
+        if self.settings.get("jobs"):
+            options["jobs"] = int(self.settings["jobs"])
+        if self.settings.get("cache_size"):
+            options["cache_size"] = int(self.settings["cache_size"])
+        return options
+
+    def get_flag(self, name: str) -> bool:
+        """Read a boolean option from the plugin's config section"""
+        return str(self.settings.get(name, "")).lower() in ("1", "true", "yes", "on")
+
+    def get_path(self, name: str) -> Optional[str]:
+        value = self.settings.get(name)
+        return path.expanduser(value) if value else None
@@ -0,0 +1,265 @@
+"""Share balances per security, reconstructed from investment lines
+
+Positions replays the share-changing lines of a statement (buys, sells and
+transfers) into a running balance per security, and answers what was held
+at the end of the statement or on any earlier date. Units stay Decimal
+throughout, so balances are exact.
+
+With NumPy installed (pip install ofxstatement-schwab-json[positions]), the
+lines are grouped with one sort, balanced with one cumulative sum over all
+lines, and as-of lookups are a single searchsorted over all securities.
+Without it, the same is done in plain Python.
+
+    positions = Positions(statement.invest_lines)
+    positions.holdings()                      # {"AAPL": Decimal("10"), ...}
+    positions.holdings(datetime(2024, 6, 30))
+    positions.position_list()                 # for an OFX INVPOSLIST
+"""
+
+from array import array
+from bisect import bisect_right
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from ofxstatement.statement import InvestStatementLine
+
+from ofxstatement_schwab_json.columns import NO_DECIMAL, InvestLineColumns
+
+try:
+    import numpy  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover
+    numpy = None  # type: ignore[assignment]
+
+# Transaction types whose units change the number of shares held. Units of
+# sells are already negative.
+SHARE_TYPES = {
+    "BUYDEBT",
+    "BUYMF",
+    "BUYOPT",
+    "BUYOTHER",
+    "BUYSTOCK",
+    "SELLDEBT",
+    "SELLMF",
+    "SELLOPT",
+    "SELLOTHER",
+    "SELLSTOCK",
+    "TRANSFER",
+}
+
+
+class Position(NamedTuple):
+    security_id: str
+    units: Decimal
+    # Price of the latest buy or sell of the security, if there was one
+    unit_price: Optional[Decimal]
+    price_date: Optional[datetime]
+
+    @property
+    def postype(self) -> str:
+        return "SHORT" if self.units < 0 else "LONG"
+
+    @property
+    def market_value(self) -> Optional[Decimal]:
+        if self.unit_price is None:
+            return None
+        return self.units * self.unit_price
+
+
+class Events(NamedTuple):
+    """The share-changing lines, as parallel columns"""
+
+    symbols: List[str]
+    # Index into symbols
+    codes: array
+    ordinals: array
+    units: List[Decimal]
+    unit_prices: List[Optional[Decimal]]
+
+
+class Positions:
+    # Sorted by security and date, so each security's lines are the range
+    # starts[code]:ends[code]. NumPy arrays with use_numpy, otherwise lists.
+    dates: Any
+    balances: Any
+    starts: Any
+    ends: Any
+    unit_prices: Any
+    # Index of the latest line with a price, up to and including each line
+    latest_price: Any
+
+    def __init__(
+        self, lines: Iterable[InvestStatementLine], use_numpy: Optional[bool] = None
+    ) -> None:
+        events = _events(lines)
+        self.symbols = events.symbols
+        self.use_numpy = numpy is not None if use_numpy is None else use_numpy
+        if self.use_numpy:
+            self._build_numpy(events)
+        else:
+            self._build_python(events)
+
+    def _build_numpy(self, events: Events) -> None:
+        codes = numpy.frombuffer(events.codes, dtype=numpy.int32)
+        ordinals = numpy.frombuffer(events.ordinals, dtype=numpy.int32)
+        # Group by security, in date order within each security. lexsort is
+        # stable, so lines on the same date stay in statement order.
+        order = numpy.lexsort((ordinals, codes))
+        codes = codes[order]
+        self.dates = ordinals[order]
+        # Units stay Decimal, in an object array, so the sums are exact
+        shares = numpy.array(events.units, dtype=object)[order]
+        # Running balance within each group: the running total over all
+        # lines, less the total before the group started
+        totals = numpy.cumsum(shares)
+        starts = numpy.flatnonzero(numpy.r_[True, codes[1:] != codes[:-1]])
+        if not len(codes):
+            starts = starts[:0]
+        lengths = numpy.diff(numpy.r_[starts, len(codes)])
+        before = totals[starts] - shares[starts]
+        self.balances = totals - numpy.repeat(before, lengths)
+        self.starts = starts
+        self.ends = starts + lengths
+        # Lookups search this for (security, date) pairs
+        self.keys = codes.astype(numpy.int64) << 32 | self.dates
+
+        self.unit_prices = numpy.array(events.unit_prices, dtype=object)[order]
+        has_price = numpy.array([p is not None for p in events.unit_prices], dtype=bool)
+        priced = numpy.where(has_price[order], numpy.arange(len(codes)), -1)
+        self.latest_price = numpy.maximum.accumulate(priced)
+
+    def _build_python(self, events: Events) -> None:
+        codes, ordinals = events.codes, events.ordinals
+        order = sorted(range(len(codes)), key=lambda i: (codes[i], ordinals[i]))
+        self.dates = [ordinals[i] for i in order]
+        self.unit_prices = [events.unit_prices[i] for i in order]
+        self.balances = []
+        self.latest_price = []
+        self.starts = []
+        self.ends = []
+        code = None
+        balance = Decimal(0)
+        priced = -1
+        for n, i in enumerate(order):
+            if codes[i] != code:
+                code = codes[i]
+                if self.starts:
+                    self.ends.append(n)
+                self.starts.append(n)
+                balance = Decimal(0)
+                priced = -1
+            balance += events.units[i]
+            if self.unit_prices[n] is not None:
+                priced = n
+            self.balances.append(balance)
+            self.latest_price.append(priced)
+        if self.starts:
+            self.ends.append(len(order))
+
+    def _latest(self, as_of: Optional[datetime]) -> List[int]:
+        """Index of each security's latest line up to as_of, or -1"""
+        if as_of is None:
+            return [end - 1 for end in self.ends]
+        ordinal = as_of.toordinal()
+        if self.use_numpy:
+            query = numpy.arange(len(self.symbols), dtype=numpy.int64) << 32 | ordinal
+            found = numpy.searchsorted(self.keys, query, side="right") - 1
+            return numpy.where(found >= self.starts, found, -1).tolist()
+        return [
+            bisect_right(self.dates, ordinal, start, end) - 1
+            for start, end in zip(self.starts, self.ends)
+        ]
+
+    def holdings(self, as_of: Optional[datetime] = None) -> Dict[str, Decimal]:
+        """Shares held of each security at the end of the as_of date
+
+        Without as_of, at the end of the statement. Securities with no
+        shares are left out.
+        """
+        holdings = {}
+        for code, (index, start) in enumerate(zip(self._latest(as_of), self.starts)):
+            if index >= start and self.balances[index]:
+                holdings[self.symbols[code]] = self.balances[index]
+        return holdings
+
+    def position_list(self, as_of: Optional[datetime] = None) -> List[Position]:
+        """Positions of an OFX INVPOSLIST, in the order securities appear"""
+        positions = []
+        for code, (index, start) in enumerate(zip(self._latest(as_of), self.starts)):
+            if index < start or not self.balances[index]:
+                continue
+            unit_price = price_date = None
+            priced = int(self.latest_price[index])
+            if priced >= start:
+                unit_price = self.unit_prices[priced]
+                price_date = datetime.fromordinal(int(self.dates[priced]))
+            positions.append(
+                Position(
+                    self.symbols[code], self.balances[index], unit_price, price_date
+                )
+            )
+        return positions
+
+    def history(self, security_id: str) -> List[Tuple[datetime, Decimal]]:
+        """The balance after each line of one security"""
+        code = self.symbols.index(security_id)
+        return [
+            (datetime.fromordinal(int(self.dates[n])), self.balances[n])
+            for n in range(self.starts[code], self.ends[code])
+        ]
+
+
+def _events(lines: Iterable[InvestStatementLine]) -> Events:
+    events = Events([], array("i"), array("i"), [], [])
+    codes: Dict[str, int] = {}
+    ordinals: Dict[datetime, int] = {}
+
+    if isinstance(lines, InvestLineColumns):
+        # Straight from the columns, without making line objects
+        strings = lines.strings.strings
+        # By string table index
+        symbol_codes: Dict[int, int] = {}
+        indexes = lines.strings.indexes
+        share_types = {indexes[t] for t in SHARE_TYPES if t in indexes}
+        units, exponents = lines.coefficients["units"], lines.exponents["units"]
+        prices = lines.coefficients["unit_price"]
+        price_exponents = lines.exponents["unit_price"]
+        rows = zip(lines.string_columns["trntype"], lines.string_columns["security_id"])
+        for n, (trntype, symbol) in enumerate(rows):
+            exponent = exponents[n]
+            if trntype not in share_types or not symbol or exponent == NO_DECIMAL:
+                continue
+            if not lines.dates[n]:
+                continue
+            code = symbol_codes.get(symbol)
+            if code is None:
+                code = symbol_codes[symbol] = len(events.symbols)
+                events.symbols.append(strings[symbol])  # type: ignore[arg-type]
+            events.codes.append(code)
+            events.ordinals.append(lines.dates[n])
+            events.units.append(Decimal(units[n]).scaleb(exponent))
+            price_exponent = price_exponents[n]
+            events.unit_prices.append(
+                None
+                if price_exponent == NO_DECIMAL
+                else Decimal(prices[n]).scaleb(price_exponent)
+            )
+        return events
+
+    for line in lines:
+        if line.trntype not in SHARE_TYPES or not line.security_id:
+            continue
+        if line.units is None or line.date is None:
+            continue
+        code = codes.get(line.security_id)
+        if code is None:
+            code = codes[line.security_id] = len(events.symbols)
+            events.symbols.append(line.security_id)
+        ordinal = ordinals.get(line.date)
+        if ordinal is None:
+            ordinal = ordinals[line.date] = line.date.toordinal()
+        events.codes.append(code)
+        events.ordinals.append(ordinal)
+        events.units.append(line.units)
+        events.unit_prices.append(line.unit_price)
+    return events
@@ -0,0 +1,85 @@
+"""Fast path for the PostedTransactions of banking accounts
+
+A checking account with years of card activity has hundreds of thousands of
+PostedTransactions rows, and add_statement_line does the same work for each
+of them: several dict lookups, an if chain for the type, StatementLine's
+__init__ and validation. posted_lines converts the rows in one loop instead:
+
+* the OFX type of each Schwab Type is looked up in one of two tables, for
+  withdrawals and deposits, which already have the ACH and WIRE rule in them
+* amounts go through the cached parsers in money
+* lines are made without running StatementLine.__init__, by giving each a
+  complete attribute dict at once
+
+The lines are the same as add_statement_line makes. Every type in the tables
+is a valid OFX type and every row has an ID, so they're valid as made and
+aren't checked again. Rows with a Type not in the tables are passed to
+add_statement_line, so they fail the same way.
+"""
+
+from datetime import datetime
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from ofxstatement.statement import TRANSACTION_TYPES, StatementLine
+
+from ofxstatement_schwab_json.money import parse_money, parse_negative
+
+if TYPE_CHECKING:
+    from ofxstatement_schwab_json.validation import DeferredValidator
+
+# Types whose OFX type depends on the direction of the money
+SIGNED_TYPES = {"ACH": ("DEBIT", "CREDIT"), "WIRE": ("DEBIT", "CREDIT")}
+
+
+def posted_types(types: Dict[str, str]) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """The OFX types of withdrawals and of deposits, by Schwab Type"""
+    valid = {name: ofx for name, ofx in types.items() if ofx in TRANSACTION_TYPES}
+    withdrawals = dict(valid, **{name: ofx for name, (ofx, _) in SIGNED_TYPES.items()})
+    deposits = dict(valid, **{name: ofx for name, (_, ofx) in SIGNED_TYPES.items()})
+    return withdrawals, deposits
+
+
+def posted_lines(
+    rows: Iterable[Tuple[str, datetime, dict]],
+    types: Dict[str, str],
+    fallback: Callable[[str, datetime, dict], StatementLine],
+    validator: Optional["DeferredValidator"] = None,
+) -> Iterator[StatementLine]:
+    """Make a line for each numbered PostedTransactions row
+
+    types maps Schwab Types to OFX types, as POSTED_TRANSACTION_TYPES does,
+    and fallback is add_statement_line. With deferred validation, the lines
+    are also passed to validator, so that its row numbers stay in step.
+    """
+    withdrawal_types, deposit_types = posted_types(types)
+    new = StatementLine.__new__
+    money = parse_money
+    negative = parse_negative
+    for id, date, tran in rows:
+        get = tran.get
+        withdrawal = get("Withdrawal")
+        amount = negative(withdrawal) if withdrawal else None
+        if amount:
+            trntype = withdrawal_types.get(tran["Type"])
+        else:
+            deposit = get("Deposit")
+            amount = money(deposit) if deposit else None
+            trntype = deposit_types.get(tran["Type"])
+        if trntype is None:
+            line = fallback(id, date, tran)
+        else:
+            line = new(StatementLine)
+            line.__dict__ = {
+                "id": id,
+                "date": date,
+                "memo": get("Description"),
+                "amount": amount,
+                "date_user": None,
+                "payee": None,
+                "check_no": get("CheckNumber"),
+                "refnum": None,
+                "trntype": trntype,
+            }
+        if validator is not None:
+            validator.add(line, tran["Type"])
+        yield line
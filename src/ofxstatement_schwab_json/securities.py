@@ -0,0 +1,78 @@
+"""Index of the securities in a statement
+
+SchwabJsonParser fills a SecurityIndex as it produces investment lines, and
+attaches it to the statement as statement.securities. Questions about the
+securities of a statement, including which ones go in the OFX SECLIST, are
+then answered from one entry per symbol instead of a pass over every line.
+"""
+
+from datetime import datetime
+from typing import Dict, Iterator, Optional
+
+
+class Security:
+    def __init__(self, symbol: str, date: datetime, description: str) -> None:
+        self.symbol = symbol
+        self.description = description
+        # Dates of the first and last lines with this symbol
+        self.first_date = date
+        self.last_date = date
+        # Number of lines with this symbol
+        self.count = 0
+
+    def __repr__(self) -> str:
+        return (
+            f"Security({self.symbol!r}, {self.description!r}, "
+            f"{self.first_date:%Y-%m-%d}..{self.last_date:%Y-%m-%d}, "
+            f"count={self.count})"
+        )
+
+
+class SecurityIndex:
+    """Securities by symbol, in the order they first appear"""
+
+    def __init__(self) -> None:
+        self.securities: Dict[str, Security] = {}
+
+    def add(self, symbol: str, date: datetime, description: str) -> None:
+        security = self.securities.get(symbol)
+        if security is None:
+            security = self.securities[symbol] = Security(symbol, date, description)
+        else:
+            # Lines arrive in date order. Keep the latest description, in
+            # case the security was renamed.
+            security.last_date = date
+            if description:
+                security.description = description
+        security.count += 1
+
+    def update(self, other: "SecurityIndex") -> None:
+        """Add the securities of an index of later lines"""
+        for security in other:
+            mine = self.securities.get(security.symbol)
+            if mine is None:
+                self.securities[security.symbol] = security
+                continue
+            mine.last_date = security.last_date
+            if security.description:
+                mine.description = security.description
+            mine.count += security.count
+
+    def get(self, symbol: str) -> Optional[Security]:
+        return self.securities.get(symbol)
+
+    def __getitem__(self, symbol: str) -> Security:
+        return self.securities[symbol]
+
+    def __contains__(self, symbol: object) -> bool:
+        return symbol in self.securities
+
+    def __iter__(self) -> Iterator[Security]:
+        return iter(self.securities.values())
+
+    def __len__(self) -> int:
+        return len(self.securities)
+
+    def symbols(self) -> Iterator[str]:
+        """Symbols in the order of their first line, as in the OFX SECLIST"""
+        return iter(self.securities)
@@ -0,0 +1,111 @@
+"""Transaction IDs derived from row content
+
+IdGenerator numbers rows by their position within a date, so when Schwab
+reorders or backfills rows between exports the IDs of existing transactions
+shift. ContentIdGenerator instead hashes the normalized row, so a transaction
+keeps its ID wherever it appears. Identical rows on the same date are told
+apart by their occurrence number.
+
+Issued IDs are recorded in an optional SQLite index, keyed by account, hash
+and occurrence, so that an ID handed out once is reused by every later run
+and every overlapping export, even if the way IDs are formed changes.
+"""
+
+from decimal import InvalidOperation
+from hashlib import sha1
+import sqlite3
+from typing import Dict, Optional
+
+from ofxstatement_schwab_json.money import parse_money
+
+# Length of the hex digest kept in new IDs
+DIGEST_LENGTH = 12
+
+
+def normalize_amount(value: Optional[str]) -> str:
+    if not value:
+        return ""
+    try:
+        return str(parse_money(value).normalize())
+    except InvalidOperation:
+        return value.strip()
+
+
+def content_key(tran: dict) -> str:
+    """Normalized (action, symbol, quantity, amount, description) of a row"""
+    if "Action" in tran:
+        fields = [
+            "B",
+            tran["Action"],
+            tran.get("Symbol", ""),
+            normalize_amount(tran.get("Quantity")),
+            normalize_amount(tran.get("Amount")),
+        ]
+    else:
+        # PostedTransactions rows have a type, and a withdrawal or a deposit
+        withdrawal = normalize_amount(tran.get("Withdrawal"))
+        fields = [
+            "P",
+            tran.get("Type", ""),
+            tran.get("CheckNumber") or "",
+            "",
+            "-" + withdrawal if withdrawal else normalize_amount(tran.get("Deposit")),
+        ]
+    fields.append(" ".join((tran.get("Description") or "").split()))
+    return "\x1f".join(field.strip() for field in fields)
+
+
+class ContentIdGenerator:
+    """Generates IDs from the date and a hash of the row content"""
+
+    def __init__(self, account_id: str, index: Optional[str] = None) -> None:
+        self.account_id = account_id
+        self.connection = sqlite3.connect(index or ":memory:")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS fitids ("
+            " account_id TEXT NOT NULL,"
+            " digest TEXT NOT NULL,"
+            " occurrence INTEGER NOT NULL,"
+            " fitid TEXT NOT NULL,"
+            " PRIMARY KEY (account_id, digest, occurrence)"
+            ") WITHOUT ROWID"
+        )
+        # Occurrences of each digest on the current date. Rows arrive in
+        # date order, so this only ever holds one date.
+        self.occurrences: Dict[str, int] = {}
+        self.current_date: Optional[str] = None
+
+    def __enter__(self) -> "ContentIdGenerator":
+        return self
+
+    def __exit__(self, exc_type, *exc_info) -> None:
+        if exc_type is None:
+            self.connection.commit()
+        self.connection.close()
+
+    def create_id(self, id_prefix: str, tran: dict) -> str:
+        if id_prefix != self.current_date:
+            self.current_date = id_prefix
+            self.occurrences.clear()
+
+        digest = sha1(f"{id_prefix}\x1f{content_key(tran)}".encode("utf8")).hexdigest()
+        occurrence = self.occurrences.get(digest, 0) + 1
+        self.occurrences[digest] = occurrence
+
+        row = self.connection.execute(
+            "SELECT fitid FROM fitids"
+            " WHERE account_id = ? AND digest = ? AND occurrence = ?",
+            (self.account_id, digest, occurrence),
+        ).fetchone()
+        if row:
+            return row[0]
+
+        fitid = f"{id_prefix}-{digest[:DIGEST_LENGTH]}"
+        if occurrence > 1:
+            fitid += f"-{occurrence}"
+        self.connection.execute(
+            "INSERT INTO fitids (account_id, digest, occurrence, fitid)"
+            " VALUES (?, ?, ?, ?)",
+            (self.account_id, digest, occurrence, fitid),
+        )
+        return fitid
@@ -0,0 +1,128 @@
+"""Timing and counters for a parse
+
+When instrumentation is enabled, SchwabJsonParser wraps the steps of a parse
+in timers from a ParseStats:
+
+* load - json.load, or the scan of a streaming parse
+* rows - fetching rows, decoding them in a streaming parse, date parsing,
+  ID assignment and incremental skipping
+* dispatch - looking up the handler of each brokerage row
+* handlers - the add_*_line handlers, including Decimal conversion and
+  validation
+* validate - assert_valid on each line
+
+Handler time is also broken down per action, with a latency histogram.
+When instrumentation is disabled none of the wrappers are installed, so the
+parse runs exactly as it otherwise would.
+"""
+
+from contextlib import contextmanager
+import json
+from time import perf_counter
+from typing import Callable, Dict, Iterable, Iterator, List, TypeVar
+
+T = TypeVar("T")
+
+# Upper bounds of the latency histogram buckets, in microseconds. The last
+# bucket holds everything slower.
+BUCKETS_US = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+class ActionStats:
+    def __init__(self, handler: str) -> None:
+        self.handler = handler
+        self.count = 0
+        self.seconds = 0.0
+        self.histogram: List[int] = [0] * (len(BUCKETS_US) + 1)
+
+    def record(self, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        micros = seconds * 1e6
+        for n, bound in enumerate(BUCKETS_US):
+            if micros < bound:
+                self.histogram[n] += 1
+                return
+        self.histogram[-1] += 1
+
+    def as_dict(self) -> dict:
+        labels = [f"<{bound}us" for bound in BUCKETS_US] + [f">={BUCKETS_US[-1]}us"]
+        return {
+            "handler": self.handler,
+            "count": self.count,
+            "seconds": self.seconds,
+            "histogram": dict(zip(labels, self.histogram)),
+        }
+
+
+class ParseStats:
+    def __init__(self) -> None:
+        self.stages: Dict[str, float] = {}
+        self.actions: Dict[str, ActionStats] = {}
+
+    @property
+    def rows(self) -> int:
+        return sum(action.count for action in self.actions.values())
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, perf_counter() - start)
+
+    def timed_call(self, func: Callable[..., T], stage: str) -> Callable[..., T]:
+        def timed(*args, **kwargs) -> T:
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add(stage, perf_counter() - start)
+
+        return timed
+
+    def timed_rows(self, rows: Iterable[T]) -> Iterator[T]:
+        """Add the time taken to produce each row to the rows stage"""
+        iterator = iter(rows)
+        while True:
+            start = perf_counter()
+            try:
+                row = next(iterator)
+            except StopIteration:
+                self.add("rows", perf_counter() - start)
+                return
+            self.add("rows", perf_counter() - start)
+            yield row
+
+    def timed_handler(self, action: str, handler: Callable[..., T]) -> Callable[..., T]:
+        """Wrap a handler to count and time the rows of one action"""
+        stats = self.actions.setdefault(action, ActionStats(handler.__name__))
+
+        def timed(*args) -> T:
+            start = perf_counter()
+            try:
+                return handler(*args)
+            finally:
+                seconds = perf_counter() - start
+                stats.record(seconds)
+                self.add("handlers", seconds)
+
+        return timed
+
+    def as_dict(self) -> dict:
+        return {
+            "rows": self.rows,
+            "stages": dict(self.stages),
+            "actions": {
+                action: stats.as_dict()
+                for action, stats in sorted(self.actions.items())
+            },
+        }
+
+    def dump(self, filename: str) -> None:
+        with open(filename, "w") as f:
+            json.dump(self.as_dict(), f, indent=2)
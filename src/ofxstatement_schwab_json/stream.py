@@ -0,0 +1,341 @@
+"""Incremental reading of Schwab JSON exports
+
+Schwab lists transactions newest first, so getting them in chronological order
+means reading each array backwards. Rather than decoding the whole document,
+the file is memory-mapped and scanned once to record the byte span of every
+transaction object. The objects are then decoded one at a time, last to first,
+so only the row currently being imported is held as a Python object.
+"""
+
+from array import array
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import tempfile
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+LOGGER = logging.getLogger(__name__)
+
+TRANSACTION_ARRAYS = ("PostedTransactions", "BrokerageTransactions")
+
+# Row index files: magic, header length, then a JSON header and the arrays
+INDEX_SUFFIX = ".idx"
+INDEX_MAGIC = b"SJIDX001"
+_INDEX_HEADER = struct.Struct("<8sq")
+
+Buffer = Union[bytes, mmap.mmap]
+
+_STRING = re.compile(rb'"(?:[^"\\]|\\.)*"')
+# Any JSON string, or a structural character that changes nesting depth
+_TOKEN = re.compile(rb'"(?:[^"\\]|\\.)*"|[\[\]{}]')
+# A flat object with no nested objects or arrays, which is what every Schwab
+# transaction row looks like, followed by the comma after it if there is
+# one. Matching it in one go keeps the per-row scanning cost inside the regex
+# engine. The loops are unrolled so that runs of plain characters are
+# consumed by a single repeat rather than an alternation per character.
+_FLAT_ROW = re.compile(
+    rb'(\{[^{}\[\]"]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^{}\[\]"]*)*\})\s*(,\s*)?'
+)
+# The posting date of a row, as MM/DD/YYYY
+_DATE = re.compile(rb'"Date"\s*:\s*"(\d\d)/(\d\d)/(\d{4})')
+_SCALAR = re.compile(rb"[^,\]}\s]+")
+_WHITESPACE = re.compile(rb"\s*")
+
+_OPEN = frozenset(b"[{")
+_CLOSE = frozenset(b"]}")
+
+
+def scan_arrays(
+    buf: Buffer, keys: Iterable[str] = TRANSACTION_ARRAYS
+) -> Dict[str, "array[int]"]:
+    """Find the byte span of each element of the given top-level arrays
+
+    Returns a flat array of (start, end) offsets per key, in file order.
+    """
+    wanted = set(keys)
+    spans: Dict[str, "array[int]"] = {}
+    pos = _skip_whitespace(buf, 0)
+    _expect(buf, pos, b"{")
+    pos = _skip_whitespace(buf, pos + 1)
+    while buf[pos : pos + 1] != b"}":
+        match = _STRING.match(buf, pos)
+        if not match:
+            raise ValueError(f"Expected an object key at byte {pos}")
+        key = json.loads(match.group())
+        pos = _skip_whitespace(buf, match.end())
+        _expect(buf, pos, b":")
+        pos = _skip_whitespace(buf, pos + 1)
+        if key in wanted and buf[pos : pos + 1] == b"[":
+            spans[key] = array("q")
+            pos = _scan_array(buf, pos, spans[key])
+        else:
+            pos = _skip_value(buf, pos)
+        pos = _skip_whitespace(buf, pos)
+        if buf[pos : pos + 1] == b",":
+            pos = _skip_whitespace(buf, pos + 1)
+        else:
+            _expect(buf, pos, b"}")
+    return spans
+
+
+def _scan_array(buf: Buffer, pos: int, spans: "array[int]") -> int:
+    pos = _skip_whitespace(buf, pos + 1)
+    if buf[pos : pos + 1] == b"]":
+        return pos + 1
+    match_row = _FLAT_ROW.match
+    append = spans.append
+    while True:
+        match = match_row(buf, pos)
+        if match is not None:
+            append(pos)
+            append(match.end(1))
+            pos = match.end()
+            if match.start(2) >= 0:
+                continue
+        else:
+            end = _skip_value(buf, pos)
+            append(pos)
+            append(end)
+            pos = _skip_whitespace(buf, end)
+            if buf[pos : pos + 1] == b",":
+                pos = _skip_whitespace(buf, pos + 1)
+                continue
+        _expect(buf, pos, b"]")
+        return pos + 1
+
+
+def _skip_value(buf: Buffer, pos: int) -> int:
+    """Return the offset just past the JSON value starting at pos"""
+    if buf[pos] not in _OPEN:
+        match = _STRING.match(buf, pos) or _SCALAR.match(buf, pos)
+        if not match:
+            raise ValueError(f"Expected a value at byte {pos}")
+        return match.end()
+
+    depth = 0
+    for token in _TOKEN.finditer(buf, pos):
+        char = buf[token.start()]
+        if char in _OPEN:
+            depth += 1
+        elif char in _CLOSE:
+            depth -= 1
+            if depth == 0:
+                return token.end()
+    raise ValueError(f"Unterminated value starting at byte {pos}")
+
+
+def _skip_whitespace(buf: Buffer, pos: int) -> int:
+    match = _WHITESPACE.match(buf, pos)
+    assert match is not None  # \s* always matches
+    return match.end()
+
+
+def _expect(buf: Buffer, pos: int, char: bytes) -> None:
+    if buf[pos : pos + 1] != char:
+        raise ValueError(f"Expected {char.decode()!r} at byte {pos}")
+
+
+def row_days(buf: Buffer, spans: Sequence[int]) -> "array[int]":
+    """The date of each row as a YYYYMMDD number, or 0 if it has none"""
+    days = array("i")
+    search = _DATE.search
+    for i in range(0, len(spans), 2):
+        match = search(buf, spans[i], spans[i + 1])
+        days.append(0 if match is None else int(match[3] + match[1] + match[2]))
+    return days
+
+
+def _descending(days: Sequence[int]) -> bool:
+    """Whether every row has a date, newest first"""
+    return all(days) and all(a >= b for a, b in zip(days, days[1:]))
+
+
+def _first_before(days: Sequence[int], day: int) -> int:
+    """Index of the first row dated before day, in newest first days"""
+    lo, hi = 0, len(days)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if days[mid] < day:
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
+
+
+class ExportReader:
+    """Memory-mapped view of a Schwab JSON export
+
+    With index, the offsets of the rows are kept in a file next to the
+    export, together with the date of every row. Later readers of the same,
+    unchanged export map that file instead of scanning the export, and find
+    the rows of a date range by binary search.
+    """
+
+    def __init__(self, filename: str, index: bool = False) -> None:
+        self.filename = filename
+        self._file = open(filename, "rb")
+        self._buf: Optional[mmap.mmap] = mmap.mmap(
+            self._file.fileno(), 0, access=mmap.ACCESS_READ
+        )
+        # Only with an index: the YYYYMMDD date of each row, in file order,
+        # and whether the rows are newest first
+        self.days: Dict[str, Sequence[int]] = {}
+        self.ordered: Dict[str, bool] = {}
+        self._index: Optional[mmap.mmap] = None
+        self._views: List[memoryview] = []
+        self.spans: Dict[str, Sequence[int]]
+        if not index:
+            self.spans = dict(scan_arrays(self._buf))
+        elif not self._load_index():
+            self.spans = dict(scan_arrays(self._buf))
+            for key, spans in self.spans.items():
+                self.days[key] = row_days(self._buf, spans)
+                self.ordered[key] = _descending(self.days[key])
+            self._save_index()
+
+    def __enter__(self) -> "ExportReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for view in self._views:
+            view.release()
+        self._views = []
+        if self._index is not None:
+            self._index.close()
+            self._index = None
+        if self._buf is not None:
+            self._buf.close()
+            self._buf = None
+        self._file.close()
+
+    @property
+    def index_path(self) -> str:
+        return self.filename + INDEX_SUFFIX
+
+    def _source(self) -> Tuple[int, int]:
+        stat = os.fstat(self._file.fileno())
+        return stat.st_size, stat.st_mtime_ns
+
+    def _load_index(self) -> bool:
+        """Map the index file, if it's there and up to date"""
+        try:
+            with open(self.index_path, "rb") as f:
+                index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return False
+        try:
+            magic, length = _INDEX_HEADER.unpack_from(index)
+            header = json.loads(index[_INDEX_HEADER.size : _INDEX_HEADER.size + length])
+            if magic != INDEX_MAGIC or header["source"] != list(self._source()):
+                index.close()
+                return False
+        except (ValueError, KeyError, TypeError, struct.error):
+            index.close()
+            return False
+
+        self._index = index
+        view = memoryview(index)
+        self._views.append(view)
+        self.spans = {}
+        body = _INDEX_HEADER.size + length
+        body += -body % 8
+        for key, (count, spans_at, days_at, ordered) in header["arrays"].items():
+            spans_at += body
+            days_at += body
+            spans = view[spans_at : spans_at + 16 * count].cast("q")
+            days = view[days_at : days_at + 4 * count].cast("i")
+            self._views += [spans, days]
+            self.spans[key] = spans
+            self.days[key] = days
+            self.ordered[key] = ordered
+        LOGGER.debug(f"Using row index {self.index_path}")
+        return True
+
+    def _save_index(self) -> None:
+        """Write the index file, replacing any older one"""
+        arrays = {}
+        body: List[bytes] = []
+        offset = 0
+        for key, spans in self.spans.items():
+            parts = [bytes(spans), bytes(self.days[key])]
+            arrays[key] = (
+                len(spans) // 2,
+                offset,
+                offset + len(parts[0]),
+                self.ordered[key],
+            )
+            for part in parts:
+                # Keep every array 8-byte aligned for cast()
+                body.append(part + bytes(-len(part) % 8))
+                offset += len(body[-1])
+        header = json.dumps({"source": self._source(), "arrays": arrays}).encode()
+        try:
+            fd, temp = tempfile.mkstemp(dir=os.path.dirname(self.index_path) or ".")
+        except OSError as e:
+            LOGGER.debug(f"Not saving a row index for {self.filename}: {e}")
+            return
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_INDEX_HEADER.pack(INDEX_MAGIC, len(header)))
+                f.write(header + bytes(-(_INDEX_HEADER.size + len(header)) % 8))
+                f.writelines(body)
+            os.replace(temp, self.index_path)
+        except OSError as e:
+            os.remove(temp)
+            LOGGER.debug(f"Not saving a row index for {self.filename}: {e}")
+
+    def count(self, key: str) -> int:
+        return len(self.spans.get(key, ())) // 2
+
+    def day(self, key: str, n: int) -> int:
+        """YYYYMMDD date of the nth row of an array in file order, or 0"""
+        if key in self.days:
+            return self.days[key][n]
+        assert self._buf is not None, "ExportReader is closed"
+        spans = self.spans[key]
+        match = _DATE.search(self._buf, spans[2 * n], spans[2 * n + 1])
+        return 0 if match is None else int(match[3] + match[1] + match[2])
+
+    def chronological(
+        self, key: str, start: Optional[str] = None, end: Optional[str] = None
+    ) -> Iterator[dict]:
+        """Decode the rows of one array from the last (oldest) to the first
+
+        With start or end (YYYYMMDD), rows dated outside them are skipped
+        without being decoded. Rows whose date can't be found are decoded
+        anyway.
+        """
+        spans = self.spans.get(key, array("q"))
+        first, last = 0, len(spans) // 2
+        days = self.days.get(key)
+        if start is None and end is None:
+            pass
+        elif days is not None and self.ordered[key]:
+            # Only the rows in the range are visited
+            if end is not None:
+                first = _first_before(days, int(end) + 1)
+            if start is not None:
+                last = _first_before(days, int(start))
+        else:
+            yield from self._in_range(key, start or "0", end or "99999999")
+            return
+        for i in range(last - 1, first - 1, -1):
+            assert self._buf is not None, "ExportReader is closed"
+            yield json.loads(self._buf[spans[2 * i] : spans[2 * i + 1]])
+
+    def _in_range(self, key: str, start: str, end: str) -> Iterator[dict]:
+        first, last = int(start), int(end)
+        spans = self.spans[key]
+        for n in range(len(spans) // 2 - 1, -1, -1):
+            day = self.day(key, n)
+            if day and (day < first or day > last):
+                continue
+            buf = self._buf
+            assert buf is not None, "ExportReader is closed"
+            yield json.loads(buf[spans[2 * n] : spans[2 * n + 1]])
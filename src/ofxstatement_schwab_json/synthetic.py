@@ -0,0 +1,209 @@
+"""Synthetic Schwab JSON exports for testing and benchmarking
+
+Generates exports of any size that look like the real thing: rows newest
+first, a configurable mix of trades, income, cash movements and share
+transfers, and a configurable number of distinct symbols.
+
+    $ python -m ofxstatement_schwab_json.synthetic --rows 1000000 \\
+        Big_XXX999_Transactions_20260101-000000.json
+"""
+
+import argparse
+from datetime import date, timedelta
+from decimal import Decimal
+import json
+import random
+from typing import Dict, List, Optional
+
+from ofxstatement_schwab_json.parser import POSTED_TRANSACTION_TYPES
+
+DEFAULT_MIX = {"trade": 3, "income": 4, "cash": 2, "transfer": 1}
+
+TRADE_ACTIONS = ["Buy", "Sell", "Reinvest Shares"]
+INCOME_ACTIONS = [
+    "Qualified Dividend",
+    "Cash Dividend",
+    "Non-Qualified Div",
+    "Reinvest Dividend",
+    "Long Term Cap Gain",
+    "Short Term Cap Gain",
+    "Bank Interest",
+]
+TRANSFER_ACTIONS = ["Journaled Shares", "Security Transfer"]
+# (action, sign of the amount)
+CASH_ACTIONS = [
+    ("Credit Interest", 1),
+    ("MoneyLink Transfer", -1),
+    ("MoneyLink Deposit", 1),
+    ("Funds Received", 1),
+    ("Wire Sent", -1),
+    ("Service Fee", -1),
+    ("Auto S1 Debit", -1),
+    ("Auto S1 Credit", 1),
+]
+POSTED_TYPES = sorted(POSTED_TRANSACTION_TYPES) + ["ACH", "WIRE"]
+
+
+def money(value: Decimal) -> str:
+    """Format like Schwab does: -$1,234.56"""
+    sign = "-" if value < 0 else ""
+    return f"{sign}${abs(value):,.2f}"
+
+
+class ExportGenerator:
+    def __init__(
+        self,
+        rows: int,
+        posted_rows: int = 0,
+        mix: Optional[Dict[str, float]] = None,
+        symbols: int = 50,
+        days: Optional[int] = None,
+        end: date = date(2025, 12, 31),
+        seed: int = 0,
+    ) -> None:
+        self.rows = rows
+        self.posted_rows = posted_rows
+        self.mix = mix or DEFAULT_MIX
+        self.symbols = [self._symbol(n) for n in range(max(symbols, 1))]
+        # Default to about 20 brokerage rows per day
+        self.days = days or max((rows + posted_rows) // 20, 1)
+        self.end = end
+        self.random = random.Random(seed)
+
+    @staticmethod
+    def _symbol(n: int) -> str:
+        letters = ""
+        n += 1
+        while n:
+            n, rem = divmod(n - 1, 26)
+            letters = chr(ord("A") + rem) + letters
+        return letters
+
+    def generate(self) -> dict:
+        return {
+            "FromDate": self._date_str(self.days - 1),
+            "ToDate": self._date_str(0),
+            "TotalTransactionsAmount": "$0.00",
+            "BrokerageTransactions": self._newest_first(self.rows, self.brokerage_row),
+            "PostedTransactions": self._newest_first(self.posted_rows, self.posted_row),
+        }
+
+    def write(self, filename: str) -> None:
+        with open(filename, "w") as f:
+            json.dump(self.generate(), f)
+
+    def _newest_first(self, count: int, make_row) -> List[dict]:
+        # Spread rows evenly over the days, newest first like Schwab
+        return [make_row(self._date_str(n * self.days // count)) for n in range(count)]
+
+    def _date_str(self, days_ago: int) -> str:
+        return (self.end - timedelta(days=days_ago)).strftime("%m/%d/%Y")
+
+    def brokerage_row(self, date_str: str) -> dict:
+        kind = self.random.choices(list(self.mix), weights=list(self.mix.values()))[0]
+        row = {
+            "Date": date_str,
+            "Action": "",
+            "Symbol": "",
+            "Description": "",
+            "Quantity": "",
+            "Price": "",
+            "Fees & Comm": "",
+            "Amount": "",
+            "AcctgRuleCd": "1",
+        }
+        symbol = self.random.choice(self.symbols)
+        if kind == "trade":
+            action = self.random.choice(TRADE_ACTIONS)
+            quantity = Decimal(self.random.randint(1, 5000)) / 10
+            price = Decimal(self.random.randint(100, 50000)) / 100
+            total = (quantity * price).quantize(Decimal("0.01"))
+            row.update(
+                Symbol=symbol,
+                Description=f"{symbol} COMMON STOCK",
+                Quantity=f"{quantity:,}",
+                Price=f"${price:,}",
+                Amount=money(total if action == "Sell" else -total),
+            )
+            if action != "Reinvest Shares":
+                row["Fees & Comm"] = "$0.00"
+        elif kind == "income":
+            action = self.random.choice(INCOME_ACTIONS)
+            row.update(
+                Symbol=symbol,
+                Description=f"{symbol} COMMON STOCK",
+                Amount=money(Decimal(self.random.randint(1, 100000)) / 100),
+            )
+        elif kind == "transfer":
+            action = self.random.choice(TRANSFER_ACTIONS)
+            shares = self.random.randint(1, 1000) * self.random.choice((1, -1))
+            row.update(
+                Symbol=symbol,
+                Description=f"{symbol} COMMON STOCK",
+                Quantity=f"{shares:,}",
+            )
+        else:
+            action, sign = self.random.choice(CASH_ACTIONS)
+            row.update(
+                Description=f"{action.upper()} {self.random.randint(1, 999):03}",
+                Amount=money(sign * Decimal(self.random.randint(1, 1000000)) / 100),
+            )
+        row["Action"] = action
+        return row
+
+    def posted_row(self, date_str: str) -> dict:
+        kind = self.random.choice(POSTED_TYPES)
+        amount = money(Decimal(self.random.randint(1, 200000)) / 100).lstrip("-")
+        withdrawal = kind not in ("DEPOSIT", "ATMREBATE", "INTADJUST")
+        if kind in ("ACH", "WIRE", "TRANSFER"):
+            withdrawal = self.random.random() < 0.5
+        return {
+            "CheckNumber": (
+                str(self.random.randint(100, 9999)) if kind == "CHECK" else None
+            ),
+            "Date": date_str,
+            "Description": f"{kind} {self.random.randint(1, 999):03}",
+            "Type": kind,
+            "Withdrawal": amount if withdrawal else "",
+            "Deposit": "" if withdrawal else amount,
+            "RunningBalance": "",
+        }
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """Parse "trade=3,income=4" into weights"""
+    mix = {}
+    for item in value.split(","):
+        kind, _, weight = item.partition("=")
+        if kind not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f'Unknown row kind "{kind}"')
+        mix[kind] = float(weight)
+    return mix
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Write a synthetic Schwab export")
+    parser.add_argument("output", help="file to write")
+    parser.add_argument("--rows", type=int, default=10000, help="brokerage rows")
+    parser.add_argument("--posted-rows", type=int, default=0, help="banking rows")
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        help="row kind weights, default: trade=3,income=4,cash=2,transfer=1",
+    )
+    parser.add_argument("--symbols", type=int, default=50, help="distinct symbols")
+    parser.add_argument("--days", type=int, help="number of days covered")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    ExportGenerator(
+        args.rows,
+        posted_rows=args.posted_rows,
+        mix=args.mix,
+        symbols=args.symbols,
+        days=args.days,
+        seed=args.seed,
+    ).write(args.output)
+
+
+if __name__ == "__main__":
+    main()
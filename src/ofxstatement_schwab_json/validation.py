@@ -0,0 +1,123 @@
+"""Deferred validation of statement lines
+
+By default every add_*_line handler validates its line as soon as it's made,
+and the first invalid line ends the parse. With deferred validation the
+lines are instead collected into batches, grouped by transaction type, and
+checked a batch at a time. Each group goes straight to the checks for its
+type, rather than through assert_valid's dispatch on every line, and every
+failure is recorded, so the end of the parse reports all invalid lines at
+once.
+
+Only a batch of lines is held at a time, so deferred validation works in
+constant memory with iter_lines() and columnar statements. Lines are yielded
+before they're validated; the report is raised once the last line has been
+produced, before watermarks are saved.
+"""
+
+import traceback
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple, Type
+
+from ofxstatement.exceptions import ValidationError
+from ofxstatement.statement import InvestStatementLine
+
+from ofxstatement_schwab_json.columns import Line
+
+BATCH_SIZE = 4096
+
+# The checks InvestStatementLine.assert_valid runs for each trntype
+INVEST_CHECKS: Dict[str, Callable[[InvestStatementLine], None]] = {
+    "BUYDEBT": InvestStatementLine.assert_valid_buydebt,
+    "BUYMF": InvestStatementLine.assert_valid_buystock,
+    "BUYSTOCK": InvestStatementLine.assert_valid_buystock,
+    "INCOME": InvestStatementLine.assert_valid_income,
+    "INVBANKTRAN": InvestStatementLine.assert_valid_invbanktran,
+    "INVEXPENSE": InvestStatementLine.assert_valid_invexpense,
+    "SELLDEBT": InvestStatementLine.assert_valid_selldebt,
+    "SELLMF": InvestStatementLine.assert_valid_sellstock,
+    "SELLSTOCK": InvestStatementLine.assert_valid_sellstock,
+    "TRANSFER": InvestStatementLine.assert_valid_transfer,
+}
+
+
+class LineError(NamedTuple):
+    # Position of the line among all the lines of the parse
+    row: int
+    action: str
+    id: Optional[str]
+    reason: str
+
+
+class LinesValidationError(ValidationError):
+    """Raised with every invalid line found by deferred validation"""
+
+    def __init__(self, errors: List[LineError]) -> None:
+        lines = [f"{len(errors)} invalid transactions:"]
+        lines += [f"  line {e.row}, {e.action} ({e.id}): {e.reason}" for e in errors]
+        super().__init__("\n".join(lines), errors)
+        self.errors = errors
+
+    def __str__(self) -> str:
+        return self.message
+
+
+class DeferredValidator:
+    def __init__(self, batch_size: int = BATCH_SIZE) -> None:
+        self.batch_size = batch_size
+        self.pending: List[Tuple[int, str, Line]] = []
+        self.errors: List[LineError] = []
+        self.count = 0
+
+    def add(self, line: Line, action: str) -> None:
+        self.pending.append((self.count, action, line))
+        self.count += 1
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Validate the pending lines"""
+        groups: Dict[Tuple[Type[Line], Optional[str]], List[Tuple[int, str, Line]]] = {}
+        for entry in self.pending:
+            line = entry[2]
+            groups.setdefault((type(line), line.trntype), []).append(entry)
+        self.pending = []
+
+        errors = []
+        for (line_type, trntype), entries in groups.items():
+            check = check_for(line_type, trntype)
+            for row, action, line in entries:
+                try:
+                    check(line)
+                except AssertionError as e:
+                    errors.append(LineError(row, action, line.id, _reason(e)))
+        self.errors += sorted(errors)
+
+    def finish(self) -> None:
+        """Validate the remaining lines, raising if any line was invalid"""
+        self.flush()
+        if self.errors:
+            raise LinesValidationError(self.errors)
+
+
+def check_for(line_type: Type[Line], trntype: Optional[str]) -> Callable:
+    """The validation function for lines of one type and trntype"""
+    check = INVEST_CHECKS.get(trntype or "")
+    if line_type is not InvestStatementLine or check is None:
+        # StatementLine.assert_valid is short, and unknown types fail
+        # assert_valid with the proper message anyway
+        return line_type.assert_valid
+
+    def check_invest(line: InvestStatementLine) -> None:
+        # The checks assert_valid makes for every trntype
+        assert line.id
+        assert line.date
+        check(line)  # type: ignore[misc]
+
+    return check_invest
+
+
+def _reason(error: AssertionError) -> str:
+    if error.args:
+        return str(error)
+    # A bare assert: report the failing check itself
+    frame = traceback.extract_tb(error.__traceback__)[-1]
+    return frame.line or "assertion failed"
@@ -0,0 +1,311 @@
+"""Convert Schwab JSON exports as they arrive in a folder
+
+Rather than being run from cron, this keeps running and polls a drop folder
+for new or changed `*_Transactions_*.json` files, converting each to OFX
+once it has stopped changing:
+
+    $ ofxstatement-schwab-json-watch -t schwab -o ofx/ drop/
+
+Only file sizes and modification times are polled, so it works the same on
+every OS and on network shares. A file is converted once its size and mtime
+have stayed the same for the settle time, so exports that are still being
+copied in aren't read half-written. Conversions run in a pool of jobs
+workers, and files that become ready while all workers are busy wait in a
+queue. Exports that already have an OFX file newer than them are skipped,
+so restarting the service doesn't convert everything again.
+"""
+
+import argparse
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+import fnmatch
+import json
+import logging
+import os
+import signal
+import tempfile
+import time
+from typing import Dict, List, MutableMapping, Optional, Tuple
+
+from ofxstatement import configuration
+
+from ofxstatement_schwab_json.batch import (
+    EXPORT_PATTERN,
+    FileResult,
+    convert_file,
+    output_path,
+    report,
+)
+
+LOGGER = logging.getLogger(__name__)
+
+# Upper bounds of the conversion latency histogram buckets, in seconds. The
+# last bucket holds everything slower.
+BUCKETS_S = (0.1, 0.5, 1, 2, 5, 10, 30, 60)
+
+# Size and mtime in nanoseconds
+FileState = Tuple[int, int]
+
+
+class WatchMetrics:
+    """Counters for a watch service, as written to its metrics file
+
+    Latency is from a file being queued to its conversion finishing, so it
+    includes the time spent waiting for a worker.
+    """
+
+    def __init__(self) -> None:
+        self.queued = 0
+        self.running = 0
+        self.converted = 0
+        self.failed = 0
+        self.lines = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.histogram: List[int] = [0] * (len(BUCKETS_S) + 1)
+
+    def record(self, result: FileResult, seconds: float) -> None:
+        if result.error is None:
+            self.converted += 1
+            self.lines += result.lines
+        else:
+            self.failed += 1
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        for n, bound in enumerate(BUCKETS_S):
+            if seconds < bound:
+                self.histogram[n] += 1
+                return
+        self.histogram[-1] += 1
+
+    def as_dict(self) -> dict:
+        labels = [f"<{bound}s" for bound in BUCKETS_S] + [f">={BUCKETS_S[-1]}s"]
+        done = self.converted + self.failed
+        return {
+            "queue_depth": self.queued,
+            "running": self.running,
+            "converted": self.converted,
+            "failed": self.failed,
+            "lines": self.lines,
+            "latency": {
+                "mean_seconds": self.seconds / done if done else 0.0,
+                "max_seconds": self.max_seconds,
+                "histogram": dict(zip(labels, self.histogram)),
+            },
+        }
+
+    def dump(self, filename: str) -> None:
+        """Write the metrics to filename, replacing it in one step"""
+        fd, temp = tempfile.mkstemp(dir=os.path.dirname(filename) or ".")
+        with os.fdopen(fd, "w") as f:
+            json.dump(self.as_dict(), f, indent=2)
+        os.replace(temp, filename)
+
+
+class WatchService:
+    def __init__(
+        self,
+        directory: str,
+        settings: MutableMapping,
+        output_dir: Optional[str] = None,
+        jobs: Optional[int] = None,
+        interval: float = 2.0,
+        settle: float = 5.0,
+        pretty: bool = False,
+        metrics_file: Optional[str] = None,
+    ) -> None:
+        self.directory = directory
+        self.settings = settings
+        self.output_dir = output_dir
+        self.jobs = jobs or os.cpu_count() or 1
+        self.interval = interval
+        self.settle = settle
+        self.pretty = pretty
+        self.metrics_file = metrics_file
+        self.metrics = WatchMetrics()
+        # Files seen changing: their state and when it was first seen
+        self.pending: Dict[str, Tuple[FileState, float]] = {}
+        # The state each file was queued in, so it's converted again only
+        # if it changes after that
+        self.done: Dict[str, FileState] = {}
+        # Ready files and when they were queued, made in run() so that it
+        # belongs to the running event loop
+        self.queue: Optional["asyncio.Queue[Tuple[str, float]]"] = None
+
+    def poll(self, now: float) -> List[str]:
+        """Scan the folder, returning the files that are ready to convert"""
+        ready = []
+        seen = set()
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not fnmatch.fnmatch(entry.name, EXPORT_PATTERN):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                filename = entry.path
+                seen.add(filename)
+                state = (stat.st_size, stat.st_mtime_ns)
+                if self.done.get(filename) == state:
+                    continue
+                if filename not in self.done and self.is_converted(filename, stat):
+                    self.done[filename] = state
+                    continue
+                previous = self.pending.get(filename)
+                if previous is None or previous[0] != state:
+                    self.pending[filename] = (state, now)
+                elif now - previous[1] >= self.settle:
+                    del self.pending[filename]
+                    self.done[filename] = state
+                    ready.append(filename)
+        # Forget files that were removed, so they're converted if they return
+        for filename in set(self.pending) - seen:
+            del self.pending[filename]
+        for filename in set(self.done) - seen:
+            del self.done[filename]
+        return sorted(ready)
+
+    def is_converted(self, filename: str, stat: os.stat_result) -> bool:
+        """Whether an earlier run already wrote the export's OFX file"""
+        try:
+            output = os.stat(output_path(filename, self.output_dir))
+        except OSError:
+            return False
+        return output.st_mtime_ns >= stat.st_mtime_ns
+
+    async def run(self, stop: Optional[asyncio.Event] = None) -> None:
+        """Poll and convert until stop is set"""
+        stop = stop or asyncio.Event()
+        queue: "asyncio.Queue[Tuple[str, float]]" = asyncio.Queue()
+        self.queue = queue
+        executor: Executor
+        if self.jobs == 1:
+            # A thread, so the loop keeps polling while it converts
+            executor = ThreadPoolExecutor(max_workers=1)
+        else:
+            executor = ProcessPoolExecutor(max_workers=self.jobs)
+        LOGGER.info("Watching %s with %d workers", self.directory, self.jobs)
+        workers = [
+            asyncio.create_task(self.worker(queue, executor)) for _ in range(self.jobs)
+        ]
+        try:
+            while not stop.is_set():
+                for filename in self.poll(time.monotonic()):
+                    queue.put_nowait((filename, time.monotonic()))
+                self.update_metrics()
+                try:
+                    await asyncio.wait_for(stop.wait(), self.interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            executor.shutdown(wait=True)
+            self.update_metrics()
+
+    async def worker(
+        self, queue: "asyncio.Queue[Tuple[str, float]]", executor: Executor
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            filename, queued = await queue.get()
+            self.metrics.running += 1
+            self.update_metrics()
+            try:
+                result = await loop.run_in_executor(
+                    executor,
+                    convert_file,
+                    filename,
+                    output_path(filename, self.output_dir),
+                    dict(self.settings),
+                    self.pretty,
+                )
+            finally:
+                self.metrics.running -= 1
+            report(result)
+            self.metrics.record(result, time.monotonic() - queued)
+            self.update_metrics()
+
+    def update_metrics(self) -> None:
+        self.metrics.queued = self.queue.qsize() if self.queue else 0
+        if self.metrics_file:
+            try:
+                self.metrics.dump(self.metrics_file)
+            except OSError as e:
+                LOGGER.warning(
+                    "Could not write metrics to %s: %s", self.metrics_file, e
+                )
+
+
+def make_args_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Convert Schwab JSON exports to OFX as they arrive in a folder"
+    )
+    parser.add_argument("directory", help="folder to watch for exports")
+    parser.add_argument(
+        "-o", "--output-dir", help="where to write OFX files (default: next to input)"
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, help="worker processes (default: CPU count)"
+    )
+    parser.add_argument("-c", "--config", help="ofxstatement config file")
+    parser.add_argument(
+        "-t", "--type", help="config section with the plugin settings to use"
+    )
+    parser.add_argument(
+        "--interval", type=float, default=2.0, help="seconds between polls"
+    )
+    parser.add_argument(
+        "--settle",
+        type=float,
+        default=5.0,
+        help="seconds a file must stay unchanged before it's converted",
+    )
+    parser.add_argument("--metrics", help="JSON file to keep the metrics in")
+    parser.add_argument("--pretty", action="store_true", help="pretty print OFX")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = make_args_parser().parse_args(argv)
+    logging.basicConfig(format="%(levelname)s: %(message)s", level=logging.INFO)
+
+    settings: MutableMapping = {}
+    if args.type:
+        config = configuration.read(args.config)
+        if config is None or args.type not in config:
+            LOGGER.error("No section '%s' in config file.", args.type)
+            return 1
+        settings = dict(config[args.type])
+
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    async def serve() -> None:
+        service = WatchService(
+            args.directory,
+            settings,
+            output_dir=args.output_dir,
+            jobs=args.jobs,
+            interval=args.interval,
+            settle=args.settle,
+            pretty=args.pretty,
+            metrics_file=args.metrics,
+        )
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except NotImplementedError:  # Windows
+                pass
+        await service.run(stop)
+
+    asyncio.run(serve())
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
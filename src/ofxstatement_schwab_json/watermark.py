@@ -0,0 +1,65 @@
+"""Per-account record of what has already been imported
+
+Schwab exports cover a rolling window, so consecutive exports mostly repeat
+transactions that were imported before. The watermark for an account is the
+newest transaction date seen and how many IDs IdGenerator issued on that
+date. Rows older than that, and the first `count` rows of that date, were
+already emitted by a previous run with the same IDs, so they can be skipped.
+"""
+
+import sqlite3
+from typing import NamedTuple, Optional
+
+
+class Watermark(NamedTuple):
+    # %Y%m%d
+    date: str
+    # Number of IDs issued on that date
+    issued: int
+
+    def covers(self, id_prefix: str, count: int) -> bool:
+        """Whether the count'th ID on id_prefix was already imported"""
+        return id_prefix < self.date or (
+            id_prefix == self.date and count <= self.issued
+        )
+
+
+class WatermarkStore:
+    """SQLite table of the latest Watermark per account"""
+
+    def __init__(self, filename: str) -> None:
+        self.connection = sqlite3.connect(filename)
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS watermarks ("
+                " account_id TEXT PRIMARY KEY,"
+                " date TEXT NOT NULL,"
+                " issued INTEGER NOT NULL)"
+            )
+
+    def __enter__(self) -> "WatermarkStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def get(self, account_id: str) -> Optional[Watermark]:
+        row = self.connection.execute(
+            "SELECT date, issued FROM watermarks WHERE account_id = ?", (account_id,)
+        ).fetchone()
+        return Watermark(*row) if row else None
+
+    def advance(self, account_id: str, watermark: Watermark) -> None:
+        """Store the watermark, unless the stored one is already newer"""
+        current = self.get(account_id)
+        if current is not None and current >= watermark:
+            return
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO watermarks (account_id, date, issued)"
+                " VALUES (?, ?, ?)",
+                (account_id, watermark.date, watermark.issued),
+            )
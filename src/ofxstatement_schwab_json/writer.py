@@ -0,0 +1,268 @@
+"""OFX output for statements made by SchwabJsonParser
+
+OfxWriter finds the securities for the SECLIST by going through every
+investment line before writing them. SchwabOfxWriter takes them from the
+statement's SecurityIndex instead, which matters for columnar statements,
+where every pass over the lines creates every line object again. The output
+is the same as OfxWriter's.
+
+StreamingOfxWriter writes the lines as a parse produces them, so that they
+never need to be held as a Statement at all.
+"""
+
+import copy
+import shutil
+import tempfile
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO
+from xml.dom import minidom
+
+from ofxstatement import ofx
+from ofxstatement.statement import InvestStatementLine, Statement
+
+from ofxstatement_schwab_json.columns import Line
+
+
+class SchwabOfxWriter(ofx.OfxWriter):
+    def security_ids(self) -> Iterable[str]:
+        """The securities of the SECLIST, in the order they first appear"""
+        securities = getattr(self.statement, "securities", None)
+        if securities is not None:
+            return securities.symbols()
+        # As OfxWriter finds them
+        return [
+            security_id
+            for security_id in dict.fromkeys(
+                line.security_id for line in self.statement.invest_lines
+            )
+            if security_id is not None
+        ]
+
+    def buildInvestTransactionList(self) -> None:
+        tb = self.tb
+        tb.start("SECLISTMSGSRSV1", {})
+        tb.start("SECLIST", {})
+        for security_id in self.security_ids():
+            self.buildSecurity(security_id)
+        tb.end("SECLIST")
+        tb.end("SECLISTMSGSRSV1")
+
+        # From here on, as in OfxWriter
+        tb.start("INVSTMTMSGSRSV1", {})
+        tb.start("INVSTMTTRNRS", {})
+
+        self.buildText("TRNUID", "0")
+        tb.start("STATUS", {})
+        self.buildText("CODE", "0")
+        self.buildText("SEVERITY", "INFO")
+        tb.end("STATUS")
+
+        tb.start("INVSTMTRS", {})
+        self.buildDateTime("DTASOF", self.statement.end_date, False)
+        self.buildText("CURDEF", self.statement.currency)
+        tb.start("INVACCTFROM", {})
+        self.buildText("BROKERID", self.statement.broker_id, False)
+        self.buildText("ACCTID", self.statement.account_id, False)
+        tb.end("INVACCTFROM")
+
+        tb.start("INVTRANLIST", {})
+        self.buildDate("DTSTART", self.statement.start_date, False)
+        self.buildDate("DTEND", self.statement.end_date, False)
+
+        for line in self.statement.invest_lines:
+            self.buildInvestTransaction(line)
+
+        tb.end("INVTRANLIST")
+        tb.end("INVSTMTRS")
+        tb.end("INVSTMTTRNRS")
+        tb.end("INVSTMTMSGSRSV1")
+
+    def buildSecurity(self, security_id: str) -> None:
+        tb = self.tb
+        tb.start("STOCKINFO", {})
+        tb.start("SECINFO", {})
+        tb.start("SECID", {})
+        self.buildText("UNIQUEID", security_id)
+        self.buildText("UNIQUEIDTYPE", "TICKER")
+        tb.end("SECID")
+        self.buildText("SECNAME", security_id)
+        self.buildText("TICKER", security_id)
+        tb.end("SECINFO")
+        tb.end("STOCKINFO")
+
+
+class XmlStream:
+    """Writes elements to a file as they are built
+
+    Takes the start, data and end calls of a TreeBuilder and writes the
+    markup that ElementTree would, or with pretty the markup that OfxWriter
+    gets by pretty printing that with minidom. depth is the nesting level of
+    the first element, for the indentation of pretty output.
+    """
+
+    def __init__(self, target: TextIO, pretty: bool = False, depth: int = 0) -> None:
+        self.target = target
+        self.pretty = pretty
+        self.depth = depth
+        # The last element started, until it's known whether it's empty
+        self.pending: Optional[str] = None
+        self.text: List[str] = []
+        # minidom escapes text differently between Python versions, so its
+        # own Text node writes it
+        self._text_node = minidom.Text()
+
+    def start(self, tag: str, attrs: Dict[str, str]) -> None:
+        self._open()
+        self.pending = tag
+        self.text = []
+
+    def data(self, data: str) -> None:
+        self.text.append(data)
+
+    def end(self, tag: str) -> None:
+        write = self.target.write
+        if self.pending != tag:
+            self.depth -= 1
+            write(f"{self.indent}</{tag}>{NEWLINE}" if self.pretty else f"</{tag}>")
+            return
+        self.pending = None
+        text = "".join(self.text)
+        if not text:
+            write(f"{self.indent}<{tag}/>{NEWLINE}" if self.pretty else f"<{tag} />")
+        elif self.pretty:
+            write(f"{self.indent}<{tag}>")
+            # The text is read back by an XML parser before it's printed
+            node = self._text_node
+            node.data = text.replace("\r\n", "\n").replace("\r", "\n")
+            node.writexml(self.target, "", "", "")
+            write(f"</{tag}>{NEWLINE}")
+        else:
+            write(f"<{tag}>{_escape(text)}</{tag}>")
+
+    def _open(self) -> None:
+        """Write the start tag of the pending element, which has children"""
+        if self.pending is None:
+            return
+        if self.pretty:
+            self.target.write(f"{self.indent}<{self.pending}>{NEWLINE}")
+        else:
+            self.target.write(f"<{self.pending}>{_escape(''.join(self.text))}")
+        self.pending = None
+        self.depth += 1
+
+    @property
+    def indent(self) -> str:
+        return "  " * self.depth
+
+
+NEWLINE = "\r\n"
+
+
+def _escape(text: str) -> str:
+    """Escape text as ElementTree does"""
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+    return text
+
+
+class LineSpool:
+    """The markup of a statement's lines, kept in a temporary file
+
+    Stands in for statement.lines or statement.invest_lines when the
+    document is written: it's as true as the list would have been, and
+    iterating over it copies the markup to the document rather than giving
+    lines to build.
+    """
+
+    def __init__(self, pretty: bool) -> None:
+        self.file = tempfile.TemporaryFile("w+", encoding="utf-8")
+        # OFX > *MSGSRSV1 > *TRNRS > *RS > *TRANLIST > transaction
+        self.stream = XmlStream(self.file, pretty, depth=5)
+        self.count = 0
+        self.output: Optional[XmlStream] = None
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self) -> Iterator[Line]:
+        assert self.output is not None
+        self.output._open()
+        self.file.seek(0)
+        shutil.copyfileobj(self.file, self.output.target)
+        return iter(())
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class StreamingOfxWriter(SchwabOfxWriter):
+    """Writes a statement as its lines are produced
+
+    Lines passed to add() are written out right away, to a temporary file
+    per transaction list, and not kept. finish() then writes the document to
+    out, with the statement's balances and securities as they are by then,
+    copying in the transaction lists. The document is the same as
+    SchwabOfxWriter.toxml gives for the statement with all the lines in it.
+    """
+
+    def __init__(
+        self,
+        statement: Statement,
+        out: TextIO,
+        pretty: bool = False,
+        encoding: str = "utf-8",
+    ) -> None:
+        super().__init__(statement)
+        self.out = out
+        self.pretty = pretty
+        self.encoding = encoding
+        self.lines = LineSpool(pretty)
+        self.invest_lines = LineSpool(pretty)
+        self.securities: Dict[str, None] = {}
+
+    def security_ids(self) -> Iterable[str]:
+        return self.securities
+
+    def add(self, line: Line) -> None:
+        if isinstance(line, InvestStatementLine):
+            if line.security_id is not None:
+                self.securities[line.security_id] = None
+            spool = self.invest_lines
+            self.tb = spool.stream  # type: ignore[assignment]
+            self.buildInvestTransaction(line)
+        else:
+            spool = self.lines
+            self.tb = spool.stream  # type: ignore[assignment]
+            self.buildBankTransaction(line)
+        spool.count += 1
+
+    def finish(self) -> None:
+        """Write the document to out"""
+        # The header of toxml, without a document
+        header = ofx.OfxWriter(Statement()).toxml(encoding=self.encoding)
+        self.out.write(header[: header.index("<OFX>")])
+
+        output = XmlStream(self.out, self.pretty)
+        self.tb = output  # type: ignore[assignment]
+        statement = self.statement
+        # Build from a copy whose lists copy the spooled lines in
+        self.statement = copy.copy(statement)
+        self.statement.lines = self.lines  # type: ignore[assignment]
+        self.statement.invest_lines = self.invest_lines  # type: ignore[assignment]
+        self.lines.output = self.invest_lines.output = output
+        try:
+            self.tb.start("OFX", {})
+            self.buildSignon()
+            self.buildTransactionList()
+            self.tb.end("OFX")
+        finally:
+            self.statement = statement
+            self.close()
+
+    def close(self) -> None:
+        """Remove the temporary files"""
+        self.lines.close()
+        self.invest_lines.close()
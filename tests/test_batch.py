@@ -0,0 +1,55 @@
+import os
+import shutil
+
+import pytest
+
+from ofxstatement_schwab_json.batch import find_inputs, main
+
+HERE = os.path.dirname(__file__)
+SAMPLE = os.path.join(HERE, "sample-statement.json")
+
+
+@pytest.fixture
+def exports(tmp_path):
+    for account in ("Joint_XXX111", "IRA_XXX222"):
+        shutil.copy(SAMPLE, tmp_path / f"{account}_Transactions_20240101-000000.json")
+    (tmp_path / "notes.json").write_text("{}")
+    return tmp_path
+
+
+def test_find_inputs_directory(exports):
+    assert [os.path.basename(f) for f in find_inputs(str(exports))] == [
+        "IRA_XXX222_Transactions_20240101-000000.json",
+        "Joint_XXX111_Transactions_20240101-000000.json",
+    ]
+
+
+def test_find_inputs_manifest(exports):
+    manifest = exports / "manifest.txt"
+    manifest.write_text("# nightly\nIRA_XXX222_Transactions_20240101-000000.json\n\n")
+    assert find_inputs(str(manifest)) == [
+        str(exports / "IRA_XXX222_Transactions_20240101-000000.json")
+    ]
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_batch_convert(exports, tmp_path, jobs):
+    out = tmp_path / "ofx"
+    assert main([str(exports), "-o", str(out), "-j", jobs]) == 0
+    ofx = (out / "Joint_XXX111_Transactions_20240101-000000.ofx").read_text()
+    assert "<ACCTID>Joint_XXX111</ACCTID>" in ofx
+    assert (out / "IRA_XXX222_Transactions_20240101-000000.ofx").exists()
+
+
+def test_batch_reports_failures(exports, tmp_path):
+    (exports / "Bad_XXX333_Transactions_20240101-000000.json").write_text("{")
+    assert main([str(exports), "-o", str(tmp_path / "ofx"), "-j", "1"]) == 2
+    assert (tmp_path / "ofx" / "IRA_XXX222_Transactions_20240101-000000.ofx").exists()
+
+
+def test_batch_merge(exports, tmp_path):
+    shutil.copy(SAMPLE, exports / "Joint_XXX111_Transactions_20240201-000000.json")
+    out = tmp_path / "ofx"
+    assert main([str(exports), "-o", str(out), "-j", "1", "--merge"]) == 0
+    assert sorted(os.listdir(out)) == ["IRA_XXX222.ofx", "Joint_XXX111.ofx"]
+    assert (out / "Joint_XXX111.ofx").read_text().count("<FITID>") == 53
@@ -0,0 +1,108 @@
+from datetime import datetime
+import json
+import os
+import pickle
+
+from ofxstatement import ofx
+import pytest
+
+from ofxstatement_schwab_json.cache import ParseCache
+from ofxstatement_schwab_json.columns import InvestLineColumns, StringTable
+from ofxstatement_schwab_json.plugin import SchwabJsonParser
+
+HERE = os.path.dirname(__file__)
+SAMPLE = os.path.join(HERE, "sample-statement.json")
+
+
+@pytest.fixture
+def export(tmp_path):
+    filename = tmp_path / "Joint_XXX111_Transactions_20260101-000000.json"
+    with open(SAMPLE) as f:
+        filename.write_text(f.read())
+    return str(filename)
+
+
+def ofx_text(statement):
+    writer = ofx.OfxWriter(statement)
+    writer.genTime = datetime(2026, 1, 1)
+    return writer.toxml(pretty=True)
+
+
+def not_parsed(self):
+    raise AssertionError("parsed instead of using the cache")
+
+
+def test_cache_hit(export, tmp_path, monkeypatch):
+    cache = str(tmp_path / "cache")
+    expected = SchwabJsonParser(export, cache=cache).parse()
+
+    monkeypatch.setattr(SchwabJsonParser, "iter_lines", not_parsed)
+    statement = SchwabJsonParser(export, cache=cache).parse()
+    assert isinstance(statement.invest_lines, list)
+    assert ofx_text(statement) == ofx_text(expected)
+    assert statement.account_id == "Joint_XXX111"
+    assert list(statement.securities.symbols()) == list(expected.securities.symbols())
+
+    columnar = SchwabJsonParser(export, cache=cache, columnar=True).parse()
+    assert isinstance(columnar.invest_lines, InvestLineColumns)
+    assert ofx_text(columnar) == ofx_text(expected)
+
+
+def test_cache_miss(export, tmp_path):
+    cache = str(tmp_path / "cache")
+    SchwabJsonParser(export, cache=cache).parse()
+    SchwabJsonParser(export, cache=cache, ids="content").parse()
+    assert len(os.listdir(cache)) == 2
+
+    with open(export) as f:
+        loaded = json.load(f)
+    del loaded["BrokerageTransactions"][0]
+    with open(export, "w") as f:
+        json.dump(loaded, f)
+    statement = SchwabJsonParser(export, cache=cache).parse()
+    assert len(statement.invest_lines) == 40
+    assert len(os.listdir(cache)) == 3
+
+
+def test_unreadable_entry(export, tmp_path):
+    cache = str(tmp_path / "cache")
+    SchwabJsonParser(export, cache=cache).parse()
+    (entry,) = os.listdir(cache)
+    with open(os.path.join(cache, entry), "wb") as f:
+        f.write(b"garbage")
+
+    statement = SchwabJsonParser(export, cache=cache).parse()
+    assert len(statement.invest_lines) == 41
+
+
+def test_eviction(export, tmp_path):
+    cache = ParseCache(str(tmp_path / "cache"), max_bytes=1)
+    parser = SchwabJsonParser(export)
+    statement = parser.parse()
+    cache.put("a", statement)
+    assert os.listdir(cache.directory) == []
+
+    cache.max_bytes = 1 << 20
+    cache.put("a", statement)
+    cache.put("b", statement)
+    os.utime(cache.path("a"), (0, 0))
+    assert cache.get("b") is not None
+    cache.max_bytes = os.path.getsize(cache.path("b"))
+    cache.evict()
+    assert os.listdir(cache.directory) == ["b.statement"]
+
+
+def test_not_cached_with_watermarks(export, tmp_path):
+    parser = SchwabJsonParser(
+        export, cache=str(tmp_path / "cache"), watermarks=str(tmp_path / "wm")
+    )
+    assert parser.cache is None
+
+
+def test_string_table_pickle():
+    strings = StringTable()
+    strings.index("a")
+    strings.index("b")
+    copy = pickle.loads(pickle.dumps(strings))
+    assert copy.index("b") == 2
+    assert copy.index("c") == 3
@@ -0,0 +1,91 @@
+from datetime import datetime
+from decimal import Decimal
+import os
+import tracemalloc
+
+from ofxstatement import ofx
+from ofxstatement.statement import InvestStatementLine, StatementLine
+import pytest
+
+from ofxstatement_schwab_json.columns import InvestLineColumns, StatementLineColumns
+from ofxstatement_schwab_json.plugin import SchwabJsonParser
+from ofxstatement_schwab_json.synthetic import ExportGenerator
+
+HERE = os.path.dirname(__file__)
+SAMPLE = os.path.join(HERE, "sample-statement.json")
+
+
+def fields(line):
+    return {name: value for name, value in vars(line).items()}
+
+
+@pytest.mark.parametrize("ids", ["position", "content"])
+def test_columnar_parse(ids, tmp_path):
+    index = str(tmp_path / "ids.sqlite")
+    expected = SchwabJsonParser(SAMPLE, ids=ids, id_index=index).parse()
+    statement = SchwabJsonParser(SAMPLE, ids=ids, id_index=index, columnar=True).parse()
+
+    assert isinstance(statement.invest_lines, InvestLineColumns)
+    assert [fields(x) for x in statement.lines] == [fields(x) for x in expected.lines]
+    assert [fields(x) for x in statement.invest_lines] == [
+        fields(x) for x in expected.invest_lines
+    ]
+
+
+def test_columnar_ofx():
+    genTime = datetime(2026, 1, 1)
+    writers = []
+    for columnar in (False, True):
+        statement = SchwabJsonParser(SAMPLE, columnar=columnar).parse()
+        writer = ofx.OfxWriter(statement)
+        writer.genTime = genTime
+        writers.append(writer.toxml(pretty=True))
+    assert writers[0] == writers[1]
+
+
+def test_exact_decimals():
+    columns = InvestLineColumns()
+    line = InvestStatementLine(
+        id="abc", date=datetime(2025, 1, 2), amount=Decimal("-1.50")
+    )
+    line.units = Decimal("0.00012")
+    line.unit_price = Decimal("1E+3")
+    columns.append(line)
+
+    copy = columns[0]
+    assert str(copy.amount) == "-1.50"
+    assert str(copy.units) == "0.00012"
+    assert copy.unit_price == 1000
+    assert copy.fees is None
+    assert copy.id == "abc"
+    assert columns[-1].date == datetime(2025, 1, 2)
+    with pytest.raises(IndexError):
+        columns[1]
+
+
+def test_ids():
+    columns = StatementLineColumns()
+    date = datetime(2025, 6, 2)
+    for id in ["20250602-2", "20250603-1", "20250602-01", None]:
+        columns.append(StatementLine(id=id, date=date))
+    assert [x.id for x in columns] == ["20250602-2", "20250603-1", "20250602-01", None]
+    assert columns.ids[0] == 2
+
+
+def test_columnar_memory(tmp_path):
+    filename = tmp_path / "Synthetic_XXX000_Transactions_20260101-000000.json"
+    ExportGenerator(5000, posted_rows=500, seed=2).write(str(filename))
+
+    def retained(columnar):
+        tracemalloc.start()
+        statement = SchwabJsonParser(
+            str(filename), streaming=True, columnar=columnar
+        ).parse()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        assert len(statement.invest_lines) == 5000
+        return size
+
+    # Fill the money and date caches first
+    retained(False)
+    assert retained(True) < retained(False) / 2
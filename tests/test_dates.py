@@ -0,0 +1,40 @@
+from datetime import datetime
+
+import pytest
+
+from ofxstatement_schwab_json.dates import parse_date, range_key
+from ofxstatement_schwab_json.plugin import IdGenerator
+
+
+def test_parse_date():
+    parsed = parse_date("09/22/2023")
+    assert parsed.date == datetime(2023, 9, 22)
+    assert parsed.id_prefix == "20230922"
+
+
+def test_parse_date_as_of():
+    assert parse_date("03/15/2024 as of 03/14/2024") == parse_date("03/15/2024")
+
+
+def test_parse_date_invalid():
+    with pytest.raises(ValueError):
+        parse_date("2024-03-15")
+    with pytest.raises(ValueError):
+        parse_date("02/30/2024")
+
+
+def test_id_generator_prefix():
+    generator = IdGenerator()
+    date, id_prefix = parse_date("01/02/2024")
+    assert generator.create_id(date, id_prefix) == "20240102-1"
+    assert generator.create_id(date) == "20240102-2"
+    assert generator.date_count == {"20240102": 2}
+
+
+def test_range_key():
+    assert range_key("2024-03-15", "0") == "20240315"
+    assert range_key("2024-03", "0") == "20240300"
+    assert range_key("2024", "9") == "20249999"
+    assert range_key(None, "0") is None
+    with pytest.raises(ValueError):
+        range_key("2024-13", "0")
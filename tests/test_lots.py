@@ -0,0 +1,167 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+import json
+
+import pytest
+
+from ofxstatement_schwab_json.lots import LotConfig, LotTracker
+from ofxstatement_schwab_json.parser import SchwabJsonParser
+
+
+def day(n):
+    return datetime(2024, 1, 1) + timedelta(days=n)
+
+
+def test_fifo_sells():
+    lots = LotTracker()
+    lots.buy("1", day(0), "AAPL", Decimal(10), Decimal("1000.00"))
+    lots.buy("2", day(10), "AAPL", Decimal(10), Decimal("1500.00"))
+    lots.sell("3", day(370), "AAPL", Decimal(15), Decimal("3000.00"))
+
+    first, second = lots.disposals
+    assert (first.lot_id, first.units, first.proceeds, first.cost) == (
+        "1",
+        Decimal(10),
+        Decimal("2000.00"),
+        Decimal("1000.00"),
+    )
+    assert (second.lot_id, second.units, second.proceeds, second.cost) == (
+        "2",
+        Decimal(5),
+        Decimal("1000.00"),
+        Decimal("750.00"),
+    )
+    assert first.long_term and not second.long_term
+    assert lots.realized_gains() == {"3": Decimal("1250.00")}
+    (lot,) = lots.open_lots("AAPL")
+    assert (lot.id, lot.units, lot.cost) == ("2", Decimal(5), Decimal("750.00"))
+
+
+def test_specific_lots():
+    config = LotConfig()
+    config.sells["9"] = ["3"]
+    lots = LotTracker(config)
+    for n in range(1, 6):
+        lots.buy(str(n), day(n), "VTI", Decimal(1), Decimal(n))
+    lots.sell("9", day(9), "VTI", Decimal(2), Decimal(20))
+    assert [d.lot_id for d in lots.disposals] == ["3", "1"]
+    lots.sell("10", day(10), "VTI", Decimal(2), Decimal(20))
+    assert [d.lot_id for d in lots.disposals[2:]] == ["2", "4"]
+    assert [lot.id for lot in lots.open_lots("VTI")] == ["5"]
+
+
+def test_sell_more_than_held(caplog):
+    lots = LotTracker()
+    lots.buy("1", day(0), "AAPL", Decimal(1), Decimal(100))
+    lots.sell("2", day(1), "AAPL", Decimal(3), Decimal(330))
+    assert [(d.lot_id, d.units, d.proceeds) for d in lots.disposals] == [
+        ("1", Decimal(1), Decimal(110)),
+        (None, Decimal(2), Decimal(220)),
+    ]
+    assert "2 shares more than the open lots hold" in caplog.text
+
+
+def test_splits():
+    config = LotConfig()
+    config.splits["AAPL", "2024-01-05"] = (Decimal(4), Decimal(1))
+    lots = LotTracker(config)
+    lots.buy("1", day(0), "AAPL", Decimal(10), Decimal(1000))
+    lots.buy("2", day(1), "AAPL", Decimal(5), Decimal(600))
+    # Configured, so the row's quantity doesn't matter
+    lots.split("3", day(4), "AAPL", Decimal(1))
+    assert [lot.units for lot in lots.open_lots("AAPL")] == [40, 20]
+    # Not configured: 60 more shares on 60 held is 2 for 1
+    lots.split("4", day(5), "AAPL", Decimal(60))
+    assert [lot.units for lot in lots.open_lots("AAPL")] == [80, 40]
+    assert [lot.cost for lot in lots.open_lots("AAPL")] == [1000, 600]
+
+
+def test_spin_off():
+    config = LotConfig()
+    config.spinoffs["SOLV", "2024-01-11"] = ("MMM", Decimal("0.1"))
+    lots = LotTracker(config)
+    lots.buy("1", day(0), "MMM", Decimal(30), Decimal("3000.00"))
+    lots.buy("2", day(1), "MMM", Decimal(10), Decimal("1200.00"))
+    lots.spin_off("3", day(10), "SOLV", Decimal(10))
+
+    assert [lot.cost for lot in lots.open_lots("MMM")] == [2700, 1080]
+    solv = lots.open_lots("SOLV")
+    assert [(lot.id, lot.acquired, lot.units, lot.cost) for lot in solv] == [
+        ("1/3", day(0), Decimal("7.5"), Decimal(300)),
+        ("2/3", day(1), Decimal("2.5"), Decimal(120)),
+    ]
+
+
+def test_unconfigured_spin_off(caplog):
+    lots = LotTracker()
+    lots.spin_off("1", day(0), "SOLV", Decimal(10))
+    (lot,) = lots.open_lots("SOLV")
+    assert lot.cost == 0
+    assert "allocate some cost basis for the SOLV spin-off" in caplog.text
+
+
+def test_many_lots():
+    lots = LotTracker()
+    for n in range(20000):
+        lots.buy(f"b{n}", day(n % 300), "VTI", Decimal(1), Decimal(10))
+    lots.config.sells["s1"] = [f"b{n}" for n in range(10000, 10100)]
+    lots.sell("s1", day(300), "VTI", Decimal(100), Decimal(2000))
+    lots.sell("s2", day(301), "VTI", Decimal("19899.5"), Decimal(2))
+    assert len(lots.disposals) == 20000
+    (lot,) = lots.open_lots("VTI")
+    assert (lot.id, lot.units, lot.cost) == ("b19999", Decimal("0.5"), Decimal(5))
+
+
+def test_read_config(tmp_path):
+    path = tmp_path / "lots.ini"
+    path.write_text(
+        "[split AAPL 2020-08-31]\nratio = 4:1\n\n"
+        "[spinoff SOLV 2024-04-01]\nparent = MMM\ncost = 0.0757\n\n"
+        "[sell 20240315-2]\nlots = 20230103-1\n  20230601-2\n"
+    )
+    config = LotConfig.read(str(path))
+    assert config.splits == {("AAPL", "2020-08-31"): (Decimal(4), Decimal(1))}
+    assert config.spinoffs == {("SOLV", "2024-04-01"): ("MMM", Decimal("0.0757"))}
+    assert config.sells == {"20240315-2": ["20230103-1", "20230601-2"]}
+
+    path.write_text("[split AAPL 2020-08-31]\nratio = 4\n")
+    with pytest.raises(ValueError, match=r"invalid section \[split AAPL"):
+        LotConfig.read(str(path))
+
+
+def brokerage_row(date, action, quantity, price, amount):
+    return {
+        "Date": date,
+        "Action": action,
+        "Symbol": "SCHG",
+        "Description": "SCHWAB US LARGE CAP GROWTH ETF",
+        "Quantity": quantity,
+        "Price": price,
+        "Fees & Comm": "",
+        "Amount": amount,
+    }
+
+
+def test_parser_lots(tmp_path):
+    export = tmp_path / "Brokerage_XXX000_Transactions_20250101-000000.json"
+    rows = [
+        # Newest first, as Schwab exports them
+        brokerage_row("01/10/2025", "Sell", "50", "$30.00", "$1,500.00"),
+        brokerage_row("10/11/2024", "Stock Split", "300", "$26.3375", ""),
+        brokerage_row("01/02/2023", "Buy", "100", "$60.00", "-$6,000.00"),
+    ]
+    export.write_text(json.dumps({"BrokerageTransactions": rows}))
+    config = tmp_path / "lots.ini"
+    config.write_text("[split SCHG 2024-10-11]\nratio = 4:1\n")
+
+    parser = SchwabJsonParser(str(export), lots=str(config))
+    statement = parser.parse()
+    (disposal,) = statement.lots.disposals
+    assert (disposal.lot_id, disposal.units, disposal.cost, disposal.gain) == (
+        "20230102-1",
+        Decimal(50),
+        Decimal("750.00"),
+        Decimal("750.00"),
+    )
+    assert disposal.long_term
+    assert statement.lots.open_lots("SCHG")[0].units == 350
@@ -0,0 +1,75 @@
+import json
+import os
+
+import pytest
+
+from ofxstatement_schwab_json.merge import (
+    SchwabJsonMergeParser,
+    group_by_account,
+    merge_rows,
+)
+from ofxstatement_schwab_json.plugin import SchwabJsonParser
+
+HERE = os.path.dirname(__file__)
+SAMPLE = os.path.join(HERE, "sample-statement.json")
+
+
+def row(date, description="INT"):
+    return {"Date": date, "Type": "INTADJUST", "Description": description}
+
+
+def test_merge_rows_drops_copies():
+    first = [row("01/01/2024"), row("01/02/2024"), row("01/02/2024")]
+    second = [row("01/02/2024"), row("01/02/2024", "NEW"), row("01/03/2024")]
+    assert list(merge_rows([iter(first), iter(second)])) == [
+        row("01/01/2024"),
+        row("01/02/2024"),
+        # Repeated within the first export, so it's kept
+        row("01/02/2024"),
+        row("01/02/2024", "NEW"),
+        row("01/03/2024"),
+    ]
+
+
+@pytest.fixture
+def overlapping(tmp_path):
+    with open(SAMPLE) as f:
+        loaded = json.load(f)
+    filenames = []
+    # Newest first: the second export starts part way through the first
+    for n, (start, end) in enumerate([(0, 30), (20, 41)]):
+        window = dict(loaded)
+        window["BrokerageTransactions"] = loaded["BrokerageTransactions"][start:end]
+        window["PostedTransactions"] = loaded["PostedTransactions"][start // 3 :]
+        filename = tmp_path / f"Joint_XXX111_Transactions_2026010{n}-000000.json"
+        filename.write_text(json.dumps(window))
+        filenames.append(str(filename))
+    return filenames
+
+
+def test_merge_parser_matches_full_export(overlapping):
+    merged = SchwabJsonMergeParser(overlapping).parse()
+    full = SchwabJsonParser(SAMPLE).parse()
+    assert [str(x) for x in merged.lines] == [str(x) for x in full.lines]
+    assert [str(x) for x in merged.invest_lines] == [str(x) for x in full.invest_lines]
+    assert merged.account_id == "Joint_XXX111"
+
+
+def test_merge_parser_rejects_other_accounts(overlapping):
+    with pytest.raises(ValueError, match="different accounts"):
+        SchwabJsonMergeParser(
+            overlapping + ["IRA_XXX222_Transactions_20260101-000000.json"]
+        )
+
+
+def test_group_by_account():
+    assert group_by_account(
+        [
+            "a/Joint_XXX111_Transactions_1.json",
+            "a/IRA_XXX222_Transactions_1.json",
+            "b/Joint_XXX111_Transactions_2.json",
+        ]
+    ) == [
+        ["a/IRA_XXX222_Transactions_1.json"],
+        ["a/Joint_XXX111_Transactions_1.json", "b/Joint_XXX111_Transactions_2.json"],
+    ]
@@ -0,0 +1,25 @@
+from decimal import Decimal
+
+from ofxstatement_schwab_json.money import parse_money, parse_negative
+
+
+def test_parse_money():
+    assert parse_money("$1,234.56") == Decimal("1234.56")
+    assert parse_money("-$0.29") == Decimal("-0.29")
+    assert parse_money("1,377") == Decimal("1377")
+    assert parse_money("$182.3362") == Decimal("182.3362")
+
+
+def test_parse_negative():
+    assert parse_negative("1,000") == Decimal("-1000")
+    assert parse_negative("-1,000") == Decimal("-1000")
+    assert parse_negative("$400.00") == Decimal("-400.00")
+
+
+def test_parse_money_is_cached():
+    parse_money.cache_clear()
+    parse_money("$0.00")
+    parse_money("$0.00")
+    info = parse_money.cache_info()
+    assert info.hits == 1
+    assert info.misses == 1
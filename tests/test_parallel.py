@@ -0,0 +1,85 @@
+import json
+
+import pytest
+
+from ofxstatement_schwab_json import parallel
+from ofxstatement_schwab_json.parser import SchwabJsonParser
+from ofxstatement_schwab_json.stream import ExportReader
+from ofxstatement_schwab_json.synthetic import ExportGenerator
+from ofxstatement_schwab_json.validation import LinesValidationError
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(parallel, "MIN_CHUNK_ROWS", 200)
+
+
+@pytest.fixture
+def export(tmp_path):
+    filename = tmp_path / "Big_XXX000_Transactions_20260101-000000.json"
+    ExportGenerator(3000, posted_rows=600, days=90, seed=5).write(str(filename))
+    return str(filename)
+
+
+def lines(statement):
+    return [str(x) for x in statement.lines] + [str(x) for x in statement.invest_lines]
+
+
+def test_split_rows(export):
+    with ExportReader(export) as reader:
+        ranges = list(parallel.split_rows(reader, "BrokerageTransactions", 6))
+        assert len(ranges) == 6
+        # Chronological, covering every row once
+        assert ranges[0][1] == 3000 and ranges[-1][0] == 0
+        for (start, _), (_, end) in zip(ranges, ranges[1:]):
+            assert start == end
+            assert reader.day("BrokerageTransactions", start) != reader.day(
+                "BrokerageTransactions", start - 1
+            )
+
+
+@pytest.mark.parametrize("ids", ["position", "content"])
+def test_same_as_serial(export, ids):
+    serial_parser = SchwabJsonParser(export, ids=ids)
+    serial = serial_parser.parse()
+    parser = SchwabJsonParser(export, ids=ids, jobs=2)
+    statement = parser.parse()
+    assert lines(statement) == lines(serial)
+    assert parser.id_generator.date_count == serial_parser.id_generator.date_count
+    assert [repr(x) for x in statement.securities] == [
+        repr(x) for x in serial.securities
+    ]
+
+
+def test_columnar(export):
+    serial = SchwabJsonParser(export).parse()
+    statement = SchwabJsonParser(export, columnar=True, jobs=2, start="2025-11").parse()
+    assert lines(statement) == [
+        line
+        for line, x in zip(lines(serial), serial.lines + serial.invest_lines)
+        if x.date.month >= 11
+    ]
+
+
+def test_deferred_errors(export, tmp_path):
+    with open(export) as f:
+        loaded = json.load(f)
+    rows = loaded["BrokerageTransactions"]
+    for n in (10, 2500):
+        rows[n].update(Action="Credit Interest", Symbol="", Amount="$0.00")
+    filename = tmp_path / "Bad_XXX000_Transactions_20260101-000000.json"
+    filename.write_text(json.dumps(loaded))
+
+    with pytest.raises(LinesValidationError) as serial:
+        SchwabJsonParser(str(filename), validation="deferred").parse()
+    with pytest.raises(LinesValidationError) as raised:
+        SchwabJsonParser(str(filename), validation="deferred", jobs=2).parse()
+    assert raised.value.errors == serial.value.errors
+    assert len(raised.value.errors) == 2
+
+
+def test_small_export_is_serial(export, monkeypatch):
+    monkeypatch.setattr(parallel, "MIN_CHUNK_ROWS", 10000)
+    monkeypatch.setattr(parallel, "ProcessPoolExecutor", None)
+    statement = SchwabJsonParser(export, jobs=4).parse()
+    assert len(statement.invest_lines) == 3000
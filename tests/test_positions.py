@@ -0,0 +1,96 @@
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+
+from ofxstatement.statement import InvestStatementLine
+import pytest
+
+from ofxstatement_schwab_json.columns import InvestLineColumns
+from ofxstatement_schwab_json.parser import SchwabJsonParser
+from ofxstatement_schwab_json.positions import SHARE_TYPES, Positions
+from ofxstatement_schwab_json.synthetic import ExportGenerator
+
+
+@pytest.fixture(params=[False, True], ids=["python", "numpy"])
+def use_numpy(request):
+    if request.param:
+        pytest.importorskip("numpy")
+    return request.param
+
+
+@pytest.fixture(scope="module")
+def statement(tmp_path_factory):
+    filename = tmp_path_factory.mktemp("export") / "Syn_XXX000_Transactions_1.json"
+    ExportGenerator(3000, symbols=20, days=200, seed=3).write(str(filename))
+    return SchwabJsonParser(str(filename)).parse()
+
+
+def replay(lines, as_of=None):
+    """Holdings by replaying every line"""
+    holdings = defaultdict(Decimal)
+    for line in lines:
+        if as_of is not None and line.date > as_of:
+            continue
+        if line.trntype in SHARE_TYPES and line.security_id:
+            holdings[line.security_id] += line.units
+    return {symbol: units for symbol, units in holdings.items() if units}
+
+
+def line(symbol, day, trntype, units, price=None):
+    line = InvestStatementLine(
+        id=f"{day}", date=datetime(2024, 1, day), trntype=trntype, security_id=symbol
+    )
+    line.units = Decimal(units)
+    line.unit_price = None if price is None else Decimal(price)
+    return line
+
+
+def test_holdings(statement, use_numpy):
+    positions = Positions(statement.invest_lines, use_numpy=use_numpy)
+    assert positions.holdings() == replay(statement.invest_lines)
+    for day in (datetime(2025, 6, 1), datetime(2025, 9, 15), datetime(2025, 12, 31)):
+        assert positions.holdings(day) == replay(statement.invest_lines, day)
+    assert positions.holdings(datetime(2000, 1, 1)) == {}
+
+
+def test_columnar_lines(statement, use_numpy):
+    columns = InvestLineColumns()
+    columns.extend(statement.invest_lines)
+    positions = Positions(columns, use_numpy=use_numpy)
+    assert positions.holdings() == replay(statement.invest_lines)
+
+
+def test_position_list(use_numpy):
+    lines = [
+        line("AAPL", 2, "BUYSTOCK", "10", "150.25"),
+        line("MSFT", 3, "BUYSTOCK", "0.125", "400"),
+        line("AAPL", 4, "TRANSFER", "30"),
+        line("MSFT", 5, "SELLSTOCK", "-0.125", "410"),
+        line("AAPL", 6, "SELLSTOCK", "-5", "160"),
+        line("AAPL", 6, "BUYSTOCK", "0.0001", "161"),
+    ]
+    positions = Positions(lines, use_numpy=use_numpy)
+
+    (aapl,) = positions.position_list()
+    assert aapl.security_id == "AAPL"
+    assert aapl.units == Decimal("35.0001")
+    assert aapl.unit_price == Decimal("161")
+    assert aapl.price_date == datetime(2024, 1, 6)
+    assert aapl.postype == "LONG"
+    assert aapl.market_value == Decimal("35.0001") * 161
+
+    as_of = positions.position_list(datetime(2024, 1, 4))
+    assert [(p.security_id, p.units, p.unit_price) for p in as_of] == [
+        ("AAPL", Decimal(40), Decimal("150.25")),
+        ("MSFT", Decimal("0.125"), Decimal(400)),
+    ]
+    assert positions.history("MSFT") == [
+        (datetime(2024, 1, 3), Decimal("0.125")),
+        (datetime(2024, 1, 5), Decimal(0)),
+    ]
+
+
+def test_no_lines(use_numpy):
+    positions = Positions([], use_numpy=use_numpy)
+    assert positions.holdings() == {}
+    assert positions.position_list(datetime(2024, 1, 1)) == []
@@ -0,0 +1,59 @@
+import pytest
+
+from ofxstatement_schwab_json.parser import POSTED_TRANSACTION_TYPES, SchwabJsonParser
+from ofxstatement_schwab_json.posted import posted_lines, posted_types
+from ofxstatement_schwab_json.synthetic import ExportGenerator
+from ofxstatement_schwab_json.validation import DeferredValidator
+
+
+def numbered(parser, rows):
+    return list(parser.number_rows(rows))
+
+
+def test_same_as_add_statement_line():
+    parser = SchwabJsonParser("test.json")
+    export = ExportGenerator(0, posted_rows=2000, seed=3).generate()
+    rows = numbered(parser, reversed(export["PostedTransactions"]))
+    rows += numbered(
+        parser,
+        [
+            # A zero withdrawal counts as a deposit, as in add_statement_line
+            {"Date": "01/02/2026", "Type": "ACH", "Withdrawal": "$0.00"},
+            {"Date": "01/02/2026", "Type": "WIRE", "Deposit": "", "Withdrawal": ""},
+            {"Date": "01/02/2026", "Type": "CHECK", "CheckNumber": "1001"},
+        ],
+    )
+    expected = [parser.add_statement_line(*row) for row in rows]
+    lines = list(
+        posted_lines(rows, POSTED_TRANSACTION_TYPES, parser.add_statement_line)
+    )
+    assert [vars(x) for x in lines] == [vars(x) for x in expected]
+    for line in lines:
+        line.assert_valid()
+
+
+def test_signed_types():
+    withdrawals, deposits = posted_types({"VISA": "POS", "BAD": "NOT A TYPE"})
+    assert withdrawals == {"VISA": "POS", "ACH": "DEBIT", "WIRE": "DEBIT"}
+    assert deposits == {"VISA": "POS", "ACH": "CREDIT", "WIRE": "CREDIT"}
+
+
+def test_unknown_type_falls_back():
+    parser = SchwabJsonParser("test.json")
+    rows = numbered(parser, [{"Date": "01/02/2026", "Type": "NEW", "Deposit": "$1"}])
+    with pytest.raises(KeyError, match="NEW"):
+        list(posted_lines(rows, POSTED_TRANSACTION_TYPES, parser.add_statement_line))
+
+
+def test_deferred_validation_counts_rows():
+    parser = SchwabJsonParser("test.json")
+    rows = numbered(
+        parser, [{"Date": "01/02/2026", "Type": "VISA", "Withdrawal": "$5.00"}] * 3
+    )
+    validator = DeferredValidator()
+    lines = posted_lines(
+        rows, POSTED_TRANSACTION_TYPES, parser.add_statement_line, validator
+    )
+    assert len(list(lines)) == 3
+    assert validator.count == 3
+    validator.finish()
@@ -0,0 +1,60 @@
+from datetime import datetime
+import os
+
+from ofxstatement import ofx
+import pytest
+
+from ofxstatement_schwab_json.plugin import SchwabJsonParser
+from ofxstatement_schwab_json.securities import SecurityIndex
+from ofxstatement_schwab_json.writer import SchwabOfxWriter
+
+HERE = os.path.dirname(__file__)
+SAMPLE = os.path.join(HERE, "sample-statement.json")
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_index_matches_lines(columnar):
+    statement = SchwabJsonParser(SAMPLE, columnar=columnar).parse()
+    securities = statement.securities
+
+    symbols = list(
+        dict.fromkeys(x.security_id for x in statement.invest_lines if x.security_id)
+    )
+    assert list(securities.symbols()) == symbols
+    for security in securities:
+        lines = [x for x in statement.invest_lines if x.security_id == security.symbol]
+        assert security.count == len(lines)
+        assert security.first_date == lines[0].date
+        assert security.last_date == lines[-1].date
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_writer_output(columnar):
+    statement = SchwabJsonParser(SAMPLE, columnar=columnar).parse()
+    writers = [ofx.OfxWriter(statement), SchwabOfxWriter(statement)]
+    for writer in writers:
+        writer.genTime = datetime(2026, 1, 1)
+    assert writers[0].toxml(pretty=True) == writers[1].toxml(pretty=True)
+
+
+def test_writer_without_index():
+    statement = SchwabJsonParser(SAMPLE).parse()
+    del statement.securities
+    assert "<SECLIST>" in SchwabOfxWriter(statement).toxml()
+
+
+def test_index():
+    index = SecurityIndex()
+    index.add("AAPL", datetime(2024, 1, 2), "APPLE INC")
+    index.add("MSFT", datetime(2024, 1, 3), "MICROSOFT CORP")
+    index.add("AAPL", datetime(2024, 2, 1), "")
+    index.add("AAPL", datetime(2024, 3, 1), "APPLE INC NEW")
+
+    assert len(index) == 2
+    assert "AAPL" in index
+    assert index.get("XYZ") is None
+    apple = index["AAPL"]
+    assert apple.count == 3
+    assert apple.first_date == datetime(2024, 1, 2)
+    assert apple.last_date == datetime(2024, 3, 1)
+    assert apple.description == "APPLE INC NEW"
@@ -0,0 +1,80 @@
+import json
+import os
+import sqlite3
+
+import ofxstatement
+import pytest
+
+from ofxstatement_schwab_json.plugin import SchwabJsonParser, SchwabJsonPlugin
+from ofxstatement_schwab_json.stable_ids import ContentIdGenerator, content_key
+
+HERE = os.path.dirname(__file__)
+SAMPLE = os.path.join(HERE, "sample-statement.json")
+
+
+def parse(filename, **settings):
+    plugin = SchwabJsonPlugin(ofxstatement.ui.UI(), {"ids": "content", **settings})
+    return plugin.get_parser(str(filename)).parse()
+
+
+def row(description, amount="$1.00"):
+    return {
+        "Date": "01/02/2024",
+        "Action": "Credit Interest",
+        "Symbol": "",
+        "Description": description,
+        "Quantity": "",
+        "Price": "",
+        "Fees & Comm": "",
+        "Amount": amount,
+    }
+
+
+def test_content_ids_survive_reordering(tmp_path):
+    with open(SAMPLE) as f:
+        loaded = json.load(f)
+    export = tmp_path / "Joint_XXX111_Transactions_20260101-000000.json"
+    export.write_text(json.dumps(loaded))
+    before = {x.memo: x.id for x in parse(export).invest_lines}
+
+    # Swap the two 12/12/2023 rows that are next to each other
+    rows = loaded["BrokerageTransactions"]
+    i = next(i for i, r in enumerate(rows) if r["Date"] == "12/12/2023")
+    rows[i], rows[i + 1] = rows[i + 1], rows[i]
+    export.write_text(json.dumps(loaded))
+    after = {x.memo: x.id for x in parse(export).invest_lines}
+
+    assert after == before
+    assert len(set(before.values())) == len(before)
+
+
+def test_identical_rows_are_numbered():
+    parser = SchwabJsonParser("test.json", ids="content")
+    parser.import_lines([], [row("INT"), row("INT"), row("OTHER")])
+    ids = [x.id for x in parser.statement.invest_lines]
+    assert ids[0].startswith("20240102-")
+    assert ids[1] == ids[0] + "-2"
+    assert len(set(ids)) == 3
+
+
+def test_content_key_normalizes():
+    assert content_key(row(" INT  PAID ", "$1,000.00")) == content_key(
+        row("INT PAID", "$1000")
+    )
+
+
+def test_index_reuses_issued_ids(tmp_path):
+    index = str(tmp_path / "ids.sqlite")
+    with ContentIdGenerator("XXX111", index) as generator:
+        issued = generator.create_id("20240102", row("INT"))
+    with sqlite3.connect(index) as connection:
+        connection.execute("UPDATE fitids SET fitid = 'legacy-1'")
+    with ContentIdGenerator("XXX111", index) as generator:
+        assert generator.create_id("20240102", row("INT")) == "legacy-1"
+    with ContentIdGenerator("XXX222", index) as generator:
+        assert generator.create_id("20240102", row("INT")) == issued
+
+
+def test_unknown_ids_setting():
+    with pytest.raises(ValueError):
+        SchwabJsonParser("test.json", ids="random")
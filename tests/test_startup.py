@@ -0,0 +1,54 @@
+"""ofxstatement imports the plugin on every run, so keep that import cheap"""
+
+import subprocess
+import sys
+
+# Microseconds allowed for importing the plugin module, on top of
+# ofxstatement's own plugin module. It takes about 1ms.
+IMPORT_BUDGET_US = 10000
+
+PLUGIN_MODULES = {"ofxstatement_schwab_json", "ofxstatement_schwab_json.plugin"}
+
+
+def run_python(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args], capture_output=True, text=True, check=True
+    )
+
+
+def test_plugin_imports_nothing_else():
+    result = run_python(
+        "-c",
+        "import sys, ofxstatement.plugin\n"
+        "before = set(sys.modules)\n"
+        "import ofxstatement_schwab_json.plugin\n"
+        "print(' '.join(sorted(set(sys.modules) - before)))",
+    )
+    assert set(result.stdout.split()) == PLUGIN_MODULES
+
+
+def test_plugin_import_time():
+    def import_time() -> int:
+        result = run_python(
+            "-X",
+            "importtime",
+            "-c",
+            "import ofxstatement.plugin, ofxstatement_schwab_json.plugin",
+        )
+        # import time: self [us] | cumulative | imported package
+        for line in result.stderr.splitlines():
+            _, cumulative, name = line.split("|")
+            if name.strip() == "ofxstatement_schwab_json.plugin":
+                return int(cumulative)
+        raise AssertionError("plugin import not found")
+
+    # The best of a few runs, to allow for a busy machine
+    assert min(import_time() for _ in range(3)) < IMPORT_BUDGET_US
+
+
+def test_old_imports():
+    from ofxstatement_schwab_json import parser, plugin
+
+    assert plugin.SchwabJsonParser is parser.SchwabJsonParser
+    assert plugin.BROKERAGE_ACTIONS is parser.BROKERAGE_ACTIONS
+    assert plugin.account_id_from_filename("A_Transactions_1.json") == "A"
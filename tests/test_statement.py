@@ -1,10 +1,15 @@
+from datetime import datetime
 import os
 
 import ofxstatement
 import pytest
 from decimal import Decimal
 
-from ofxstatement_schwab_json.plugin import SchwabJsonPlugin
+from ofxstatement_schwab_json.plugin import (
+    BROKERAGE_ACTIONS,
+    SchwabJsonParser,
+    SchwabJsonPlugin,
+)
 
 import logging
 
@@ -525,3 +530,90 @@ def test_posted_transfer(statement):
     assert line.memo == "Funds Transfer from Brokerage"
     assert line.trntype == "XFER"
     assert line.amount == Decimal("100")
+
+
+def brokerage_row(action, symbol="", amount="-$1.00"):
+    return {
+        "Date": "01/02/2024",
+        "Action": action,
+        "Symbol": symbol,
+        "Description": "TEST",
+        "Quantity": "",
+        "Price": "",
+        "Fees & Comm": "",
+        "Amount": amount,
+    }
+
+
+def test_unrecognized_action():
+    parser = SchwabJsonParser("test.json")
+    with pytest.raises(Exception, match='Unrecognized action: "Mystery"'):
+        parser.import_lines([], [brokerage_row("Mystery", symbol="AAPL")])
+    with pytest.raises(Exception, match='Unrecognized bank action: "Mystery"'):
+        parser.import_lines([], [brokerage_row("Mystery")])
+
+
+def test_returned_check_requires_negative_amount():
+    parser = SchwabJsonParser("test.json")
+    parser.import_lines([], [brokerage_row("Returned Check")])
+    assert parser.statement.invest_lines[0].trntype_detailed == "DEBIT"
+    with pytest.raises(Exception, match="Unrecognized bank action"):
+        parser.import_lines([], [brokerage_row("Returned Check", amount="$1.00")])
+
+
+def test_custom_action():
+    class CustomParser(SchwabJsonParser):
+        actions = {
+            **BROKERAGE_ACTIONS,
+            ("Mystery", False, None): ("add_bank_line", "OTHER"),
+        }
+
+    parser = CustomParser("test.json")
+    parser.import_lines([], [brokerage_row("Mystery")])
+    line = parser.statement.invest_lines[0]
+    assert line.trntype == "INVBANKTRAN"
+    assert line.trntype_detailed == "OTHER"
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_iter_lines(statement, streaming):
+    here = os.path.dirname(__file__)
+    parser = SchwabJsonParser(
+        os.path.join(here, "sample-statement.json"), streaming=streaming
+    )
+    lines = parser.iter_lines()
+    first = next(lines)
+    assert first.id == statement.lines[0].id
+    rest = list(lines)
+
+    assert [line.id for line in [first] + rest] == [
+        line.id for line in statement.lines + statement.invest_lines
+    ]
+    assert parser.statement.lines == []
+    assert parser.statement.invest_lines == []
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_date_range(statement, streaming):
+    here = os.path.dirname(__file__)
+    parser = SchwabJsonParser(
+        os.path.join(here, "sample-statement.json"),
+        streaming=streaming,
+        start="2024-01-13",
+        end="2024-04",
+    )
+    filtered = parser.parse()
+    lines = statement.lines + statement.invest_lines
+    expected = [
+        str(line)
+        for line in lines
+        if datetime(2024, 1, 13) <= line.date <= datetime(2024, 4, 30)
+    ]
+    # Same IDs as in the full parse
+    assert [str(line) for line in filtered.lines + filtered.invest_lines] == expected
+    assert len(expected) > 10
+
+
+def test_date_range_invalid():
+    with pytest.raises(ValueError, match="does not match"):
+        SchwabJsonParser("test.json", start="01/13/2024")
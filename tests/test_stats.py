@@ -0,0 +1,71 @@
+import json
+import os
+
+import ofxstatement
+import pytest
+
+from ofxstatement_schwab_json.plugin import SchwabJsonParser, SchwabJsonPlugin
+from ofxstatement_schwab_json.stats import ActionStats, ParseStats
+
+HERE = os.path.dirname(__file__)
+SAMPLE = os.path.join(HERE, "sample-statement.json")
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_instrumented_parse(streaming):
+    parser = SchwabJsonParser(SAMPLE, streaming=streaming, instrument=True)
+    statement = parser.parse()
+
+    stats = parser.stats
+    assert stats is not None
+    assert stats.rows == len(statement.lines) + len(statement.invest_lines)
+    assert set(stats.stages) == {"load", "rows", "dispatch", "handlers", "validate"}
+    assert stats.actions["PostedTransactions"].count == len(statement.lines)
+    assert stats.actions["PostedTransactions"].handler == "add_statement_line"
+    assert stats.actions["Buy"].handler == "add_buy_line"
+    assert stats.actions["Sell"].handler == "add_sell_line"
+    for action in stats.actions.values():
+        assert sum(action.histogram) == action.count
+
+
+def test_not_instrumented():
+    parser = SchwabJsonParser(SAMPLE)
+    parser.parse()
+    assert parser.stats is None
+
+
+def test_stats_setting(tmp_path):
+    stats_file = tmp_path / "stats.json"
+    plugin = SchwabJsonPlugin(ofxstatement.ui.UI(), {"stats": str(stats_file)})
+    statement = plugin.get_parser(SAMPLE).parse()
+
+    dumped = json.loads(stats_file.read_text())
+    assert dumped["rows"] == len(statement.lines) + len(statement.invest_lines)
+    assert "load" in dumped["stages"]
+    assert dumped["actions"]["Buy"]["handler"] == "add_buy_line"
+    assert sum(dumped["actions"]["Buy"]["histogram"].values()) == (
+        dumped["actions"]["Buy"]["count"]
+    )
+
+
+def test_histogram_buckets():
+    action = ActionStats("add_buy_line")
+    action.record(0.0000005)
+    action.record(0.000003)
+    action.record(10.0)
+    assert action.count == 3
+    assert action.histogram[0] == 1
+    assert action.histogram[2] == 1
+    assert action.histogram[-1] == 1
+
+
+def test_failed_handler_is_counted():
+    stats = ParseStats()
+
+    def add_line(*args):
+        raise ValueError("bad row")
+
+    with pytest.raises(ValueError):
+        stats.timed_handler("Buy", add_line)(1, 2)
+    assert stats.actions["Buy"].count == 1
+    assert "handlers" in stats.stages
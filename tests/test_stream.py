@@ -0,0 +1,139 @@
+import json
+import os
+
+import ofxstatement
+import pytest
+
+from ofxstatement_schwab_json import stream
+from ofxstatement_schwab_json.plugin import SchwabJsonPlugin
+from ofxstatement_schwab_json.stream import ExportReader, scan_arrays
+
+HERE = os.path.dirname(__file__)
+SAMPLE = os.path.join(HERE, "sample-statement.json")
+
+
+def parse(**settings) -> ofxstatement.statement.Statement:
+    plugin = SchwabJsonPlugin(ofxstatement.ui.UI(), settings)
+    return plugin.get_parser(SAMPLE).parse()
+
+
+def test_streaming_matches_full_parse():
+    expected = parse()
+    actual = parse(streaming="true")
+
+    assert [str(x) for x in actual.lines] == [str(x) for x in expected.lines]
+    assert [str(x) for x in actual.invest_lines] == [
+        str(x) for x in expected.invest_lines
+    ]
+
+
+def test_reader_counts():
+    with ExportReader(SAMPLE) as reader:
+        assert reader.count("PostedTransactions") == 12
+        assert reader.count("BrokerageTransactions") == 41
+        assert reader.count("Missing") == 0
+
+
+def test_reader_chronological(tmp_path):
+    export = tmp_path / "export.json"
+    export.write_text(
+        '{"BrokerageTransactions": [{"Date": "02/01/2024"}, {"Date": "01/01/2024"}]}'
+    )
+    with ExportReader(str(export)) as reader:
+        rows = list(reader.chronological("BrokerageTransactions"))
+    assert rows == [{"Date": "01/01/2024"}, {"Date": "02/01/2024"}]
+
+
+def test_reader_chronological_range(tmp_path):
+    export = tmp_path / "export.json"
+    export.write_text(
+        '{"BrokerageTransactions": [{"Date": "03/01/2024"}, {"Date": "02/01/2024"},'
+        ' {"Date" : "01/31/2024 as of 01/30/2024"}, {"Date": "01/01/2024"}]}'
+    )
+    with ExportReader(str(export)) as reader:
+        rows = list(reader.chronological("BrokerageTransactions", "20240131", None))
+        assert rows == [
+            {"Date": "01/31/2024 as of 01/30/2024"},
+            {"Date": "02/01/2024"},
+            {"Date": "03/01/2024"},
+        ]
+        rows = list(reader.chronological("BrokerageTransactions", None, "20240131"))
+        assert rows == [{"Date": "01/01/2024"}, {"Date": "01/31/2024 as of 01/30/2024"}]
+
+
+def test_scan_skips_other_values():
+    buf = (
+        b'{"FromDate": "01/01/2024", "Total": -1.5, "Nested": {"a": [1, {"b": "]"}]},'
+        b' "PostedTransactions": [ {"Description": "brace } and quote \\" inside"} ],'
+        b' "BrokerageTransactions": []}'
+    )
+    spans = scan_arrays(buf)
+    assert len(spans["BrokerageTransactions"]) == 0
+    start, end = spans["PostedTransactions"]
+    assert buf[start:end] == b'{"Description": "brace } and quote \\" inside"}'
+
+
+def test_scan_rejects_truncated_file():
+    with pytest.raises(ValueError):
+        scan_arrays(b'{"PostedTransactions": [{"Date": "01/01/2024"}')
+
+
+def test_index_is_reused(tmp_path, monkeypatch):
+    export = tmp_path / "export.json"
+    export.write_bytes(open(SAMPLE, "rb").read())
+    with ExportReader(str(export), index=True) as reader:
+        expected = list(reader.chronological("BrokerageTransactions"))
+    assert os.path.exists(str(export) + ".idx")
+
+    def scan(*args):
+        raise AssertionError("scanned the export again")
+
+    monkeypatch.setattr(stream, "scan_arrays", scan)
+    with ExportReader(str(export), index=True) as reader:
+        assert reader.count("PostedTransactions") == 12
+        assert list(reader.chronological("BrokerageTransactions")) == expected
+
+
+def test_index_is_rebuilt(tmp_path):
+    export = tmp_path / "export.json"
+    export.write_text('{"BrokerageTransactions": [{"Date": "01/01/2024"}]}')
+    with ExportReader(str(export), index=True) as reader:
+        assert reader.count("BrokerageTransactions") == 1
+    export.write_text(
+        '{"BrokerageTransactions": [{"Date": "02/01/2024"}, {"Date": "01/01/2024"}]}'
+    )
+    with ExportReader(str(export), index=True) as reader:
+        assert reader.count("BrokerageTransactions") == 2
+        assert reader.day("BrokerageTransactions", 0) == 20240201
+
+
+@pytest.mark.parametrize("rows", ["03/01/2024", "01/01/2024"])
+def test_index_range(tmp_path, rows):
+    export = tmp_path / "export.json"
+    # Newest first, or with one row out of order
+    dates = [rows, "02/01/2024", "01/31/2024 as of 01/30/2024", "01/15/2024"]
+    export.write_text(
+        json.dumps({"BrokerageTransactions": [{"Date": d} for d in dates]})
+    )
+    with ExportReader(str(export)) as reader:
+        expected = list(
+            reader.chronological("BrokerageTransactions", "20240131", "20240301")
+        )
+    with ExportReader(str(export), index=True) as reader:
+        assert reader.ordered["BrokerageTransactions"] == (rows == "03/01/2024")
+        rows = list(
+            reader.chronological("BrokerageTransactions", "20240131", "20240301")
+        )
+    assert rows == expected
+    assert len(rows) == (3 if dates[0] == "03/01/2024" else 2)
+
+
+def test_index_parse(tmp_path):
+    export = tmp_path / "Test_XXX000_Transactions_20240101-000000.json"
+    export.write_bytes(open(SAMPLE, "rb").read())
+    plugin = SchwabJsonPlugin(ofxstatement.ui.UI(), {"index": "true"})
+    for _ in range(2):
+        statement = plugin.get_parser(str(export)).parse()
+        assert [str(x) for x in statement.invest_lines] == [
+            str(x) for x in parse().invest_lines
+        ]
@@ -0,0 +1,31 @@
+import json
+
+from ofxstatement_schwab_json.plugin import SchwabJsonParser
+from ofxstatement_schwab_json.synthetic import ExportGenerator, parse_mix
+
+
+def test_synthetic_export_parses(tmp_path):
+    filename = tmp_path / "Synthetic_XXX000_Transactions_20260101-000000.json"
+    ExportGenerator(2000, posted_rows=200, symbols=10, seed=1).write(str(filename))
+
+    statement = SchwabJsonParser(str(filename)).parse()
+    assert len(statement.invest_lines) == 2000
+    assert len(statement.lines) == 200
+    assert {x.trntype for x in statement.invest_lines} == {
+        "BUYSTOCK",
+        "SELLSTOCK",
+        "INCOME",
+        "INVBANKTRAN",
+        "TRANSFER",
+    }
+    assert len({x.security_id for x in statement.invest_lines}) == 11  # and None
+    assert [x.date for x in statement.invest_lines] == sorted(
+        x.date for x in statement.invest_lines
+    )
+
+
+def test_synthetic_mix():
+    generator = ExportGenerator(500, mix=parse_mix("cash=1"))
+    rows = generator.generate()["BrokerageTransactions"]
+    assert all(row["Symbol"] == "" for row in rows)
+    assert json.dumps(rows)
@@ -0,0 +1,120 @@
+from datetime import datetime
+import json
+import os
+
+import ofxstatement
+import pytest
+
+from ofxstatement_schwab_json.plugin import SchwabJsonParser, SchwabJsonPlugin
+from ofxstatement_schwab_json.validation import DeferredValidator, LinesValidationError
+
+HERE = os.path.dirname(__file__)
+SAMPLE = os.path.join(HERE, "sample-statement.json")
+
+
+def row(action, amount, symbol=""):
+    return {
+        "Date": "01/02/2024",
+        "Action": action,
+        "Symbol": symbol,
+        "Description": "TEST",
+        "Quantity": "",
+        "Price": "",
+        "Fees & Comm": "",
+        "Amount": amount,
+    }
+
+
+# A dividend and a bank transaction need non-zero amounts
+INVALID_ROWS = [
+    row("Credit Interest", "$1.00"),
+    row("Cash Dividend", "$0.00", symbol="AAPL"),
+    row("Credit Interest", "$2.00"),
+    row("Credit Interest", "$0.00"),
+]
+
+
+@pytest.mark.parametrize("validation", ["deferred", "trusted"])
+def test_same_lines(validation):
+    expected = SchwabJsonParser(SAMPLE).parse()
+    statement = SchwabJsonParser(SAMPLE, validation=validation).parse()
+    assert [x.id for x in statement.invest_lines] == [
+        x.id for x in expected.invest_lines
+    ]
+    assert len(statement.lines) == len(expected.lines)
+
+
+def test_immediate_fails_on_first_line():
+    parser = SchwabJsonParser("test.json")
+    with pytest.raises(AssertionError):
+        parser.import_lines([], INVALID_ROWS)
+    assert len(parser.statement.invest_lines) == 1
+
+
+def test_deferred_report():
+    parser = SchwabJsonParser("test.json", validation="deferred")
+    with pytest.raises(LinesValidationError) as raised:
+        parser.import_lines([], INVALID_ROWS)
+
+    errors = raised.value.errors
+    assert [(e.row, e.action, e.id) for e in errors] == [
+        (1, "Cash Dividend", "20240102-2"),
+        (3, "Credit Interest", "20240102-4"),
+    ]
+    assert errors[0].reason == "assert self.amount"
+    assert "2 invalid transactions" in str(raised.value)
+    # Every line was still produced
+    assert len(parser.statement.invest_lines) == 4
+
+
+def test_deferred_failure_keeps_watermark(tmp_path):
+    filename = tmp_path / "Joint_XXX111_Transactions_20260101-000000.json"
+    filename.write_text(
+        json.dumps({"BrokerageTransactions": list(reversed(INVALID_ROWS))})
+    )
+    settings = {"validation": "deferred", "watermarks": str(tmp_path / "wm.sqlite")}
+    plugin = SchwabJsonPlugin(ofxstatement.ui.UI(), settings)
+    with pytest.raises(LinesValidationError):
+        plugin.get_parser(str(filename)).parse()
+
+    # Nothing was recorded as imported, so a fixed export imports everything
+    settings["validation"] = "trusted"
+    statement = plugin.get_parser(str(filename)).parse()
+    assert len(statement.invest_lines) == 4
+
+
+def test_trusted_skips_validation():
+    parser = SchwabJsonParser("test.json", validation="trusted")
+    parser.import_lines([], INVALID_ROWS)
+    assert len(parser.statement.invest_lines) == 4
+
+
+def test_unknown_validation():
+    with pytest.raises(ValueError, match="validation"):
+        SchwabJsonParser("test.json", validation="sometimes")
+
+
+def bank_line(id, amount):
+    return SchwabJsonParser("test.json", validation="trusted").add_bank_line(
+        id, datetime(2024, 1, 2), "INT", row("Credit Interest", amount)
+    )
+
+
+@pytest.mark.parametrize("batch_size", [1, 2, 100])
+def test_validator_batches(batch_size):
+    validator = DeferredValidator(batch_size)
+    for n in range(5):
+        validator.add(bank_line(f"20240102-{n + 1}", f"${n % 2}.00"), "Credit Interest")
+    assert len(validator.pending) < batch_size
+    with pytest.raises(LinesValidationError) as raised:
+        validator.finish()
+    assert [e.row for e in raised.value.errors] == [0, 2, 4]
+
+
+def test_validator_unknown_trntype():
+    validator = DeferredValidator()
+    line = bank_line("20240102-1", "$1.00")
+    line.trntype = "MYSTERY"
+    validator.add(line, "Mystery")
+    with pytest.raises(LinesValidationError, match="trntype MYSTERY is not valid"):
+        validator.finish()
@@ -0,0 +1,74 @@
+import asyncio
+import json
+import os
+import shutil
+
+from ofxstatement_schwab_json.watch import WatchService
+
+HERE = os.path.dirname(__file__)
+SAMPLE = os.path.join(HERE, "sample-statement.json")
+EXPORT = "Joint_XXX111_Transactions_20240101-000000.json"
+
+
+def test_poll_waits_for_files_to_settle(tmp_path):
+    service = WatchService(str(tmp_path), {}, settle=5)
+    export = tmp_path / EXPORT
+    export.write_text("{")
+    (tmp_path / "notes.json").write_text("{}")
+    assert service.poll(0) == []
+    assert service.poll(4) == []
+    # Still being written: the wait starts over
+    export.write_text('{"BrokerageTransactions": []}')
+    assert service.poll(6) == []
+    assert service.poll(10) == []
+    assert service.poll(11) == [str(export)]
+    # Converted once, until it changes
+    assert service.poll(20) == []
+    export.write_text('{"BrokerageTransactions": [], "PostedTransactions": []}')
+    assert service.poll(21) == []
+    assert service.poll(26) == [str(export)]
+
+
+def test_poll_skips_converted_exports(tmp_path):
+    shutil.copy(SAMPLE, tmp_path / EXPORT)
+    out = tmp_path / "ofx"
+    out.mkdir()
+    (out / EXPORT.replace(".json", ".ofx")).write_text("")
+    service = WatchService(str(tmp_path), {}, output_dir=str(out), settle=0)
+    assert service.poll(0) == []
+    assert service.poll(1) == []
+
+
+def test_run_converts(tmp_path):
+    drop = tmp_path / "drop"
+    drop.mkdir()
+    shutil.copy(SAMPLE, drop / EXPORT)
+    (drop / "Bad_XXX333_Transactions_20240101-000000.json").write_text("{")
+    out = tmp_path / "ofx"
+    out.mkdir()
+    metrics = tmp_path / "metrics.json"
+    service = WatchService(
+        str(drop),
+        {},
+        output_dir=str(out),
+        jobs=1,
+        interval=0.01,
+        settle=0,
+        metrics_file=str(metrics),
+    )
+
+    async def watch():
+        stop = asyncio.Event()
+        task = asyncio.create_task(service.run(stop))
+        while service.metrics.converted + service.metrics.failed < 2:
+            await asyncio.sleep(0.01)
+        stop.set()
+        await task
+
+    asyncio.run(asyncio.wait_for(watch(), 30))
+    ofx = (out / EXPORT.replace(".json", ".ofx")).read_text()
+    assert "<ACCTID>Joint_XXX111</ACCTID>" in ofx
+    written = json.loads(metrics.read_text())
+    assert written["queue_depth"] == 0 and written["running"] == 0
+    assert (written["converted"], written["failed"], written["lines"]) == (1, 1, 53)
+    assert sum(written["latency"]["histogram"].values()) == 2
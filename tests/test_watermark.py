@@ -0,0 +1,84 @@
+import json
+import os
+
+import ofxstatement
+import pytest
+
+from ofxstatement_schwab_json.plugin import SchwabJsonPlugin
+from ofxstatement_schwab_json.watermark import Watermark, WatermarkStore
+
+HERE = os.path.dirname(__file__)
+SAMPLE = os.path.join(HERE, "sample-statement.json")
+
+
+@pytest.fixture
+def export(tmp_path):
+    with open(SAMPLE) as f:
+        loaded = json.load(f)
+    filename = tmp_path / "Joint_XXX111_Transactions_20260101-000000.json"
+    filename.write_text(json.dumps(loaded))
+    return filename
+
+
+def parse(filename, **settings):
+    plugin = SchwabJsonPlugin(ofxstatement.ui.UI(), settings)
+    return plugin.get_parser(str(filename)).parse()
+
+
+def add_rows(filename, *rows):
+    loaded = json.loads(filename.read_text())
+    # Newest rows come first in Schwab exports
+    loaded["BrokerageTransactions"][0:0] = reversed(rows)
+    filename.write_text(json.dumps(loaded))
+
+
+def cash_row(date, amount):
+    return {
+        "Date": date,
+        "Action": "Credit Interest",
+        "Symbol": "",
+        "Description": "SCHWAB1 INT",
+        "Quantity": "",
+        "Price": "",
+        "Fees & Comm": "",
+        "Amount": amount,
+    }
+
+
+def test_incremental_import(export, tmp_path):
+    watermarks = str(tmp_path / "watermarks.sqlite")
+
+    first = parse(export, watermarks=watermarks)
+    assert len(first.lines) == 12
+    assert len(first.invest_lines) == 41
+
+    second = parse(export, watermarks=watermarks)
+    assert second.lines == []
+    assert second.invest_lines == []
+
+    # A late posting on the last imported date, and a new date
+    add_rows(export, cash_row("12/30/2025", "$0.01"), cash_row("01/02/2026", "$0.02"))
+    third = parse(export, watermarks=watermarks)
+    full = parse(export)
+    assert [x.id for x in third.invest_lines] == ["20251230-2", "20260102-1"]
+    assert [str(x) for x in third.invest_lines] == [
+        str(x) for x in full.invest_lines[-2:]
+    ]
+
+
+def test_watermarks_are_per_account(export, tmp_path):
+    watermarks = str(tmp_path / "watermarks.sqlite")
+    parse(export, watermarks=watermarks)
+    other = tmp_path / "IRA_XXX222_Transactions_20260101-000000.json"
+    other.write_text(export.read_text())
+    assert len(parse(other, watermarks=watermarks).invest_lines) == 41
+
+
+def test_store_only_advances(tmp_path):
+    with WatermarkStore(str(tmp_path / "watermarks.sqlite")) as store:
+        store.advance("XXX111", Watermark("20250101", 2))
+        store.advance("XXX111", Watermark("20240101", 5))
+        assert store.get("XXX111") == Watermark("20250101", 2)
+        store.advance("XXX111", Watermark("20250101", 3))
+        assert store.get("XXX111") == Watermark("20250101", 3)
+        assert store.get("XXX222") is None
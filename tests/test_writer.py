@@ -0,0 +1,54 @@
+from datetime import datetime
+import io
+import json
+import os
+
+import pytest
+
+from ofxstatement_schwab_json.parser import SchwabJsonParser
+from ofxstatement_schwab_json.synthetic import ExportGenerator
+from ofxstatement_schwab_json.writer import SchwabOfxWriter
+
+HERE = os.path.dirname(__file__)
+SAMPLE = os.path.join(HERE, "sample-statement.json")
+GEN_TIME = datetime(2026, 1, 1, 12, 30)
+
+
+def expected(filename, pretty, encoding="utf-8"):
+    writer = SchwabOfxWriter(SchwabJsonParser(filename).parse())
+    writer.genTime = GEN_TIME
+    return writer.toxml(pretty=pretty, encoding=encoding)
+
+
+def streamed(filename, pretty, encoding="utf-8", **options):
+    out = io.StringIO()
+    SchwabJsonParser(filename, **options).write_ofx(out, pretty, encoding, GEN_TIME)
+    return out.getvalue()
+
+
+@pytest.mark.parametrize("pretty", [False, True])
+def test_same_as_writer(pretty):
+    assert streamed(SAMPLE, pretty) == expected(SAMPLE, pretty)
+    assert streamed(SAMPLE, pretty, "cp1252", streaming=True) == expected(
+        SAMPLE, pretty, "cp1252"
+    )
+
+
+@pytest.mark.parametrize("pretty", [False, True])
+def test_same_as_writer_synthetic(tmp_path, pretty):
+    export = ExportGenerator(500, posted_rows=200, seed=4).generate()
+    posted = export["PostedTransactions"]
+    posted[0]["Description"] = 'Tom & Jerry\'s <"cafe">\r\n  '
+    posted[1]["Description"] = ""
+    export["BrokerageTransactions"][0]["Description"] = "A&B > C"
+    filename = tmp_path / "Test_XXX000_Transactions_20260101-000000.json"
+    filename.write_text(json.dumps(export))
+    assert streamed(str(filename), pretty) == expected(str(filename), pretty)
+
+
+@pytest.mark.parametrize("rows", [{}, {"PostedTransactions": []}])
+def test_no_lines(tmp_path, rows):
+    filename = tmp_path / "Empty_XXX000_Transactions_20260101-000000.json"
+    filename.write_text(json.dumps(rows))
+    for pretty in (False, True):
+        assert streamed(str(filename), pretty) == expected(str(filename), pretty)